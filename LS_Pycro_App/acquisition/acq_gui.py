@@ -1,3 +1,8 @@
+import logging
+import threading
+from datetime import datetime
+from typing import TextIO
+
 from LS_Pycro_App.utils.exceptions import AbortFlag
 from LS_Pycro_App.views import AcqDialog, AbortDialog
 
@@ -46,4 +51,38 @@ class CLSAcqGui(AcqGui):
 
 
 class HTLSAcqGui(AcqGui):
-    pass
\ No newline at end of file
+    pass
+
+class StreamAcqGui():
+    """
+    Stands in for CLSAcqGui or HTLSAcqGui when there's no GUI (see headless_start.py). Every update is
+    written to stream as a timestamped line, so progress can be followed in a console or a log file.
+    Aborting is done by setting the acquisition's AbortFlag directly.
+
+    ## Constructor parameters:
+
+    #### stream : TextIO
+        stream updates are written to, such as sys.stdout or an open file.
+    """
+    def __init__(self, stream: TextIO):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def fish_update(self, fish_num: int):
+        self._write(f"Fish {fish_num}")
+
+    def region_update(self, region_num: int):
+        self._write(f"Region {region_num}")
+
+    def timepoint_update(self, timepoint_num: int):
+        self._write(f"Timepoint {timepoint_num}")
+
+    def status_update(self, message: str):
+        self._write(message)
+
+    def _write(self, message: str):
+        self._logger.info(message)
+        with self._lock:
+            self._stream.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} {message}\n")
+            self._stream.flush()
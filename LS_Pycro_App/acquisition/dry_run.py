@@ -0,0 +1,450 @@
+"""
+Dry run of an acquisition. The real acquisition sequences (TimeSampAcquisition, SampTimeAcquisition,
+PosTimeAcquisition and the imaging sequences they run) are played out against the simulated devices in
+hardware.simulated instead of the real hardware, with a VirtualClock so that a plan that would take
+hours finishes in a second or two. Stage moves take as long as they would at the default stage speed,
+z-stack scans move at Plc.get_true_z_stack_stage_speed(), videos take an exposure (plus readout) per
+frame, and so on.
+
+Nothing is moved and nothing is written to disk. Images are counted by a stand-in datastore, which is
+how the required write bandwidth is figured out.
+
+The result is a DryRunReport, which has the predicted duration of every time point and whether
+time_points_interval_sec can be met, so we find out before the acquisition starts instead of hours into
+it.
+
+Notes:
+
+- This works by swapping out the hardware, core, pycro, and time module globals of acquisition.sequences
+and acquisition.imaging for the duration of the dry run, so it can't run while a real acquisition is 
+running. Both hold sequences.hardware_lock while they run, and a dry run started during an acquisition
+raises AcquisitionRunningException instead of waiting hours for it.
+
+- If Micro-Manager isn't connected, the simulated core stands in for the real one for the whole dry run
+(see pycro.simulated()), so image sizes come from SimCamera instead of the camera. Settings for a dry
+run without Micro-Manager have to be made inside simulated_micro_manager(), since AcqSettings reads the
+channel list from the core.
+
+- Timings are only as good as the numbers in hardware.simulated. Anything that isn't simulated (camera
+mode changes on the real camera class, disk speed, the bridge) isn't included.
+"""
+
+import contextlib
+import logging
+from copy import deepcopy
+
+from LS_Pycro_App.acquisition import imaging, sequences
+from LS_Pycro_App.hardware import Galvo
+from LS_Pycro_App.hardware.simulated import SimCamera, SimCore, SimGalvo, SimPlc, SimStage, VirtualClock
+from LS_Pycro_App.models.acq_directory import AcqDirectory
+from LS_Pycro_App.models.acq_settings import AcqSettings, HTLSSettings
+from LS_Pycro_App.utils import constants, exceptions, pycro
+from LS_Pycro_App.utils.pycro import camera_geometry
+
+
+def simulated_micro_manager():
+    """
+    Context manager that uses a SimCore as the Micro-Manager core until it exits (see pycro.simulated()),
+    so settings for a dry run can be made on a computer without Micro-Manager.
+    """
+    clock = VirtualClock()
+    return pycro.simulated(SimCore(SimCamera(clock), SimStage(clock), SimPlc(clock), clock))
+
+
+class TimePointPrediction():
+    """
+    Predicted timing of a single time point.
+
+    #### label : str
+        series time point belongs to. Empty for TimeSampAcquisition, "fish n" for SampTimeAcquisition,
+        InterleavedAcquisition and HTLS, and "fish n region m" for PosTimeAcquisition.
+
+    #### time_point_num : int
+
+    #### start_s : float
+        start time in seconds since start of dry run.
+
+    #### duration_s : float
+        time from start of time point until acquisition starts waiting for the next one.
+
+    #### interval_s : float
+        time_points_interval_sec, or None if there's no next time point in the series.
+
+    #### size_mb : float
+        size of images taken during time point.
+    """
+    def __init__(self, label: str, time_point_num: int, start_s: float, interval_s: float):
+        self.label = label
+        self.time_point_num = time_point_num
+        self.start_s = start_s
+        self.duration_s = 0.
+        self.interval_s = interval_s
+        self.size_mb = 0.
+
+    @property
+    def is_interval_missed(self) -> bool:
+        return self.interval_s is not None and self.duration_s > self.interval_s
+
+    @property
+    def write_mb_per_s(self) -> float:
+        return self.size_mb/self.duration_s if self.duration_s else 0.
+
+
+class DryRunReport():
+    """
+    Result of a dry run.
+
+    #### time_points : list[TimePointPrediction]
+        every time point in the order it was acquired.
+
+    #### sequences : list[tuple[str, float, float]]
+        (directory, duration in seconds, size in MB) of every datastore, ie every channel of every
+        imaging sequence.
+
+    #### duration_s : float
+        predicted duration of the whole acquisition, including waiting between time points.
+
+    #### image_size_mb : float
+        image size used to calculate sizes.
+    """
+    def __init__(self, image_size_mb: float):
+        self.time_points: list[TimePointPrediction] = []
+        self.sequences: list[tuple[str, float, float]] = []
+        self.duration_s = 0.
+        self.image_size_mb = image_size_mb
+
+    @property
+    def missed_time_points(self) -> list[TimePointPrediction]:
+        return [time_point for time_point in self.time_points if time_point.is_interval_missed]
+
+    @property
+    def size_mb(self) -> float:
+        return sum(size_mb for _, _, size_mb in self.sequences)
+
+    @property
+    def sustained_write_mb_per_s(self) -> float:
+        """
+        Write bandwidth needed to keep up with the busiest time point.
+        """
+        return max((time_point.write_mb_per_s for time_point in self.time_points), default=0.)
+
+    @property
+    def peak_write_mb_per_s(self) -> float:
+        """
+        Write bandwidth needed to keep up with the fastest single imaging sequence.
+        """
+        return max((size_mb/duration_s for _, duration_s, size_mb in self.sequences if duration_s), default=0.)
+
+    @property
+    def mean_write_mb_per_s(self) -> float:
+        return self.size_mb/self.duration_s if self.duration_s else 0.
+
+    def get_summary(self) -> str:
+        lines = [f"Predicted duration: {_format_time(self.duration_s)}",
+                 f"Predicted size: {self.size_mb*constants.MB_TO_GB:.2f} GB",
+                 f"Sustained write bandwidth: {self.sustained_write_mb_per_s:.1f} MB/s "
+                 f"(peak {self.peak_write_mb_per_s:.1f} MB/s, mean {self.mean_write_mb_per_s:.1f} MB/s)"]
+        for time_point in self.missed_time_points:
+            lines.append(f"{time_point.label} time point {time_point.time_point_num + 1} takes "
+                         f"{_format_time(time_point.duration_s)}, interval is {_format_time(time_point.interval_s)}".strip())
+        return "\n".join(lines)
+
+
+def _format_time(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, constants.S_IN_MIN)
+    #minutes in an hour, same as seconds in a minute
+    hours, minutes = divmod(int(minutes), constants.S_IN_MIN)
+    return f"{hours}:{minutes:02d}:{seconds:04.1f}"
+
+
+class DryRun():
+    """
+    Plays out an acquisition against simulated hardware. See module docstring.
+
+    ## Constructor parameters:
+
+    #### acq_settings : AcqSettings
+        settings of acquisition. Copied, so acq_settings isn't changed.
+
+    #### Sequence : type
+        acquisition sequence class, such as TimeSampAcquisition.
+
+    #### image_size_mb : float
+        size of a single image. If None, camera_geometry.image_size_mb is used, which is the simulated
+        camera's if Micro-Manager isn't connected.
+
+    ## Methods:
+
+    #### run() -> DryRunReport
+        runs dry run and returns the predictions. Raises AcquisitionRunningException if an acquisition
+        is running.
+    """
+    #nobody is going to abort a dry run, so there's no need to wake up often while waiting for next time point
+    _ABORT_CHECK_INTERVAL_S = 10
+    #label of time points for sequences where each fish/region has its own series
+    _SERIES_LABELS = {sequences.SampTimeAcquisition: "fish {fish_num}",
+                      sequences.InterleavedAcquisition: "fish {fish_num}",
+                      sequences.PosTimeAcquisition: "fish {fish_num} region {region_num}"}
+
+    def __init__(self, acq_settings: AcqSettings, Sequence: type = None, image_size_mb: float = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._acq_settings = deepcopy(acq_settings)
+        self._adv_settings = self._acq_settings.adv_settings
+        self._Sequence = Sequence
+        self._image_size_mb = image_size_mb
+        self._clock = VirtualClock()
+        self._camera = SimCamera(self._clock)
+        self._stage = _DryRunStage(self._clock)
+        self._plc = SimPlc(self._clock)
+        self._galvo = SimGalvo(self._clock, deepcopy(Galvo.settings)) if Galvo else None
+        self._core = SimCore(self._camera, self._stage, self._plc, self._clock)
+        self._gui = _DryRunGui()
+        self._report: DryRunReport = None
+        self._is_time_point_open = False
+
+    def run(self) -> DryRunReport:
+        if not sequences.hardware_lock.acquire(blocking=False):
+            raise exceptions.AcquisitionRunningException("Dry run can't run while an acquisition or another dry run is running")
+        try:
+            self._run()
+        finally:
+            sequences.hardware_lock.release()
+        self._logger.info(f"Dry run finished\n{self._report.get_summary()}")
+        return self._report
+
+    def _run(self):
+        with self._simulated_hardware():
+            if self._image_size_mb is None:
+                self._image_size_mb = camera_geometry.image_size_mb
+            self._report = DryRunReport(self._image_size_mb)
+            self._logger.info("Dry run started")
+            self._init_hardware()
+            self._run_sequence(AcqDirectory(self._acq_settings.directory), exceptions.AbortFlag())
+            self._end_time_point()
+        self._report.duration_s = self._clock.time()
+
+    def _init_hardware(self):
+        #same as CLSAcquisition._init_hardware()
+        step_size = self._acq_settings.get_first_step_size()
+        if step_size:
+            self._plc.set_for_z_stack(step_size, self._adv_settings.z_stack_stage_speed)
+
+    def _run_sequence(self, acq_directory: AcqDirectory, abort_flag: exceptions.AbortFlag):
+        sequence = self._Sequence(self._acq_settings, self._gui, acq_directory, abort_flag)
+        self._hook_time_points(sequence._time_point_helpers)
+        sequence.run()
+
+    @contextlib.contextmanager
+    def _simulated_hardware(self):
+        swaps = [(sequences, "Stage", self._stage),
+                 (sequences, "Camera", self._camera),
+                 (sequences, "core", self._core),
+                 (sequences, "pycro", _DryRunPycro(self)),
+                 (sequences, "time", self._clock),
+                 (imaging, "Stage", self._stage),
+                 (imaging, "Camera", self._camera),
+                 (imaging, "Plc", self._plc),
+                 (imaging, "Galvo", self._galvo),
+                 (imaging, "core", self._core),
+                 (imaging, "pycro", _DryRunPycro(self))]
+        originals = [(module, name, getattr(module, name)) for module, name, _ in swaps]
+        try:
+            for module, name, value in swaps:
+                setattr(module, name, value)
+            if pycro.core.is_connected:
+                yield
+            else:
+                #region sizes and anything else that reads camera_geometry would connect to Micro-Manager
+                with pycro.simulated(self._core):
+                    yield
+        finally:
+            for module, name, value in originals:
+                setattr(module, name, value)
+
+    def _hook_time_points(self, time_point_helpers: sequences.TimePointHelpers):
+        """
+        Wraps time point helper methods so start and end of time points are recorded. A time point ends
+        when the sequence starts waiting for the next one, or when it finds there isn't a next one.
+        """
+        update_time_point_num = time_point_helpers._update_time_point_num
+        is_time_point_left = time_point_helpers._is_time_point_left
+        wait_for_next_time_point = time_point_helpers._wait_for_next_time_point
+
+        def _update_time_point_num(time_point_num):
+            self._start_time_point(time_point_num)
+            update_time_point_num(time_point_num)
+
+        def _is_time_point_left(time_point_num):
+            is_left = is_time_point_left(time_point_num)
+            #if there's another time point, stage is moved back to start region before waiting, which
+            #is part of this time point, so it's left open until the wait.
+            self._end_time_point(is_last = not is_left, keep_open = is_left)
+            return is_left
+
+        def _wait_for_next_time_point(time_point_num):
+            self._end_time_point()
+            wait_for_next_time_point(time_point_num)
+
+        time_point_helpers._update_time_point_num = _update_time_point_num
+        time_point_helpers._is_time_point_left = _is_time_point_left
+        time_point_helpers._wait_for_next_time_point = _wait_for_next_time_point
+        time_point_helpers.ABORT_CHECK_INTERVAL_S = DryRun._ABORT_CHECK_INTERVAL_S
+
+    def _start_time_point(self, time_point_num: int, label: str = None):
+        if label is None:
+            label = DryRun._SERIES_LABELS.get(self._Sequence, "").format(
+                fish_num=self._gui.fish_num, region_num=self._gui.region_num)
+        interval_s = self._acq_settings.time_points_interval_sec if self._acq_settings.time_points_enabled else None
+        self._report.time_points.append(TimePointPrediction(label, time_point_num, self._clock.time(), interval_s))
+        self._is_time_point_open = True
+
+    def _end_time_point(self, is_last: bool = False, keep_open: bool = False):
+        if self._is_time_point_open:
+            time_point = self._report.time_points[-1]
+            time_point.duration_s = self._clock.time() - time_point.start_s
+            if is_last:
+                time_point.interval_s = None
+            self._is_time_point_open = keep_open
+
+    def _add_image(self):
+        if self._is_time_point_open:
+            self._report.time_points[-1].size_mb += self._image_size_mb
+
+    def _add_sequence(self, directory: str, duration_s: float, size_mb: float):
+        self._report.sequences.append((directory, duration_s, size_mb))
+
+
+class HTLSDryRun(DryRun):
+    """
+    Dry run of an HTLS acquisition. Fish detection needs real images, so instead of detecting fish,
+    every fish is assumed to show up right away and is imaged with the regions in fish_settings as they
+    are (no region planning). Predictions are for imaging only, with each fish reported as a time point
+    labeled "fish n".
+
+    ## Constructor parameters:
+
+    #### htls_settings : HTLSSettings
+
+    #### image_size_mb : float
+        size of a single image. If None, camera_geometry.image_size_mb is used, which is the simulated
+        camera's if Micro-Manager isn't connected.
+    """
+    def __init__(self, htls_settings: HTLSSettings, image_size_mb: float = None):
+        self._htls_settings = deepcopy(htls_settings)
+        super().__init__(self._htls_settings.acq_settings, image_size_mb=image_size_mb)
+
+    def _init_hardware(self):
+        #same as HTLSAcquisition._init_hardware()
+        if self._htls_settings.fish_settings.region_list:
+            step_size = self._htls_settings.fish_settings.region_list[0].z_stack_step_size
+            self._plc.set_for_z_stack(step_size, self._adv_settings.z_stack_stage_speed)
+
+    def _run_sequence(self, acq_directory: AcqDirectory, abort_flag: exceptions.AbortFlag):
+        sequence_helpers = sequences.SequenceHelpers(self._acq_settings, self._gui, acq_directory, abort_flag, self._logger)
+        self._acq_settings.fish_list = []
+        for fish_num in range(self._htls_settings.num_fish):
+            fish = deepcopy(self._htls_settings.fish_settings)
+            self._acq_settings.fish_list.append(fish)
+            self._start_time_point(0, f"fish {fish_num + 1}")
+            #same as HTLSSequence._acquire_fish(), without saving fish
+            self._camera.set_binning(self._camera.DEFAULT_BINNING)
+            acq_directory.set_fish_num(fish_num)
+            sequence_helpers._acquire_regions(fish)
+            sequence_helpers._acquire_end_videos([fish_num])
+            self._end_time_point(is_last = True)
+
+
+class _DryRunStage(SimStage):
+    def move_stage(self, x_pos, y_pos, z_pos):
+        #unlike SimStage.move_stage(), Stage.move_stage() waits until the stage gets there
+        super().move_stage(x_pos, y_pos, z_pos)
+        self.wait_for_xy_stage()
+        self.wait_for_z_stage()
+
+
+class _DryRunGui():
+    """
+    Acquisition GUI stand-in. Keeps track of current fish and region so time points can be labeled.
+    """
+    def __init__(self):
+        self.fish_num = 1
+        self.region_num = 1
+
+    def fish_update(self, fish_num: int):
+        self.fish_num = fish_num
+
+    def region_update(self, region_num: int):
+        self.region_num = region_num
+
+    def timepoint_update(self, timepoint_num: int):
+        pass
+
+    def status_update(self, message: str):
+        pass
+
+
+class _DryRunImage():
+    def copy_with(self, coords, meta):
+        return self
+
+
+class _DryRunBuilder():
+    """
+    Stand-in for the pycro metadata builders. Every method returns the builder, so calls can be chained.
+    """
+    def __init__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args: self
+
+    def build(self):
+        return None
+
+
+class _DryRunDatastore():
+    """
+    Datastore that counts images instead of saving them.
+    """
+    def __init__(self, dry_run: DryRun, directory: str):
+        self._dry_run = dry_run
+        self.save_path = directory
+        self._start_time = dry_run._clock.time()
+        self._size_mb = 0.
+        self._is_closed = False
+
+    def set_summary_metadata(self, summary):
+        pass
+
+    def put_image(self, image):
+        self._size_mb += self._dry_run._image_size_mb
+        self._dry_run._add_image()
+
+    def close(self):
+        if not self._is_closed:
+            self._is_closed = True
+            self._dry_run._add_sequence(self.save_path, self._dry_run._clock.time() - self._start_time, self._size_mb)
+
+
+class _DryRunPycro():
+    """
+    Stand-in for the parts of utils.pycro used by the acquisition sequences.
+    """
+    BF_CHANNEL = pycro.BF_CHANNEL
+    GFP_CHANNEL = pycro.GFP_CHANNEL
+    ImageCoordsBuilder = _DryRunBuilder
+    ImageMetadataBuilder = _DryRunBuilder
+    SummaryMetadataBuilder = _DryRunBuilder
+
+    def __init__(self, dry_run: DryRun):
+        self._dry_run = dry_run
+
+    def MultipageDatastore(self, directory: str):
+        return _DryRunDatastore(self._dry_run, directory)
+
+    def set_channel(self, channel: str):
+        pass
+
+    def pop_next_image(self):
+        self._dry_run._core.pop_next_image()
+        return _DryRunImage()
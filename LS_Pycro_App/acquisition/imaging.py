@@ -21,6 +21,7 @@ the more general exception handling (found in acquisition_class) is called.
 all methods that rely on an instance of AcquisitionSettings should be set in acquisition_classes, not here.
 """
 
+import os
 import shutil
 from abc import ABC, abstractmethod
 
@@ -102,14 +103,46 @@ class ImagingSequence(ABC):
     def _get_name(self):
         return self.__class__.__name__.lower()
 
-    def _create_datastore_with_summary(self, channels: str | list):
+    def _set_acq_type(self, channels: str | list):
+        self._channels = channels
         self._acq_directory.set_acq_type(f"{self._get_name()}/{channels}".replace(",",""))
+
+    def _is_done(self, channels: str | list) -> bool:
+        """
+        Returns True if channels were already acquired, which only happens when a journaled acquisition
+        is resumed.
+        """
+        if not self._acq_directory.journal:
+            return False
+        self._set_acq_type(channels)
+        return self._acq_directory.journal.is_complete(self._acq_directory.get_directory())
+
+    def _create_datastore_with_summary(self, channels: str | list):
+        self._set_acq_type(channels)
+        journal = self._acq_directory.journal
+        if journal and journal.is_resumed and os.path.isdir(self._acq_directory.get_directory()):
+            #partly acquired before acquisition was resumed, so it's done again from scratch
+            shutil.rmtree(self._acq_directory.get_directory())
         self._datastore = pycro.MultipageDatastore(self._acq_directory.get_directory())
         self._set_summary_metadata(channels)
 
+    def _close_finished_datastore(self):
+        """
+        Closes datastore after all images were acquired, records it in journal, and submits it for
+        post-processing.
+        """
+        self._datastore.close()
+        if self._acq_directory.post_processor:
+            num_channels = len(self._channels) if isinstance(self._channels, list) else 1
+            self._acq_directory.post_processor.submit(self._datastore.save_path, self._acq_directory.root, num_channels)
+        if self._acq_directory.journal:
+            self._acq_directory.journal.record_sequence(
+                self._acq_directory.get_directory(), self._acq_directory.time_point, self._acq_directory.fish_num,
+                self._acq_directory.region_num, self._get_name(), self._channels, self._datastore.save_path)
+
     def _abort_check(self):
         if self._abort_flag.abort:
-            self._datastore.close_and_move_files()
+            self._datastore.close()
             raise exceptions.AbortAcquisitionException
         
     def _pre_acquisition_hardware_init(self, exposure):
@@ -202,12 +235,14 @@ class Snap(ImagingSequence):
         self._pre_acquisition_hardware_init(self._region.snap_exposure)
         self._abort_check()
         for channel in self._region.snap_channel_list:
+            if self._is_done(channel):
+                continue
             self._abort_check()
             yield f"Acquiring {channel} {self._get_name()}"
             self._create_datastore_with_summary(channel)
             pycro.set_channel(channel)
             self._snap_image(0)
-            self._datastore.close_and_move_files()
+            self._close_finished_datastore()
 
 
 class Video(ImagingSequence):
@@ -238,6 +273,8 @@ class Video(ImagingSequence):
         """
         self._pre_acquisition_hardware_init(self._adv_settings.z_stack_exposure)
         for channel in self._region.video_channel_list:
+            if self._is_done(channel):
+                continue
             attempt_num = 0
             while attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                 self._abort_check()
@@ -255,9 +292,9 @@ class Video(ImagingSequence):
                     if attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                         self._datastore.close()
                         #deletes images, unless it's the final attempt
-                        shutil.rmtree(self._acq_directory.get_directory())
+                        shutil.rmtree(self._datastore.save_path)
                 else:
-                    self._datastore.close_and_move_files()
+                    self._close_finished_datastore()
                     #breaks upon success
                     break
 
@@ -281,6 +318,8 @@ class SpectralVideo(Video):
         return image.copy_with(coords, meta)
 
     def _acquire_images(self):
+        if self._is_done(self._region.video_channel_list):
+            return
         self._pre_acquisition_hardware_init(self._region.video_exposure)
         yield f"Acquiring {self._get_name()}"
         self._create_datastore_with_summary(self._region.video_channel_list)
@@ -291,7 +330,7 @@ class SpectralVideo(Video):
                 pycro.set_channel(channel)
                 self._snap_image(current_frame, channel_num)
             current_frame += 1
-        self._datastore.close_and_move_files()
+        self._close_finished_datastore()
 
 
 class ZStack(ImagingSequence):
@@ -353,6 +392,8 @@ class ZStack(ImagingSequence):
         """
         self._pre_acquisition_hardware_init(self._adv_settings.z_stack_exposure)
         for channel in self._region.z_stack_channel_list:
+            if self._is_done(channel):
+                continue
             attempt_num = 0
             while attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                 self._abort_check()
@@ -372,9 +413,9 @@ class ZStack(ImagingSequence):
                     if attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                         self._datastore.close()
                         #deletes images, unless it's the final attempt
-                        shutil.rmtree(self._acq_directory.get_directory())
+                        shutil.rmtree(self._datastore.save_path)
                 else:
-                    self._datastore.close_and_move_files()
+                    self._close_finished_datastore()
                     #breaks upon success
                     break
 
@@ -419,6 +460,8 @@ class SpectralZStack(ZStack):
         return image.copy_with(coords, meta)
 
     def _acquire_images(self):
+        if self._is_done(self._region.z_stack_channel_list):
+            return
         self._pre_acquisition_hardware_init(self._adv_settings.z_stack_exposure)
         yield f"Acquiring {self._get_name()}"
         self._create_datastore_with_summary(self._region.z_stack_channel_list)
@@ -431,7 +474,7 @@ class SpectralZStack(ZStack):
                 pycro.set_channel(channel)
                 self._snap_image(slice_num, channel_num)
             slice_num += 1
-        self._datastore.close_and_move_files()
+        self._close_finished_datastore()
 
 
 class DeconZStack(ZStack):
@@ -479,6 +522,8 @@ class DeconZStack(ZStack):
         """
         self._pre_acquisition_hardware_init(self._adv_settings.z_stack_exposure)
         for channel in self._region.z_stack_channel_list:
+            if self._is_done(channel):
+                continue
             attempt_num = 1
             while attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                 self._abort_check()
@@ -501,9 +546,9 @@ class DeconZStack(ZStack):
                     if attempt_num < ImagingSequence.ATTEMPT_LIMIT:
                         self._datastore.close()
                         #deletes images, unless it's the final attempt
-                        shutil.rmtree(self._acq_directory.get_directory())
+                        shutil.rmtree(self._datastore.save_path)
                 else:
-                    self._datastore.close_and_move_files()
+                    self._close_finished_datastore()
                     #breaks upon success
                     break
                 finally:
@@ -0,0 +1,210 @@
+"""
+Append-only journal of an acquisition, saved as journal.jsonl in the acquisition root. Every line
+is a JSON object:
+
+- The first line is the header, which has the start time of the acquisition and its layout (see
+get_layout()): acquisition order, time points, and the fish, regions, and channels that are imaged.
+Directories and series numbers depend on the layout, so an acquisition can only be resumed with settings
+that have the same layout.
+
+- "series" lines have the start time of each time series (one per acquisition for TimeSampAcquisition,
+one per fish/region for the others), so a resumed acquisition keeps the original time point schedule.
+
+- "sequence" lines are written when a single channel of an imaging sequence is finished and its files
+are closed. They have time_point, fish, region, sequence, channel, the path of the sequence's directory
+(which is what resuming checks), and save_path, where the files actually are. They're only different if
+the directory already existed when the datastore was created, in which case a suffix is added to it.
+
+- "region" lines are written when every imaging sequence of a region (for one time point) is finished,
+so that resuming can skip the region without moving the stage to it.
+
+Each line is flushed and synced to disk as soon as it's written, so if the app or Micro-Manager dies
+the journal has everything that was finished before. A line that was only partly written when the app
+died is ignored when the journal is read.
+
+Resuming an acquisition (see CLSAcquisition.resume()) replays the acquisition with the same settings.
+Anything in the journal is skipped, and anything that was started but isn't in the journal is deleted
+and done again.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from LS_Pycro_App.models.acq_settings import AcqSettings
+from LS_Pycro_App.utils import exceptions
+
+
+def get_layout(acq_settings: AcqSettings) -> dict:
+    """
+    Returns layout of acquisition that's saved in journal header. Only has JSON types, so a layout read
+    from the journal is equal to the one it was written from.
+    """
+    fish_list = []
+    for fish in acq_settings.fish_list:
+        region_list = []
+        for region in fish.region_list:
+            region_list.append({
+                "z_stack": list(region.z_stack_channel_list) if region.z_stack_enabled else [],
+                "z_stack_num_frames": region.z_stack_num_frames if region.z_stack_enabled else 0,
+                "snap": list(region.snap_channel_list) if region.snap_enabled else [],
+                "video": list(region.video_channel_list) if region.video_enabled else [],
+                "video_num_frames": region.video_num_frames if region.video_enabled else 0})
+        fish_list.append(region_list)
+    return {"acq_order": acq_settings.adv_settings.acq_order.name,
+            "time_points_enabled": acq_settings.time_points_enabled,
+            "num_time_points": acq_settings.num_time_points,
+            "time_points_interval_sec": acq_settings.time_points_interval_sec,
+            "fish": fish_list}
+
+
+class AcquisitionJournal():
+    """
+    Journal of finished parts of an acquisition. See module docstring.
+
+    ## Constructor parameters:
+
+    #### root : str
+        acquisition root directory. Journal is created there if it doesn't exist yet, otherwise it's read.
+
+    #### layout : dict
+        layout of acquisition (see get_layout()), written to header of a new journal. Not used when an
+        existing journal is read, use check_layout() instead.
+
+    ## Methods:
+
+    #### check_layout(layout)
+        raises JournalMismatchException if layout isn't the same as the layout in the journal header.
+
+    #### add_root(root)
+        adds acquisition root of another storage volume. Paths in it are journaled relative to it, same as
+        paths in the first root. Roots aren't saved, so they have to be added again when resuming.
+
+    #### is_complete(path) -> bool
+        returns True if path (output directory of a sequence or region) is in journal.
+
+    #### record_sequence(path, time_point, fish, region, sequence, channel, save_path)
+        records that sequence is finished. save_path is where datastore was saved, if it's not path.
+
+    #### record_region(path)
+        records that all sequences of region are finished.
+
+    #### get_series_start(series_num) -> float
+        returns start time of series number series_num, or None if it hasn't been started.
+
+    #### record_series_start(series_num, start_time)
+        records start time of series.
+    """
+    FILE_NAME = "journal.jsonl"
+    VERSION = 2
+
+    def __init__(self, root: str, layout: dict = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.root = root
+        self._roots = [root]
+        self.file_path = f"{root}/{AcquisitionJournal.FILE_NAME}"
+        self._lock = threading.Lock()
+        self._completed: set[str] = set()
+        self._series_starts: dict[int, float] = {}
+        self.start_time: float = None
+        self.layout: dict = None
+        self.is_resumed = os.path.exists(self.file_path)
+        if self.is_resumed:
+            self._read()
+        else:
+            self.start_time = time.time()
+            self.layout = layout
+            self._append({"type": "header", "version": AcquisitionJournal.VERSION, "start_time": self.start_time,
+                          "layout": self.layout})
+
+    def __deepcopy__(self, memo):
+        #AcqDirectory is copied for end videos, and the copy should still write to the same journal
+        return self
+
+    def check_layout(self, layout: dict):
+        if self.layout is None:
+            raise exceptions.JournalMismatchException(
+                f"{self.file_path} has no acquisition layout, so it can't be checked against the settings")
+        if layout != self.layout:
+            differences = [key for key in self.layout if layout.get(key) != self.layout[key]]
+            raise exceptions.JournalMismatchException(
+                f"settings don't match acquisition in {self.file_path}, {', '.join(differences)} changed")
+
+    def add_root(self, root: str):
+        with self._lock:
+            if root not in self._roots:
+                self._roots.append(root)
+
+    def is_complete(self, path: str) -> bool:
+        with self._lock:
+            return self._get_key(path) in self._completed
+
+    def record_sequence(self, path: str, time_point: int, fish: int, region: int, sequence: str, channel,
+                        save_path: str = None):
+        with self._lock:
+            save_key = self._get_key(save_path or path)
+        self._record({"type": "sequence", "time_point": time_point, "fish": fish, "region": region,
+                      "sequence": sequence, "channel": channel, "save_path": save_key}, path)
+
+    def record_region(self, path: str):
+        self._record({"type": "region"}, path)
+
+    def get_series_start(self, series_num: int) -> float:
+        with self._lock:
+            return self._series_starts.get(series_num)
+
+    def record_series_start(self, series_num: int, start_time: float):
+        with self._lock:
+            self._series_starts[series_num] = start_time
+            self._append({"type": "series", "series": series_num, "start_time": start_time})
+
+    def _record(self, entry: dict, path: str):
+        with self._lock:
+            key = self._get_key(path)
+            entry["path"] = key
+            self._completed.add(key)
+            self._append(entry)
+
+    def _get_key(self, path: str) -> str:
+        #paths are saved relative to root so the acquisition can be moved before it's resumed, and so a region
+        #has the same key on every storage volume. A root can be inside another one, so longest goes first.
+        for root in sorted(self._roots, key=len, reverse=True):
+            try:
+                key = os.path.relpath(path, root).replace("\\", "/")
+            except ValueError:
+                #path is on a different drive (Windows)
+                continue
+            if not key.startswith(".."):
+                return key
+        return path.replace("\\", "/")
+
+    def _append(self, entry: dict):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.file_path, "a") as journal_file:
+            journal_file.write(f"{json.dumps(entry)}\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def _read(self):
+        with open(self.file_path) as journal_file:
+            text = journal_file.read()
+        if text and not text.endswith("\n"):
+            #last line was cut off, so new lines would be appended to it
+            with open(self.file_path, "a") as journal_file:
+                journal_file.write("\n")
+        for line_num, line in enumerate(text.splitlines()):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                self._logger.warning(f"{self.file_path} line {line_num + 1} is incomplete and was skipped")
+                continue
+            if entry.get("type") == "header":
+                self.start_time = entry["start_time"]
+                self.layout = entry.get("layout")
+            elif entry.get("type") == "series":
+                self._series_starts[entry["series"]] = entry["start_time"]
+            elif entry.get("type") in ("sequence", "region"):
+                self._completed.add(entry["path"])
+        self._logger.info(f"{self.file_path} read, {len(self._completed)} finished entries")
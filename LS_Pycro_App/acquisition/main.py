@@ -28,19 +28,25 @@ stage TTL signal itself, which I very highly doubt).
 """
 
 import logging
+import os
 import threading
 from abc import ABC, abstractmethod
 from copy import deepcopy
 
 from LS_Pycro_App.acquisition.acq_gui import CLSAcqGui, HTLSAcqGui
+from LS_Pycro_App.acquisition.dry_run import DryRun, DryRunReport, HTLSDryRun
+from LS_Pycro_App.acquisition.journal import AcquisitionJournal, get_layout
+from LS_Pycro_App.acquisition.post_processing import PostProcessor
+from LS_Pycro_App.acquisition.storage import StorageManager
 from LS_Pycro_App.acquisition.sequences import (
-    TimeSampAcquisition, SampTimeAcquisition, PosTimeAcquisition, HTLSSequence)
+    TimeSampAcquisition, SampTimeAcquisition, PosTimeAcquisition, InterleavedAcquisition, HTLSSequence, hardware_lock)
 from LS_Pycro_App.models.acq_directory import AcqDirectory
 from LS_Pycro_App.hardware import Stage, Camera, Galvo, Plc, Pump
+from LS_Pycro_App.hardware.async_hardware import AsyncHardware
 from LS_Pycro_App.models.acq_settings import AcqSettings, AcqOrder
 from LS_Pycro_App.models.acq_settings import HTLSSettings
-from LS_Pycro_App.utils import exceptions, user_config
-from LS_Pycro_App.utils.pycro import core, studio
+from LS_Pycro_App.utils import exceptions, user_store
+from LS_Pycro_App.utils.pycro import core, studio, camera_geometry
 
 
 class Acquisition(ABC, threading.Thread):
@@ -54,14 +60,26 @@ class Acquisition(ABC, threading.Thread):
         AcquisitionSettings instance that contains all image acquisition settings. 
 
     """
-    @abstractmethod
+    _NOTES_DIRECTORY = "settings"
+    #set once acquisition finishes successfully, so whatever started it can tell how it went (headless_start.py
+    #uses it for its exit code)
+    succeeded = False
+
     def run(self):
+        """
+        This method is called when Acquisition.start() is called and runs in a 
+        separate thread. Holds sequences.hardware_lock for the whole acquisition, so a 
+        dry run can't swap out the hardware while it's running (and an acquisition started 
+        during a dry run waits for it to finish).
+        """
+        with hardware_lock:
+            self._run()
+
+    @abstractmethod
+    def _run(self):
         """
         This method runs an image acquisition with the parameters set in
         acq_settings.
-
-        This method is called when Acquisition.start() is called and runs in a 
-        separate thread.
         """
 
     @abstractmethod
@@ -78,12 +96,35 @@ class Acquisition(ABC, threading.Thread):
         core.clear_circular_buffer()
         core.set_shutter_open(False)
         core.set_auto_shutter(True)
+        #camera settings may have been changed in Micro-Manager since geometry was cached
+        camera_geometry.invalidate()
+
+    def _init_storage(self):
+        #root is the first volume, so acquisition notes, journal, and manifest are always there
+        if not self._acq_directory.storage:
+            self._acq_directory.storage = StorageManager.from_settings(self._acq_directory.root, self._adv_settings)
+
+    def _init_post_processing(self):
+        if self._adv_settings.post_processing_enabled and not self._acq_directory.post_processor:
+            self._acq_directory.post_processor = PostProcessor.from_settings(self._acq_directory.root, self._adv_settings)
+
+    def _finish_post_processing(self, cancel: bool = False):
+        """
+        Waits for post-processing of datastores that were already submitted. If cancel is True, only
+        datastores that are being processed are finished.
+        """
+        post_processor = self._acq_directory.post_processor
+        if post_processor:
+            if not cancel:
+                self._acq_gui.status_update(f"Finishing post-processing ({post_processor.num_pending} left)")
+            post_processor.close(cancel)
+            self._acq_directory.post_processor = None
 
     def _write_acquisition_notes(self, root_directory: str):
         """
-        Writes current config as acquisition notes at acq_directory.root.
+        Copies current settings to "settings" folder in acq_directory.root as acquisition notes.
         """
-        user_config.write_config_file(f"{root_directory}/notes.txt")
+        user_store.export(f"{root_directory}/{Acquisition._NOTES_DIRECTORY}")
 
 
 class HardwareAcquisition(ABC):
@@ -102,6 +143,11 @@ class HardwareAcquisition(ABC):
 
 
 class CLSAcquisition(Acquisition, HardwareAcquisition):
+    _SEQUENCES = {AcqOrder.TIME_SAMP: TimeSampAcquisition,
+                  AcqOrder.SAMP_TIME: SampTimeAcquisition,
+                  AcqOrder.POS_TIME: PosTimeAcquisition,
+                  AcqOrder.INTERLEAVED: InterleavedAcquisition}
+
     def __init__(self, 
                  acq_settings: AcqSettings, 
                  acq_gui: CLSAcqGui, 
@@ -117,12 +163,20 @@ class CLSAcquisition(Acquisition, HardwareAcquisition):
         self._abort_flag = abort_flag
         self._adv_settings = self._acq_settings.adv_settings
 
-    def run(self):
+    def _run(self):
         try:
             self._acq_gui.status_update("Initializing Acquisition")
             self._init_mm()
             self._init_hardware()
-            self._write_acquisition_notes(self._acq_directory.root)
+            if not self._acq_directory.journal:
+                self._acq_directory.journal = AcquisitionJournal(self._acq_directory.root, get_layout(self._acq_settings))
+            self._init_storage()
+            self._init_post_processing()
+            for root in self._acq_directory.storage.roots:
+                self._acq_directory.journal.add_root(root)
+            #a resumed acquisition keeps the notes written when it was first started
+            if not self._acq_directory.journal.is_resumed:
+                self._write_acquisition_notes(self._acq_directory.root)
             self._abort_flag.abort = False
             self._get_acq_sequence().run()
         except exceptions.AbortAcquisitionException:
@@ -132,30 +186,62 @@ class CLSAcquisition(Acquisition, HardwareAcquisition):
             self._abort_acquisition()
         else:
             self._reset_hardware()
+            self._finish_post_processing()
             studio.app().refresh_gui()
             self._acq_gui.status_update("Your acquisition was successful!")
+            self.succeeded = True
 
     def _abort_acquisition(self):
         self._acq_gui.status_update("Aborting Acquisition")
         self._reset_hardware()
+        self._finish_post_processing(cancel=True)
         self._acq_gui.status_update("Aborted Acquisition" if self._abort_flag.abort else "Acquisition Failed. Check Logs.")
 
+    @classmethod
+    def resume(cls, root: str, acq_settings: AcqSettings, acq_gui: CLSAcqGui,
+               abort_flag: exceptions.AbortFlag) -> "CLSAcquisition":
+        """
+        Returns acquisition that continues the acquisition saved in root, which should be started with
+        start() like any other acquisition. acq_settings should be the settings the acquisition was started
+        with (they're in root/settings).
+
+        Everything in the journal is skipped, anything that was only partly acquired is done again, and time
+        points keep their original schedule, so time points that were missed while the app was down are
+        acquired right away. See acquisition.journal.
+
+        Raises JournalMismatchException if acq_settings don't have the same layout (acquisition order, time
+        points, fish, regions, and channels) as the acquisition in the journal.
+        """
+        if not os.path.exists(f"{root}/{AcquisitionJournal.FILE_NAME}"):
+            raise FileNotFoundError(f"{root} has no acquisition journal to resume from")
+        journal = AcquisitionJournal(root)
+        journal.check_layout(get_layout(acq_settings))
+        acq_directory = AcqDirectory.from_root(root)
+        acq_directory.journal = journal
+        return cls(acq_settings, acq_gui, acq_directory, abort_flag)
+
+    def dry_run(self) -> DryRunReport:
+        """
+        Runs acquisition against simulated hardware and returns predicted timings. Nothing is moved or
+        saved. See acquisition.dry_run.
+        """
+        return DryRun(self._acq_settings, CLSAcquisition._SEQUENCES[self._adv_settings.acq_order]).run()
+
     def _get_acq_sequence(self):
-        sequences = {AcqOrder.TIME_SAMP: TimeSampAcquisition,
-                     AcqOrder.SAMP_TIME: SampTimeAcquisition,
-                     AcqOrder.POS_TIME: PosTimeAcquisition}
-        return sequences[self._adv_settings.acq_order](self._acq_settings, self._acq_gui, self._acq_directory, self._abort_flag)
+        Sequence = CLSAcquisition._SEQUENCES[self._adv_settings.acq_order]
+        return Sequence(self._acq_settings, self._acq_gui, self._acq_directory, self._abort_flag)
         
     def _init_hardware(self):
-        self._init_galvo()
-        self._init_plc()
+        #galvo and PLC don't depend on each other, so they're set up at the same time.
+        with AsyncHardware(plc=Plc, galvo=Galvo) as hardware:
+            hardware.run(hardware.gather(self._init_galvo(hardware), self._init_plc(hardware)))
 
-    def _init_galvo(self):
-        if Galvo:
-            Galvo.set_dslm_mode()
+    async def _init_galvo(self, hardware: AsyncHardware):
+        if hardware.galvo:
+            await hardware.galvo.set_dslm_mode()
 
-    def _init_plc(self):
-        Plc.set_for_z_stack(self._acq_settings.get_first_step_size(), self._adv_settings.z_stack_stage_speed)
+    async def _init_plc(self, hardware: AsyncHardware):
+        await hardware.plc.set_for_z_stack(self._acq_settings.get_first_step_size(), self._adv_settings.z_stack_stage_speed)
 
     def _reset_hardware(self):
         #set PLC to pulse continuously to send signal to camera in case it's frozen
@@ -186,15 +272,18 @@ class HTLSAcquisition(Acquisition, HardwareAcquisition):
         self._abort_flag = abort_flag
         self._acq_settings = self._htls_settings.acq_settings
         self._adv_settings = self._acq_settings.adv_settings
+        self._sequence: HTLSSequence = None
         
-    def run(self):
+    def _run(self):
         try:
             self._acq_gui.status_update("Initializing Acquisition")
             self._init_mm()
             self._init_hardware()
+            self._init_storage()
+            self._init_post_processing()
             self._abort_flag.abort = False
-            sequence = HTLSSequence(self._htls_settings, self._acq_gui, self._acq_directory, self._abort_flag)
-            sequence.run()
+            self._sequence = HTLSSequence(self._htls_settings, self._acq_gui, self._acq_directory, self._abort_flag)
+            self._sequence.run()
         except exceptions.AbortAcquisitionException:
             self._abort_acquisition()
         except:
@@ -202,28 +291,42 @@ class HTLSAcquisition(Acquisition, HardwareAcquisition):
             self._abort_acquisition()
         else:
             self._reset_hardware()
+            self._finish_post_processing()
             studio.app().refresh_gui()
             self._acq_gui.status_update("Your acquisition was successful!")
+            self.succeeded = True
         finally:
             self._write_acquisition_notes(self._acq_directory.root)
 
     def _abort_acquisition(self):
         self._acq_gui.status_update("Aborting Acquisition")
         self._reset_hardware()
+        self._finish_post_processing(cancel=True)
         self._acq_gui.status_update("Aborted Acquisition" if self._abort_flag.abort else "Acquisition Failed. Check Logs.")
 
+    def dry_run(self) -> DryRunReport:
+        """
+        Images num_fish fish against simulated hardware and returns predicted timings. Fish detection
+        isn't simulated. See acquisition.dry_run.
+        """
+        return HTLSDryRun(self._htls_settings).run()
+
     def _init_hardware(self):
-        self._init_galvo()
-        self._init_plc()
+        #galvo and PLC don't depend on each other, so they're set up at the same time.
+        with AsyncHardware(plc=Plc, galvo=Galvo) as hardware:
+            hardware.run(hardware.gather(self._init_galvo(hardware), self._init_plc(hardware)))
 
-    def _init_galvo(self):
-        if Galvo:
-            Galvo.set_dslm_mode()
+    async def _init_galvo(self, hardware: AsyncHardware):
+        if hardware.galvo:
+            await hardware.galvo.set_dslm_mode()
 
-    def _init_plc(self):
-        Plc.set_for_z_stack(self._htls_settings.fish_settings.region_list[0].z_stack_step_size, self._adv_settings.z_stack_stage_speed)
+    async def _init_plc(self, hardware: AsyncHardware):
+        await hardware.plc.set_for_z_stack(self._htls_settings.fish_settings.region_list[0].z_stack_step_size, self._adv_settings.z_stack_stage_speed)
 
     def _reset_hardware(self):
+        #primer has to be stopped first, or it can keep filling after the pump is terminated
+        if self._sequence:
+            self._sequence.stop_pump_primer()
         Pump.terminate()
         #set PLC to pulse continuously to send signal to camera in case it's frozen
         #in external trigger mode.
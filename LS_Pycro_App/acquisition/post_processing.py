@@ -0,0 +1,267 @@
+"""
+Runs post-processing jobs on finished datastores in the background, while the microscope keeps acquiring,
+so most of the analysis that used to be done after an acquisition is already finished when it ends.
+
+When an imaging sequence closes a datastore successfully, it's submitted to the acquisition's PostProcessor
+(AcqDirectory.post_processor), which runs the jobs on it in a process pool. Jobs are:
+
+- "mip": maximum intensity projection of each channel, saved as a TIFF.
+
+- "preview": MIP of each channel downsampled by preview_downsampling and scaled to 8 bits, saved as a TIFF.
+
+- "checksum": SHA-256 of every file in the datastore.
+
+- "qc": mean, standard deviation, min, max, fraction of saturated pixels, and the sharpest frame (largest
+variance of the horizontal gradient) of each channel.
+
+Images are saved in a post_processing directory in the acquisition root, with the same layout as the
+datastores, so they aren't picked up by Micro-Manager when a datastore is opened. Checksums, QC metrics,
+and output paths are appended to post_processing.jsonl in the acquisition root.
+
+Workers are kept from slowing down the acquisition in three ways. There are only num_workers of them,
+they run at below normal CPU and I/O priority, and each one reads at most io_mb_per_s/num_workers MB/s.
+
+This module is imported by the worker processes, so it shouldn't import anything from LS_Pycro_App that
+talks to Micro-Manager or the hardware.
+"""
+
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import psutil
+import tifffile
+
+
+class PostProcessor():
+    """
+    Runs post-processing jobs on datastores in background processes. See module docstring.
+
+    ## Constructor parameters:
+
+    #### root : str
+        acquisition root directory. Results are saved there.
+
+    #### jobs : list[str]
+        jobs run on every datastore, from PostProcessor.JOBS.
+
+    #### num_workers : int
+        number of worker processes.
+
+    #### io_mb_per_s : float
+        total rate that workers read datastores at.
+
+    #### preview_downsampling : int
+        factor that previews are downsampled by.
+
+    ## Methods:
+
+    #### from_settings(root, adv_settings) -> PostProcessor
+        class method that returns PostProcessor with post processing settings in adv_settings.
+
+    #### submit(directory, root, num_channels=1)
+        queues datastore in directory to be processed. root is acquisition root of the volume directory is on,
+        and num_channels is the number of channels interleaved in the datastore (spectral sequences).
+
+    #### close(cancel=False)
+        waits for queued datastores to be processed and stops workers. If cancel is True, datastores that
+        haven't been started are dropped.
+    """
+    JOBS = ("mip", "preview", "checksum", "qc")
+    DIRECTORY = "post_processing"
+    RESULTS_FILE_NAME = "post_processing.jsonl"
+
+    def __init__(self, root: str, jobs: list[str], num_workers: int = 1, io_mb_per_s: float = 100.,
+                 preview_downsampling: int = 4):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        for job in jobs:
+            if job not in PostProcessor.JOBS:
+                raise ValueError(f"{job} is not a post-processing job")
+        self.jobs = list(jobs)
+        self.results_path = f"{root}/{PostProcessor.RESULTS_FILE_NAME}"
+        self._io_mb_per_s = io_mb_per_s/num_workers
+        self._preview_downsampling = preview_downsampling
+        self._lock = threading.Lock()
+        self._futures: set[concurrent.futures.Future] = set()
+        self._executor = concurrent.futures.ProcessPoolExecutor(num_workers, initializer=_init_worker)
+
+    @classmethod
+    def from_settings(cls, root: str, adv_settings) -> "PostProcessor":
+        return cls(root, adv_settings.post_processing_jobs, adv_settings.post_processing_num_workers,
+                   adv_settings.post_processing_io_mb_per_s)
+
+    def __deepcopy__(self, memo):
+        #AcqDirectory is copied for end videos, and the copy should still submit to the same pool
+        return self
+
+    @property
+    def num_pending(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def submit(self, directory: str, root: str, num_channels: int = 1):
+        output_directory = f"{root}/{PostProcessor.DIRECTORY}/{os.path.relpath(directory, root)}"
+        future = self._executor.submit(_process_datastore, directory, output_directory, self.jobs, num_channels,
+                                       self._io_mb_per_s, self._preview_downsampling)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(lambda future: self._record(future, directory))
+
+    def close(self, cancel: bool = False):
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self._logger.info("post-processing finished")
+
+    def _record(self, future: concurrent.futures.Future, directory: str):
+        with self._lock:
+            self._futures.discard(future)
+            if future.cancelled():
+                return
+            if future.exception():
+                self._logger.error(f"post-processing of {directory} failed: {future.exception()}")
+                result = {"path": directory, "error": str(future.exception())}
+            else:
+                result = future.result()
+            os.makedirs(os.path.dirname(self.results_path), exist_ok=True)
+            with open(self.results_path, "a") as results_file:
+                results_file.write(f"{json.dumps(result)}\n")
+
+
+def _init_worker():
+    #workers share the computer with the acquisition, so they get whatever the acquisition doesn't use
+    process = psutil.Process()
+    with contextlib.suppress(psutil.Error, AttributeError, OSError):
+        if sys.platform == "win32":
+            process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+            process.ionice(psutil.IOPRIO_VERYLOW)
+        else:
+            process.nice(10)
+            process.ionice(psutil.IOPRIO_CLASS_IDLE)
+
+
+class _Throttle():
+    """
+    Limits rate that a worker reads at. add() is called with the number of bytes read, and sleeps
+    until the average rate is at most mb_per_s.
+    """
+    def __init__(self, mb_per_s: float):
+        self._bytes_per_s = mb_per_s*10**6
+        self._start_time = time.perf_counter()
+        self._num_bytes = 0
+
+    def add(self, num_bytes: int):
+        self._num_bytes += num_bytes
+        time_left = self._num_bytes/self._bytes_per_s - (time.perf_counter() - self._start_time)
+        if time_left > 0:
+            time.sleep(time_left)
+
+
+def _process_datastore(directory: str, output_directory: str, jobs: list[str], num_channels: int,
+                       io_mb_per_s: float, preview_downsampling: int) -> dict:
+    start_time = time.perf_counter()
+    throttle = _Throttle(io_mb_per_s)
+    #Micro-Manager splits datastores into more files (name_1.ome.tif, ...) once they're too big
+    file_names = sorted(name for name in os.listdir(directory) if name.endswith((".tif", ".tiff")))
+    result = {"path": directory, "outputs": []}
+    if "checksum" in jobs:
+        #read first, so images are already in the OS cache when they're read again below
+        result["checksums"] = {name: _get_checksum(f"{directory}/{name}", throttle) for name in file_names}
+    if {"mip", "preview", "qc"} & set(jobs):
+        channel_stats = [_ChannelStats() for _ in range(num_channels)]
+        frame_num = 0
+        for name in file_names:
+            with tifffile.TiffFile(f"{directory}/{name}") as tif:
+                for page in tif.pages:
+                    image = page.asarray()
+                    throttle.add(image.nbytes)
+                    channel_stats[frame_num % num_channels].add(image)
+                    frame_num += 1
+        name = os.path.basename(directory)
+        if "mip" in jobs or "preview" in jobs:
+            os.makedirs(output_directory, exist_ok=True)
+        for channel_num, stats in enumerate(channel_stats):
+            if stats.mip is None:
+                continue
+            suffix = f"_{channel_num}" if num_channels > 1 else ""
+            if "mip" in jobs:
+                path = f"{output_directory}/{name}_MIP{suffix}.tif"
+                tifffile.imwrite(path, stats.mip)
+                result["outputs"].append(path)
+            if "preview" in jobs:
+                path = f"{output_directory}/{name}_preview{suffix}.tif"
+                tifffile.imwrite(path, _get_preview(stats.mip, preview_downsampling))
+                result["outputs"].append(path)
+        if "qc" in jobs:
+            result["qc"] = [stats.get_metrics() for stats in channel_stats]
+    result["duration_s"] = time.perf_counter() - start_time
+    return result
+
+
+def _get_checksum(path: str, throttle: _Throttle) -> str:
+    checksum = hashlib.sha256()
+    with open(path, "rb") as datastore_file:
+        while chunk := datastore_file.read(2**20):
+            checksum.update(chunk)
+            throttle.add(len(chunk))
+    return checksum.hexdigest()
+
+
+def _get_preview(mip: np.ndarray, downsampling: int) -> np.ndarray:
+    height = mip.shape[0]//downsampling*downsampling
+    width = mip.shape[1]//downsampling*downsampling
+    binned = mip[:height, :width].reshape(height//downsampling, downsampling, width//downsampling, downsampling)
+    preview = binned.mean(axis=(1, 3))
+    low, high = np.percentile(preview, (0.1, 99.9))
+    return (np.clip((preview - low)/max(high - low, 1), 0, 1)*255).astype(np.uint8)
+
+
+class _ChannelStats():
+    """
+    Running MIP and QC metrics of the frames of one channel.
+    """
+    def __init__(self):
+        self.mip: np.ndarray = None
+        self._num_frames = 0
+        self._num_pixels = 0
+        self._sum = 0.
+        self._sum_squares = 0.
+        self._min = None
+        self._max = None
+        self._num_saturated = 0
+        self._sharpness: list[float] = []
+
+    def add(self, image: np.ndarray):
+        if self.mip is None:
+            self.mip = image.copy()
+            self._min = image.min()
+            self._max = image.max()
+        else:
+            np.maximum(self.mip, image, out=self.mip)
+            self._min = min(self._min, image.min())
+            self._max = max(self._max, image.max())
+        as_float = image.astype(np.float64)
+        self._num_frames += 1
+        self._num_pixels += image.size
+        self._sum += as_float.sum()
+        self._sum_squares += np.square(as_float).sum()
+        if np.issubdtype(image.dtype, np.integer):
+            self._num_saturated += int(np.count_nonzero(image == np.iinfo(image.dtype).max))
+        self._sharpness.append(float(np.var(np.diff(as_float, axis=-1))))
+
+    def get_metrics(self) -> dict:
+        if not self._num_frames:
+            return {"num_frames": 0}
+        mean = self._sum/self._num_pixels
+        return {"num_frames": self._num_frames,
+                "mean": mean,
+                "std": float(np.sqrt(max(self._sum_squares/self._num_pixels - mean**2, 0))),
+                "min": int(self._min),
+                "max": int(self._max),
+                "saturated_fraction": self._num_saturated/self._num_pixels,
+                "sharpest_frame": int(np.argmax(self._sharpness))}
@@ -1,7 +1,7 @@
 import copy
-import os
 import time
 import logging
+import threading
 
 import numpy as np
 
@@ -9,9 +9,15 @@ from LS_Pycro_App.acquisition.acq_gui import CLSAcqGui, HTLSAcqGui
 from LS_Pycro_App.models.acq_settings import AcqSettings, HTLSSettings, Fish, Region
 from LS_Pycro_App.models.acq_directory import AcqDirectory
 from LS_Pycro_App.acquisition.imaging import ImagingSequence, Snap, Video, SpectralVideo, ZStack, SpectralZStack, DeconZStack
+from LS_Pycro_App.acquisition.storage import placed
 from LS_Pycro_App.hardware import Stage, Camera, Pump, Valves
-from LS_Pycro_App.utils import constants, dir_functions, exceptions, fish_detection, pycro
-from LS_Pycro_App.utils.pycro import BF_CHANNEL, core
+from LS_Pycro_App.utils import constants, exceptions, fish_detection, pycro
+from LS_Pycro_App.utils.pycro import BF_CHANNEL, core, camera_geometry
+
+
+#Held by acquisitions while they run and by dry runs. Dry runs swap out the hardware globals of this module
+#and acquisition.imaging, so they can't run while an acquisition is running. See acquisition.dry_run.
+hardware_lock = threading.Lock()
 
 
 class SequenceHelpers():
@@ -57,7 +63,6 @@ class SequenceHelpers():
         self._acq_directory = acq_directory
         self._abort_flag = abort_flag
         self._logger = logger
-        self.backup_used = False
 
     def _abort_check(self):
         #abort_check is called throughout acquisitions to check if the user has aborted the acquisition.
@@ -70,10 +75,28 @@ class SequenceHelpers():
             self._abort_check()
             if region.imaging_enabled:
                 self._update_region_num(region_num)
+                if self._is_region_done():
+                    continue
                 self._move_to_region(region)
                 self._run_imaging_sequences(region)
 
+    def _is_region_done(self) -> bool:
+        """
+        Returns True if current region was already acquired at current time point, which only happens when
+        a journaled acquisition is resumed.
+        """
+        journal = self._acq_directory.journal
+        return bool(journal) and journal.is_complete(self._acq_directory.get_region_directory())
+
     def _run_imaging_sequences(self, region: Region):
+        if self._is_region_done():
+            return
+        with placed(self._acq_directory, region.size_mb):
+            self._run_region_imaging_sequences(region)
+        if self._acq_directory.journal:
+            self._acq_directory.journal.record_region(self._acq_directory.get_region_directory())
+
+    def _run_region_imaging_sequences(self, region: Region):
         self._abort_check()
         if region.snap_enabled:
             self._update_acq_status("Initializing Snap")
@@ -136,23 +159,14 @@ class SequenceHelpers():
                     self._update_acq_status("moving to region...")
                     Stage.move_stage(region.x_pos, region.y_pos, region.z_pos)
                     acq_directory = copy.deepcopy(self._acq_directory)
-                    acq_directory.root = f"{acq_directory.root}/end_videos"
+                    acq_directory.sub_directory = "end_videos"
                     acq_directory.set_fish_num(fish_num)
                     acq_directory.set_region_num(region_num)
                     acq_directory.set_time_point(0)
                     video = Video(region, self._acq_settings, acq_directory, self._abort_flag)
-                    for update_message in video.run():
-                        self._update_acq_status(update_message)
-
-    # directory methods
-    def _update_directory(self, required_mb: float):
-        if self._adv_settings.backup_directory_enabled and not self.backup_used:
-            if os.path.isdir(self._acq_directory.root):
-                is_enough_space = dir_functions.is_enough_space(
-                    required_mb, self._adv_settings.backup_directory_limit, self._acq_directory.root)
-                if not is_enough_space:
-                    self._acq_directory.set_root(self._adv_settings.backup_directory)
-                    self.backup_used = True
+                    with placed(acq_directory, self._adv_settings.end_videos_num_frames*self._acq_settings.image_size_mb):
+                        for update_message in video.run():
+                            self._update_acq_status(update_message)
 
     # acq_dialog methods
     def _update_region_label(self, region_num):
@@ -180,9 +194,21 @@ class SequenceHelpers():
 
 
 class TimePointHelpers():
-    # delay is pretty arbitrary. At the very least should be less than a second
-    # to avoid inconsistent intervals between timepoints.
-    TIME_DIALOG_UPDATE_DELAY_S = .01
+    """
+    Time point scheduling for acquisition sequences. Time points are started on a fixed schedule,
+    where time point n of a series is due at series start + n*time_points_interval_sec. Because of this,
+    a time point that starts late doesn't push back every time point after it like it did when intervals
+    were measured from the start of the previous time point.
+
+    If a time point takes longer than the interval, the next one is started as soon as it's done.
+
+    Actual vs. planned start time of every time point is saved in start_jitter as
+    (time_point_num, planned start, actual start).
+    """
+    #how often abort flag is checked while waiting for next time point
+    ABORT_CHECK_INTERVAL_S = .1
+    #how often time left is sent to the acquisition dialog
+    STATUS_UPDATE_INTERVAL_S = 1
 
     def __init__(self, acq_settings: AcqSettings | HTLSSettings, acq_gui: CLSAcqGui | HTLSAcqGui,
                  acq_directory: AcqDirectory, sequence_helpers: SequenceHelpers, logger: logging.Logger):
@@ -191,19 +217,22 @@ class TimePointHelpers():
         self._acq_directory = acq_directory
         self._sequence_helpers = sequence_helpers
         self._logger = logger
+        self._series_start_time: float = None
+        self._num_series = 0
+        self.start_jitter: list[tuple[int, float, float]] = []
 
     # time point helpers
     def _get_time(self) -> float:
         return time.time()
-    
-    def _get_time_since_start(self, start_time) -> float:
-        return self._get_time() - start_time
-    
-    def _get_time_remaining(self, start_time) -> float:
-        return self._acq_settings.time_points_interval_sec - self._get_time_since_start(start_time)
-    
-    def _get_minutes_left(self, start_time) -> tuple[int, int]:
-        total_seconds_left = int(np.ceil(self._get_time_remaining(start_time)))
+
+    def _get_deadline(self, time_point_num: int) -> float:
+        """
+        Returns time time point should start at.
+        """
+        return self._series_start_time + time_point_num*self._acq_settings.time_points_interval_sec
+
+    def _get_minutes_left(self, deadline: float) -> tuple[int, int]:
+        total_seconds_left = int(np.ceil(deadline - self._get_time()))
         return divmod(total_seconds_left, constants.S_IN_MIN)
     
     def _is_time_point_left(self, time_point) -> bool:
@@ -211,18 +240,66 @@ class TimePointHelpers():
             return self._acq_settings.num_time_points - time_point > 1
         else:
             return False
+
+    def _start_time_point(self, time_point_num: int):
+        """
+        Should be called at the start of each time point. Time point 0 starts a new series (each fish in
+        SampTimeAcquisition and each region in PosTimeAcquisition has its own).
+        """
+        if time_point_num == 0 or self._series_start_time is None:
+            self._series_start_time = self._start_series()
+        self._record_start(time_point_num, self._get_deadline(time_point_num))
+        self._update_time_point_num(time_point_num)
+
+    def _start_series(self) -> float:
+        """
+        Returns start time of a new time series. If acquisition was resumed, series that were already
+        started keep their original start time so the time point schedule is the same.
+        """
+        series_num = self._num_series
+        self._num_series += 1
+        journal = self._acq_directory.journal
+        start_time = journal.get_series_start(series_num) if journal else None
+        if start_time is None:
+            start_time = self._get_time()
+            if journal:
+                journal.record_series_start(series_num, start_time)
+        return start_time
+
+    def _record_start(self, time_point_num: int, planned_start: float):
+        now = self._get_time()
+        self.start_jitter.append((time_point_num, planned_start, now))
+        if time_point_num:
+            self._logger.info(f"timepoint {time_point_num + 1} started {now - planned_start:.3f} s after planned start")
     
-    def _wait_for_next_time_point(self, start_time):
-        while self._get_time_remaining(start_time) > 0:
+    def _wait_for_next_time_point(self, time_point_num: int):
+        """
+        Waits until next time point after time_point_num is due.
+        """
+        deadline = self._get_deadline(time_point_num + 1)
+        if self._get_time() >= deadline:
+            self._logger.warning(f"timepoint {time_point_num + 1} took longer than time point interval")
+        self._wait_until(deadline)
+
+    def _wait_until(self, deadline: float):
+        """
+        Sleeps in ABORT_CHECK_INTERVAL_S chunks until deadline so abort is still responsive, and only
+        updates time left every STATUS_UPDATE_INTERVAL_S.
+        """
+        last_update_time = None
+        while (time_left := deadline - self._get_time()) > 0:
             self._sequence_helpers._abort_check()
-            self._update_time_left(start_time)
-            time.sleep(self.TIME_DIALOG_UPDATE_DELAY_S)
+            now = self._get_time()
+            if last_update_time is None or now - last_update_time >= self.STATUS_UPDATE_INTERVAL_S:
+                self._update_time_left(deadline)
+                last_update_time = now
+            time.sleep(min(time_left, self.ABORT_CHECK_INTERVAL_S))
 
     def _update_time_point_label(self, time_point: int):
         self._acq_gui.timepoint_update(time_point + 1)
 
-    def _update_time_left(self, start_time):
-        minutes_left, seconds_left = self._get_minutes_left(start_time)
+    def _update_time_left(self, deadline: float):
+        minutes_left, seconds_left = self._get_minutes_left(deadline)
         update_message = "next time point:"
         if minutes_left:
             update_message = f"{update_message} {minutes_left} minutes"
@@ -268,13 +345,12 @@ class TimeSampAcquisition():
     def _acquire_time_points(self, start_region):
         self._sequence_helpers._move_to_region(start_region)
         for time_point in range(self._acq_settings.num_time_points):
-            start_time = self._time_point_helpers._get_time()
-            self._time_point_helpers._update_time_point_num(time_point)
+            self._time_point_helpers._start_time_point(time_point)
             self._acquire_fish()
             if self._time_point_helpers._is_time_point_left(time_point):
                 if self._acq_settings.total_num_regions > 1:
                     self._sequence_helpers._move_to_region(start_region)
-                self._time_point_helpers._wait_for_next_time_point(start_time)
+                self._time_point_helpers._wait_for_next_time_point(time_point)
             else:
                 break
         self._sequence_helpers._acquire_end_videos()
@@ -284,7 +360,6 @@ class TimeSampAcquisition():
         for fish_num, fish in enumerate(self._acq_settings.fish_list):
             self._sequence_helpers._abort_check()
             if fish.imaging_enabled:
-                self._sequence_helpers._update_directory(fish.size_mb)
                 self._sequence_helpers._update_fish_num(fish_num)
                 self._sequence_helpers._acquire_regions(fish)
 
@@ -333,13 +408,11 @@ class SampTimeAcquisition():
 
     def _acquire_time_points(self, fish: Fish, start_region: Region):
         for time_point in range(self._acq_settings.num_time_points):
-            self._sequence_helpers._update_directory(fish.size_mb)
-            start_time = self._time_point_helpers._get_time()
-            self._time_point_helpers._update_time_point_num(time_point)
+            self._time_point_helpers._start_time_point(time_point)
             self._sequence_helpers._acquire_regions(fish)
             if self._time_point_helpers._is_time_point_left(time_point):
                 self._sequence_helpers._move_to_region(start_region)
-                self._time_point_helpers._wait_for_next_time_point(start_time)
+                self._time_point_helpers._wait_for_next_time_point(time_point)
             else:
                 break
 
@@ -388,28 +461,179 @@ class PosTimeAcquisition():
 
     def _acquire_time_points(self, region: Region):
         for time_point in range(self._acq_settings.num_time_points):
-            self._sequence_helpers._update_directory(region.size_mb)
-            start_time = self._time_point_helpers._get_time()
-            self._time_point_helpers._update_time_point_num(time_point)
+            self._time_point_helpers._start_time_point(time_point)
             self._sequence_helpers._run_imaging_sequences(region)
             if self._time_point_helpers._is_time_point_left(time_point):
                 Stage.set_z_position(region.z_pos)
-                self._time_point_helpers._wait_for_next_time_point(start_time)
+                self._time_point_helpers._wait_for_next_time_point(time_point)
             else:
                 break
 
 
+class InterleavedAcquisition():
+    """
+    InterleavedAcquisition gives each fish its own time series like SampTimeAcquisition, but instead of
+    finishing one fish's series before starting the next, other fish are imaged while a fish waits for its
+    next time point. Each fish's time points are treated as a periodic job, due every time_points_interval_sec
+    from that fish's first time point, and the job with the earliest deadline is run next. Since every fish
+    has the same interval, that's always the job that's been due the longest, and fish that haven't been
+    imaged yet go first.
+
+    As long as one time point of every fish fits in the interval, each fish is sampled the same as with
+    SampTimeAcquisition, but the whole acquisition takes about as long as a single fish's series. If they
+    don't fit, time points start late (see TimePointHelpers.start_jitter) and fish take turns.
+
+    Public Methods:
+
+    #### run()
+        runs acquisition
+    """
+    def __init__(self, acq_settings: AcqSettings, acq_gui: CLSAcqGui,
+                 acq_directory: AcqDirectory, abort_flag: exceptions.AbortFlag):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._acq_settings = acq_settings
+        self._adv_settings = self._acq_settings.adv_settings
+        self._acq_gui = acq_gui
+        self._acq_directory = acq_directory
+        self._abort_flag = abort_flag
+        self._sequence_helpers = SequenceHelpers(self._acq_settings, self._acq_gui, self._acq_directory, self._abort_flag, self._logger)
+        self._time_point_helpers = TimePointHelpers(self._acq_settings, self._acq_gui, self._acq_directory, self._sequence_helpers, self._logger)
+        self._start_time: float = None
+
+    def run(self):
+        if not self._sequence_helpers._get_start_region(0)[0]:
+            raise exceptions.AbortAcquisitionException("No valid region for imaging")
+        journal = self._acq_directory.journal
+        self._start_time = journal.start_time if journal else self._time_point_helpers._get_time()
+        self._acquire_fish()
+
+    def _acquire_fish(self):
+        jobs = self._get_jobs()
+        while jobs:
+            self._sequence_helpers._abort_check()
+            #min() returns first job in case of a tie, so fish are imaged in order
+            job = min(jobs, key=self._get_planned_start)
+            planned_start = self._get_planned_start(job)
+            self._sequence_helpers._update_fish_num(job.fish_num)
+            #stage is moved while waiting, so fish is imaged as soon as its time point is due
+            self._sequence_helpers._move_to_region(job.start_region)
+            self._time_point_helpers._wait_until(planned_start)
+            self._acquire_time_point(job, planned_start)
+            if self._time_point_helpers._is_time_point_left(job.time_point_num):
+                job.time_point_num += 1
+            else:
+                jobs.remove(job)
+                self._sequence_helpers._acquire_end_videos([job.fish_num])
+
+    def _acquire_time_point(self, job: "_FishJob", planned_start: float):
+        if job.series_start_time is None:
+            job.series_start_time = self._time_point_helpers._start_series()
+        self._time_point_helpers._record_start(job.time_point_num, planned_start)
+        self._time_point_helpers._update_time_point_num(job.time_point_num)
+        self._sequence_helpers._acquire_regions(job.fish)
+
+    def _get_jobs(self) -> list["_FishJob"]:
+        jobs = []
+        fish_num = 0
+        while True:
+            start_region, fish_num = self._sequence_helpers._get_start_region(fish_num)
+            if not start_region:
+                return jobs
+            jobs.append(_FishJob(fish_num, self._acq_settings.fish_list[fish_num], start_region))
+            fish_num += 1
+
+    def _get_planned_start(self, job: "_FishJob") -> float:
+        #fish that haven't been imaged yet have been due since the start of the acquisition
+        if job.series_start_time is None:
+            return self._start_time
+        return job.series_start_time + job.time_point_num*self._acq_settings.time_points_interval_sec
+
+
+class _FishJob():
+    """
+    Time series of a single fish in InterleavedAcquisition.
+    """
+    def __init__(self, fish_num: int, fish: Fish, start_region: Region):
+        self.fish_num = fish_num
+        self.fish = fish
+        self.start_region = start_region
+        self.time_point_num = 0
+        self.series_start_time: float = None
+
+
+class PumpPrimer(threading.Thread):
+    """
+    Refills the syringe and sets the pump to its detection settings in a separate thread, so that
+    it can be done while a fish is being imaged instead of while we're waiting for the next one.
+    Valves should be closed while this runs so the fish being imaged doesn't move. Any exception
+    raised while priming is re-raised by wait(). stop() makes it stop after the current step, so 
+    nothing is sent to the pump after an acquisition has been aborted.
+    """
+    _STOP_TIMEOUT_S = 5
+
+    def __init__(self):
+        threading.Thread.__init__(self, daemon=True)
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._exception = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        steps = [lambda: Pump.fill(self._stop_event),
+                 lambda: Pump.set_port(Pump.ACQ_PORT),
+                 lambda: Pump.set_speed(Pump.DEFAULT_SPEED),
+                 lambda: Pump.set_velocity(Pump.DETECTION_VELOCITY)]
+        try:
+            start_time = time.time()
+            for step in steps:
+                if self._stop_event.is_set():
+                    self._logger.info("pump priming stopped")
+                    return
+                step()
+            self._logger.info(f"pump primed in {time.time() - start_time:.1f} s")
+        except Exception as e:
+            self._exception = e
+
+    def wait(self):
+        """
+        Blocks until priming is finished.
+        """
+        self.join()
+        if self._exception:
+            raise self._exception
+        
+    def stop(self):
+        """
+        Stops priming after the current step and waits for it to stop.
+        """
+        self._stop_event.set()
+        self.join(PumpPrimer._STOP_TIMEOUT_S)
+        if self.is_alive():
+            self._logger.warning(f"pump priming didn't stop in {PumpPrimer._STOP_TIMEOUT_S} s")
+
+
 class HTLSSequence():
     _DETECT_TIMEOUT_S = 300
     _STITCH_STEP_SIZE_UM = 300
     _STITCH_IMAGE_WIDTH_UM = 11000
-    _INIT_DETECT_MEAN_FACTOR = 0.8
-    _INIT_DETECT_STD_FACTOR = 1.1
     _Z_STACK_THRESHOLD_FACTOR = 1.2
     _REGION_OVERLAP = 0.05
     _MAX_Z_STACK = 1000
+    #upper bound on time waited for fish to settle after valves are closed
     _FISH_SETTLE_PAUSE_S = 5
+    #fish is considered settled when frame to frame motion energy stays below this for
+    #_SETTLE_STILL_FRAMES frames in a row.
+    _SETTLE_MOTION_THRESHOLD = 0.01
+    _SETTLE_STILL_FRAMES = 5
     _SET_Z_STACK_SPEED = 200
+    #speed of z sweeps if coarse_z_sweep_enabled is set. Frames are further apart, but bounds are padded by the
+    #distance between frames anyway (see _sweep_z()).
+    _COARSE_Z_SWEEP_SPEED = 800
+    #frames in a row below threshold that end a z sweep once it's past the sample. Same as the running median
+    #get_z_bounds() smooths with, so a single noisy frame doesn't end it.
+    _SWEEP_STOP_FRAMES = 3
+    #time between buffer checks while waiting for detection frames. Small so frames are processed
+    #as soon as they arrive. time.sleep() is used instead of core.sleep() to save a trip through the bridge.
+    _DETECT_POLL_S = 0.001
 
     def __init__(self, htls_settings: HTLSSettings, acq_gui: HTLSAcqGui,
                  acq_directory: AcqDirectory, abort_flag: exceptions.AbortFlag):
@@ -422,12 +646,16 @@ class HTLSSequence():
         self._acq_settings = self._htls_settings.acq_settings
         self._adv_settings = self._acq_settings.adv_settings
         self._sequence_helpers = SequenceHelpers(self._acq_settings, self._acq_gui, self._acq_directory, self._abort_flag, self._logger)
+        #time between a detection frame being taken and the valves being closed, for each detection. Includes time
+        #the frame spent waiting in the buffer.
+        self.detection_latencies_s: list[float] = []
+        self._pump_primer: PumpPrimer = None
 
     def run(self):
         self._htls_settings.remove_fish_sections()
         start_pos = self._htls_settings.start_pos
         Stage.move_stage(*self._htls_settings.start_pos)
-        std_detect, mean_detect = self._get_fish_detect_stats()
+        background = self._get_detection_background()
         z_stack_thresh = self._get_z_stack_thresh()
         fish_num = 0
         time_no_fish_s = 0
@@ -435,9 +663,11 @@ class HTLSSequence():
             try:
                 self._sequence_helpers._abort_check()
                 Stage.move_stage(*self._htls_settings.start_pos)
-                time_no_fish_s = self._wait_for_fish(std_detect, mean_detect, time_no_fish_s)
+                time_no_fish_s = self._wait_for_fish(background, time_no_fish_s)
             except exceptions.DetectionTimeoutException:
                 break
+            #pump is refilled while the fish is located and imaged
+            self._prime_pump()
             self._sequence_helpers._update_acq_status("Determining fish position")
             try:
                 x_offset = fish_detection.get_region_1_x_offset(start_pos, self._get_end_pos(), HTLSSequence._STITCH_STEP_SIZE_UM, fish_num)
@@ -447,7 +677,7 @@ class HTLSSequence():
             #copy fish so fish settings aren't modified
             fish = copy.deepcopy(self._htls_settings.fish_settings)
             self._htls_settings.fish_list.append(fish)
-            self._set_region_positions(fish, start_pos, x_offset, z_stack_thresh)
+            self._plan_regions(fish, start_pos, x_offset, z_stack_thresh)
             self._acquire_fish(fish, fish_num)
             if self._adv_settings.end_videos_enabled:
                 self._sequence_helpers._acquire_end_videos([fish_num])
@@ -455,22 +685,27 @@ class HTLSSequence():
 
     def _acquire_fish(self, fish: Fish, fish_num: int):
         Camera.set_binning(Camera.DEFAULT_BINNING)
-        self._sequence_helpers._update_directory(fish.size_mb)
         self._acq_directory.set_fish_num(fish_num)
         self._sequence_helpers._acquire_regions(fish)
-        fish.write_to_config(fish_num) 
+        self._htls_settings.write_fish_to_config(fish_num)
 
     def _get_end_pos(self):
         end_pos = copy.deepcopy(self._htls_settings.start_pos)
         end_pos[0] += HTLSSequence._STITCH_IMAGE_WIDTH_UM
         return end_pos
 
-    def _get_fish_detect_stats(self):
+    def _get_detection_background(self) -> fish_detection.DetectionBackground:
+        """
+        Snaps bright field image with no fish in the capillary to initialize the detection background.
+        """
         Camera.set_binning(Camera.DETECTION_BINNING)
         Camera.set_exposure(Camera.DETECTION_EXPOSURE)
         pycro.set_channel(pycro.BF_CHANNEL)
-        bf_image = self._get_snap_array()
-        return np.std(bf_image), np.mean(bf_image)
+        bf_image = self._get_snap_array().reshape(fish_detection.get_image_shape())
+        return fish_detection.DetectionBackground(self._crop_detection_image(bf_image))
+
+    def _crop_detection_image(self, image: np.ndarray) -> np.ndarray:
+        return fish_detection.crop_detection_image(image, self._htls_settings.detect_roi, self._htls_settings.detect_stride)
     
     def _get_max_channel(self, region: Region):
         maxes = []
@@ -481,7 +716,7 @@ class HTLSSequence():
         return region.z_stack_channel_list[np.argmax(maxes)]
     
     def _get_region_distance(self):
-        return (1 - HTLSSequence._REGION_OVERLAP)*core.get_image_width()*core.get_pixel_size_um()
+        return (1 - HTLSSequence._REGION_OVERLAP)*camera_geometry.width*camera_geometry.pixel_size_um
     
     def _get_snap_array(self) -> np.ndarray:
         """
@@ -500,98 +735,248 @@ class HTLSSequence():
         gfp_image = self._get_snap_array()
         return HTLSSequence._Z_STACK_THRESHOLD_FACTOR*np.std(gfp_image)
     
+    def _prime_pump(self):
+        """
+        Starts refilling pump in the background. Valves must be closed.
+        """
+        self._pump_primer = PumpPrimer()
+        self._pump_primer.start()
+
+    def stop_pump_primer(self):
+        """
+        Stops pump priming if it's running. Called when acquisition ends so that the primer doesn't keep 
+        sending commands to the pump while hardware is reset.
+        """
+        if self._pump_primer:
+            self._pump_primer.stop()
+            self._pump_primer = None
+
     def _start_pump(self):
+        """
+        Opens valves and starts pumping. If pump wasn't primed in the background already, it's
+        primed here first.
+        """
+        if not self._pump_primer:
+            self._prime_pump()
+        self._pump_primer.wait()
+        self._pump_primer = None
         Valves.open()
-        Pump.fill()
-        Pump.set_port("O")
-        Pump.set_speed(Pump.DEFAULT_SPEED)
-        Pump.set_velocity(Pump.DETECTION_VELOCITY)
         Pump.set_zero()
 
-    def _set_region_positions(self, fish: Fish, start_pos: tuple[int], x_offset: float, std_z_stack: float):
+    def _resume_pump(self):
+        """
+        Restarts pumping after Pump.terminate() without going through the whole fill routine,
+        unless the syringe is empty.
+        """
+        if Pump.is_empty():
+            self._start_pump()
+        else:
+            Valves.open()
+            Pump.set_zero()
+
+    def _plan_regions(self, fish: Fish, start_pos: tuple[int], x_offset: float, std_z_stack: float):
+        """
+        Sets positions of every region in fish. x positions all come from the offset found in the
+        stitched overview image, so they're set in one go without moving the stage. After that, 
+        z-stack positions of every region with z-stacks enabled are found with its own z sweep. 
+        
+        Sweeps are done at _SET_Z_STACK_SPEED, or at _COARSE_Z_SWEEP_SPEED if coarse_z_sweep_enabled 
+        is set in HTLSSettings, which is faster but finds bounds with fewer frames.
+        """
+        region_distance = self._get_region_distance()
         for region_num, region in enumerate(fish.region_list):
-            self._sequence_helpers._update_acq_status(f"Moving to region {region_num + 1}")
             region.x_pos, region.y_pos, region.z_pos = start_pos
-            region.x_pos += x_offset - region_num*self._get_region_distance()
-            self._sequence_helpers._move_to_region(region)
-            if region.z_stack_enabled:
+            region.x_pos += x_offset - region_num*region_distance
+        if self._htls_settings.coarse_z_sweep_enabled:
+            speed = HTLSSequence._COARSE_Z_SWEEP_SPEED
+        else:
+            speed = HTLSSequence._SET_Z_STACK_SPEED
+        for region_num, region in enumerate(fish.region_list):
+            if region.z_stack_enabled and region.z_stack_channel_list:
                 self._sequence_helpers._update_acq_status(f"Determining region {region_num + 1} z-stack positions")
-                self._set_z_stack_pos(region, std_z_stack)
+                Stage.move_stage(region.x_pos, region.y_pos, region.z_pos)
+                region.z_stack_start_pos, region.z_stack_end_pos = self._sweep_z(region, std_z_stack, speed)
 
-    def _set_z_stack_pos(self, region: Region, threshold):
-        if region.z_stack_channel_list:
-            pycro.set_channel(region.z_stack_channel_list[0])
-            for direction in [-1, 1]:
-                Stage.set_z_position(region.z_pos)
-                Stage.wait_for_z_stage()
-                max_z_pos = region.z_pos + direction*HTLSSequence._MAX_Z_STACK/2
-                start_time = time.time()
-                core.stop_sequence_acquisition()
-                core.start_continuous_sequence_acquisition(0)
-                Stage.set_z_at_speed(max_z_pos, HTLSSequence._SET_Z_STACK_SPEED)
-                while True:
-                    if core.get_remaining_image_count() > 0:
-                        self._sequence_helpers._abort_check()
-                        image = pycro.pop_next_image().get_raw_pixels()
-                        if np.std(image) <= threshold:
-                            Stage.halt()
-                            break
-                        #If stage is reaches the end position without reaching threshold
-                        elif time.time() - start_time > HTLSSequence._MAX_Z_STACK/2/HTLSSequence._SET_Z_STACK_SPEED + 0.5:
-                            break
-                        else:
-                            core.sleep(0.5)
-                        core.clear_circular_buffer()
+    def _get_sweep_range(self, region: Region) -> tuple[float, float]:
+        return region.z_pos - HTLSSequence._MAX_Z_STACK/2, region.z_pos + HTLSSequence._MAX_Z_STACK/2
+
+    def _sweep_z(self, region: Region, threshold, speed: float) -> tuple[float, float]:
+        """
+        Finds (start, end) z-stack positions of region with z sweeps at speed that start at region.z_pos 
+        and only go as far as the sample does. The stage first goes down from z_pos until it's below the 
+        sample, and then up from there (or from z_pos if there was no sample below it) until it's past the 
+        sample on the other side of z_pos. Neither goes further than _MAX_Z_STACK/2 from z_pos. The std of 
+        every frame of the second sweep is recorded along with the z position the stage was at when the 
+        frame was taken, and then both boundaries are taken from that profile. The real boundary is 
+        somewhere between the last frame in the sample and the next one, so bounds are padded by the 
+        distance the stage moves between frames.
+        """
+        pycro.set_channel(region.z_stack_channel_list[0])
+        min_z, max_z = self._get_sweep_range(region)
+        _, stds = self._sweep_z_until_past(threshold, region.z_pos, min_z, speed, region.z_pos)
+        start_z = Stage.get_z_position() if max(stds, default=0) > threshold else region.z_pos
+        z_positions, stds = self._sweep_z_until_past(threshold, start_z, max_z, speed, region.z_pos)
+        if not z_positions:
+            return min_z, max_z
+        z_start, z_end = fish_detection.get_z_bounds(z_positions, stds, threshold, region.z_pos)
+        frame_spacing = float(np.median(np.diff(z_positions))) if len(z_positions) > 1 else 0.
+        return max(z_start - frame_spacing, min_z), min(z_end + frame_spacing, max_z)
+
+    def _sweep_z_until_past(self, threshold, start_z: float, end_z: float, speed: float, 
+                            past_z: float) -> tuple[list[float], list[float]]:
+        """
+        Sweeps stage from start_z towards end_z (either direction) at speed and returns the z positions 
+        and stds of its frames, in the order they were taken. The stage is halted once a frame has been 
+        above threshold and the last _SWEEP_STOP_FRAMES frames past past_z are below it, ie once it has 
+        gone through the sample.
+        """
+        sweep_time_s = abs(end_z - start_z)/speed
+        direction = 1 if end_z >= start_z else -1
+        Stage.set_z_position(start_z)
+        Stage.wait_for_z_stage()
+        core.stop_sequence_acquisition()
+        core.clear_circular_buffer()
+        core.start_continuous_sequence_acquisition(0)
+        frame_clock = pycro.FrameClock()
+        Stage.set_z_at_speed(end_z, speed)
+        sweep_start_time = time.time()
+        z_positions = []
+        stds = []
+        is_sample_found = False
+        num_below = 0
+        while time.time() - sweep_start_time < sweep_time_s:
+            if core.get_remaining_image_count() == 0:
+                time.sleep(HTLSSequence._DETECT_POLL_S)
+                continue
+            self._sequence_helpers._abort_check()
+            frame_time, std = self._pop_sweep_frame(frame_clock)
+            #stage moves at constant speed, so position is calculated from time since it started.
+            z_pos = start_z + direction*speed*max(frame_time - sweep_start_time, 0)
+            z_positions.append(z_pos)
+            stds.append(std)
+            if std > threshold:
+                is_sample_found = True
+                num_below = 0
+            elif direction*(z_pos - past_z) >= 0:
+                num_below += 1
+            if is_sample_found and num_below >= HTLSSequence._SWEEP_STOP_FRAMES:
+                Stage.halt()
                 core.stop_sequence_acquisition()
-                if direction == -1:
-                    region.z_stack_start_pos = Stage.get_z_position()
-                else:
-                    region.z_stack_end_pos = Stage.get_z_position()
+                return z_positions, stds
+        core.stop_sequence_acquisition()
+        #frames taken near the end of the sweep may not have been read yet. Frames from after the stage
+        #got to end_z aren't part of the sweep.
+        while core.get_remaining_image_count() > 0:
+            frame_time, std = self._pop_sweep_frame(frame_clock)
+            if frame_time - sweep_start_time <= sweep_time_s:
+                z_positions.append(start_z + direction*speed*max(frame_time - sweep_start_time, 0))
+                stds.append(std)
+        return z_positions, stds
+
+    def _pop_sweep_frame(self, frame_clock: pycro.FrameClock) -> tuple[float, float]:
+        """
+        Pops next frame of z sweep and returns time it was taken and its std.
+        """
+        mm_image = pycro.pop_next_image()
+        return frame_clock.get_frame_time(mm_image), float(np.std(mm_image.get_raw_pixels()))
     
-    def _wait_for_fish(self, std_detect, mean_detect, time_no_fish_s):
+    def _wait_for_fish(self, background: fish_detection.DetectionBackground, time_no_fish_s):
         start_time = time.time()
-        std_thresh = HTLSSequence._INIT_DETECT_STD_FACTOR*std_detect
-        mean_thresh = HTLSSequence._INIT_DETECT_MEAN_FACTOR*mean_detect
+        self._sequence_helpers._update_acq_status("Initializing wait for fish")
+        #initialize camera to detection settings
+        Camera.set_binning(Camera.DETECTION_BINNING)
+        Camera.set_exposure(Camera.DETECTION_EXPOSURE)
+        pycro.set_channel(pycro.BF_CHANNEL)
+        image_shape = fish_detection.get_image_shape()
+        #begins the pumping of the fish
+        self._start_pump()
+        self._sequence_helpers._update_acq_status("Waiting for fish")
+        core.stop_sequence_acquisition()
+        core.start_continuous_sequence_acquisition(0)
+        frame_clock = pycro.FrameClock()
+        #detection is disarmed while a rejected bubble is being flushed out of the field of view
+        armed = True
         while True:
-            try:
-                self._sequence_helpers._update_acq_status("Initializing wait for fish")
-                #initialize camera to detection settings
-                Camera.set_binning(Camera.DETECTION_BINNING)
-                Camera.set_exposure(Camera.DETECTION_EXPOSURE)
-                pycro.set_channel(pycro.BF_CHANNEL)
-                #begins the pumping of the fish
-                self._start_pump()
-                self._sequence_helpers._update_acq_status("Waiting for fish")
+            total_time_s = time_no_fish_s + time.time() - start_time
+            if total_time_s > HTLSSequence._DETECT_TIMEOUT_S:
                 core.stop_sequence_acquisition()
-                core.start_continuous_sequence_acquisition(0)
-                while True:
-                    total_time_s = time_no_fish_s + time.time() - start_time
-                    if core.get_remaining_image_count() > 0:
-                        self._sequence_helpers._abort_check()
-                        mm_image = pycro.pop_next_image()
-                        image = mm_image.get_raw_pixels()
-                        if np.std(image) > std_thresh and np.mean(image) < mean_thresh:
-                            core.stop_sequence_acquisition()
-                            #Valves closing first here is important because it instantly stops the fish.
-                            Valves.close()
-                            Pump.terminate()
-                            #uncomment the three lines below this if you want to save detection images
-                            #data = pycro.MultipageDatastore(fr"E:\HTLS Test\fish detection")
-                            #data.put_image(mm_image)
-                            #data.close()
-                            if fish_detection.is_fish(image):
-                                self._sequence_helpers._update_acq_status("Waiting for fish to settle")
-                                time.sleep(HTLSSequence._FISH_SETTLE_PAUSE_S)
-                                break
-                            else:
-                                raise exceptions.BubbleException
-                        elif total_time_s > HTLSSequence._DETECT_TIMEOUT_S:
-                            raise exceptions.DetectionTimeoutException
-                        #clear buffer so that it doesn't fill. We're just analyzing the newest image
-                        #received so we don't need to be storing the images.
-                        core.clear_circular_buffer()
-                    else:
-                        core.sleep(0.5)
-                return total_time_s
-            except exceptions.BubbleException:
+                raise exceptions.DetectionTimeoutException
+            num_frames = core.get_remaining_image_count()
+            if num_frames == 0:
+                time.sleep(HTLSSequence._DETECT_POLL_S)
                 continue
+            #Every frame is analyzed as it arrives (instead of sleeping and only looking at the
+            #newest one) so the fish is caught in the first frame it shows up in. If detection falls
+            #behind the camera, it skips to the newest frame, since the fish has already moved past
+            #wherever it was in the older ones.
+            self._sequence_helpers._abort_check()
+            if num_frames > 1:
+                mm_image = pycro.pop_newest_image()
+                frame_time = frame_clock.get_frame_time(mm_image)
+                frame_clock.reset()
+            else:
+                mm_image = pycro.pop_next_image()
+                frame_time = frame_clock.get_frame_time(mm_image)
+            image = mm_image.get_raw_pixels().reshape(image_shape)
+            block_means = background.get_block_means(self._crop_detection_image(image))
+            if not background.is_object_present(block_means):
+                #background only learns from frames without anything in them
+                background.update(block_means)
+                armed = True
+            elif armed:
+                #Valves closing first here is important because it instantly stops the fish.
+                Valves.close()
+                self._record_detection_latency(time.time() - frame_time)
+                Pump.terminate()
+                #uncomment the three lines below this if you want to save detection images
+                #data = pycro.MultipageDatastore(fr"E:\HTLS Test\fish detection")
+                #data.put_image(mm_image)
+                #data.close()
+                if fish_detection.is_fish(image):
+                    self._sequence_helpers._update_acq_status("Waiting for fish to settle")
+                    self._wait_for_settle(image_shape)
+                    core.stop_sequence_acquisition()
+                    return total_time_s
+                self._reject_bubble()
+                frame_clock.reset()
+                armed = False
+
+    def _reject_bubble(self):
+        """
+        Flushes a detected bubble out of the field of view. Camera keeps streaming with its detection 
+        settings and the pump just continues from where it was stopped. The pump is only refilled
+        if it's actually run out.
+        """
+        self._sequence_helpers._update_acq_status("Bubble detected, flushing")
+        self._resume_pump()
+        #frames from while the pump was stopped don't need to be looked at
+        core.clear_circular_buffer()
+        self._sequence_helpers._update_acq_status("Waiting for fish")
+
+    def _record_detection_latency(self, latency_s: float):
+        self.detection_latencies_s.append(latency_s)
+        self._logger.info(f"detection to valve close latency: {latency_s*constants.S_TO_MS:.1f} ms")
+
+    def _wait_for_settle(self, image_shape: tuple[int, int]) -> bool:
+        """
+        Keeps reading detection frames (sequence acquisition should already be running) until
+        the fish stops moving, or until _FISH_SETTLE_PAUSE_S has passed. Returns True if the fish
+        settled and False if it timed out. A fish that never settles is still imaged, but it's
+        logged so it can be looked at later.
+        """
+        #throw out frames from before valves were closed
+        core.clear_circular_buffer()
+        start_time = time.time()
+        settle_detector = fish_detection.SettleDetector(HTLSSequence._SETTLE_MOTION_THRESHOLD,
+                                                        HTLSSequence._SETTLE_STILL_FRAMES)
+        while time.time() - start_time < HTLSSequence._FISH_SETTLE_PAUSE_S:
+            if core.get_remaining_image_count() == 0:
+                time.sleep(HTLSSequence._DETECT_POLL_S)
+                continue
+            self._sequence_helpers._abort_check()
+            image = self._crop_detection_image(pycro.pop_next_image().get_raw_pixels().reshape(image_shape))
+            if settle_detector.add(image):
+                self._logger.info(f"fish settled after {time.time() - start_time:.2f} s")
+                return True
+        self._logger.warning(f"fish did not settle within {HTLSSequence._FISH_SETTLE_PAUSE_S} s")
+        return False
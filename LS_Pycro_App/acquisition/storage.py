@@ -0,0 +1,192 @@
+"""
+Decides which disk each region of an acquisition is saved to. Acquisitions used to be saved to a
+single directory, with an optional backup directory that was switched to (for the rest of the
+acquisition) once the first disk got too full. That check was done once per fish, with the size of
+the whole fish, so a fish that was bigger than what was left on the disk would still fill it.
+
+StorageManager has any number of volumes, each with its own acquisition root directory. Before a
+region is imaged, place() is called with the region's predicted size (Region.size_mb) and returns
+the root the region should be saved in. Free space is read from each disk every time, minus the
+predicted size of regions that were placed but haven't been released yet (ie, are still being
+written), so volumes are never overfilled by writes that haven't hit the disk yet.
+
+By default, volumes are filled in order, so the first volume is used until it's full, like the old
+backup directory. If striping is enabled, each region goes to the volume with the fewest regions being
+written (least recently used in case of a tie), so consecutive regions alternate between disks and
+one disk can finish flushing a region while the next one is written to another.
+
+Every placement is written to manifest.json in the first volume's root, which has the list of volume
+roots and the volume of every region directory, so that everything in an acquisition can be found
+from its first root. When an acquisition is resumed, the manifest is read and regions that were
+already placed go back to the same volume.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+
+from LS_Pycro_App.models.acq_directory import AcqDirectory
+from LS_Pycro_App.utils import dir_functions
+
+
+class StorageManager():
+    """
+    Places regions of an acquisition on storage volumes. See module docstring.
+
+    ## Constructor parameters:
+
+    #### roots : list[str]
+        acquisition root directory on each volume. First root is where manifest is saved.
+
+    #### limit : float
+        fraction of a disk that can be used before it's considered full.
+
+    #### striping_enabled : bool
+        if True, regions are spread across volumes. Otherwise volumes are filled in order.
+
+    ## Methods:
+
+    #### from_settings(root, adv_settings) -> StorageManager
+        class method that returns StorageManager with root as the first volume and directories in
+        adv_settings as the others. If root already has a manifest, its volumes are used instead.
+
+    #### place(key, size_mb) -> str
+        reserves size_mb for region directory key (relative to root) and returns root it should be saved in.
+
+    #### release(key)
+        releases reservation of key. Should be called once region is written.
+
+    #### get_available_mb() -> list[float]
+        returns MB that can still be written to each volume, not counting reservations.
+    """
+    FILE_NAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, roots: list[str], limit: float, striping_enabled: bool = False):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.roots = list(roots)
+        self.limit = limit
+        self.striping_enabled = striping_enabled
+        self.file_path = f"{self.roots[0]}/{StorageManager.FILE_NAME}"
+        self._lock = threading.Lock()
+        #region key -> volume number
+        self._placements: dict[str, int] = {}
+        #region key -> (volume number, reserved MB)
+        self._reservations: dict[str, tuple[int, float]] = {}
+        #number of placements when each volume was last used, for striping
+        self._last_used = [-1]*len(self.roots)
+        self._num_placed = 0
+        self._volume_num = 0
+        if os.path.exists(self.file_path):
+            self._read()
+
+    @classmethod
+    def from_settings(cls, root: str, adv_settings) -> "StorageManager":
+        manifest_path = f"{root}/{StorageManager.FILE_NAME}"
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                roots = json.load(manifest_file)["volumes"]
+        else:
+            directories = list(adv_settings.storage_directories)
+            if adv_settings.backup_directory_enabled:
+                directories.insert(0, adv_settings.backup_directory)
+            roots = [root]
+            for directory in directories:
+                #reserved and created right away, so another acquisition started at the same time can't get
+                #the same root
+                volume_root = dir_functions.reserve_unique_directory(f"{directory}/{AcqDirectory.FOLDER_NAME}")
+                try:
+                    os.makedirs(volume_root, exist_ok=True)
+                finally:
+                    dir_functions.release_directory(volume_root)
+                if volume_root not in roots:
+                    roots.append(volume_root)
+        return cls(roots, adv_settings.backup_directory_limit, adv_settings.storage_striping_enabled)
+
+    def __deepcopy__(self, memo):
+        #AcqDirectory is copied for end videos, and the copy should still place on the same volumes
+        return self
+
+    def place(self, key: str, size_mb: float) -> str:
+        with self._lock:
+            if key in self._placements:
+                volume_num = self._placements[key]
+            else:
+                volume_num = self._get_volume_num(size_mb)
+                self._placements[key] = volume_num
+                self._write()
+            self._reservations[key] = (volume_num, size_mb)
+            self._last_used[volume_num] = self._num_placed
+            self._num_placed += 1
+            if volume_num != self._volume_num:
+                self._logger.info(f"saving to {self.roots[volume_num]}")
+                self._volume_num = volume_num
+            return self.roots[volume_num]
+
+    def release(self, key: str):
+        with self._lock:
+            self._reservations.pop(key, None)
+
+    def get_available_mb(self) -> list[float]:
+        return [dir_functions.get_available_mb(self.limit, root) for root in self.roots]
+
+    def _get_volume_num(self, size_mb: float) -> int:
+        available_mb = [mb - self._get_reserved_mb(num) for num, mb in enumerate(self.get_available_mb())]
+        volume_nums = [num for num, mb in enumerate(available_mb) if mb >= size_mb]
+        if not volume_nums:
+            volume_num = max(range(len(self.roots)), key=lambda num: available_mb[num])
+            self._logger.warning(f"no volume has {size_mb:.0f} MB left, saving to {self.roots[volume_num]}")
+            return volume_num
+        if self.striping_enabled:
+            return min(volume_nums, key=lambda num: (self._get_num_writers(num), self._last_used[num]))
+        return volume_nums[0]
+
+    def _get_reserved_mb(self, volume_num: int) -> float:
+        return sum(mb for num, mb in self._reservations.values() if num == volume_num)
+
+    def _get_num_writers(self, volume_num: int) -> int:
+        return sum(num == volume_num for num, _ in self._reservations.values())
+
+    def _read(self):
+        with open(self.file_path) as manifest_file:
+            data = json.load(manifest_file)
+        for key, volume_root in data["directories"].items():
+            if volume_root in self.roots:
+                self._placements[key] = self.roots.index(volume_root)
+        self._logger.info(f"{self.file_path} read, {len(self._placements)} regions placed")
+
+    def _write(self):
+        """
+        Writes to temporary file and renames it, same as SettingsStore, so there's always a complete manifest.
+        """
+        data = {"version": StorageManager.VERSION, "volumes": self.roots,
+                "directories": {key: self.roots[num] for key, num in self._placements.items()}}
+        os.makedirs(self.roots[0], exist_ok=True)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(data, manifest_file, indent=4)
+        os.replace(temp_path, self.file_path)
+
+
+@contextlib.contextmanager
+def placed(acq_directory: AcqDirectory, size_mb: float):
+    """
+    Context manager that sets acq_directory.root to the volume its current region is placed on, and
+    releases the region and sets root back when done, so anything saved outside of a region (acquisition
+    notes, the journal) still goes to the first volume. Does nothing if acq_directory doesn't have a
+    StorageManager.
+    """
+    storage: StorageManager = acq_directory.storage
+    if not storage:
+        yield
+        return
+    key = acq_directory.get_region_key()
+    root = acq_directory.root
+    acq_directory.root = storage.place(key, size_mb)
+    try:
+        yield
+    finally:
+        storage.release(key)
+        acq_directory.root = root
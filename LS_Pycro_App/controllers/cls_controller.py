@@ -11,10 +11,13 @@ from LS_Pycro_App.acquisition.main import CLSAcquisition
 from LS_Pycro_App.models.acq_directory import AcqDirectory
 from LS_Pycro_App.models.acq_settings import Region, Fish, AcqSettings, AcqOrder
 from LS_Pycro_App.controllers.select_controller import microscope, MicroscopeConfig
+from LS_Pycro_App.views.region_table_model import RegionTableModel
 from LS_Pycro_App.views import AcqRegionsDialog, AcqOrderDialog, AcqSettingsDialog, AdvSettingsDialog, BrowseDialog, AcqDialog, AbortDialog
 from LS_Pycro_App.hardware import Stage, Camera
 from LS_Pycro_App.hardware.camera import Hamamatsu
 from LS_Pycro_App.utils import constants, exceptions
+from LS_Pycro_App.utils.autosave import DebouncedSaver
+from LS_Pycro_App.utils.pycro import camera_geometry
 
 
 class CLSController(object):
@@ -49,6 +52,27 @@ class CLSController(object):
     """
     
     NUM_DECIMAL_PLACES = 3
+    #storage directories are entered in a single line edit. ";" can't be in a path on Windows.
+    _STORAGE_DIRECTORY_SEPARATOR = "; "
+    #(header, value) of each column in region table. Values are functions of (fish_num, region_num, region).
+    _REGION_TABLE_COLUMNS = [("fish #", lambda fish_num, region_num, region: fish_num + 1),
+                             ("reg #", lambda fish_num, region_num, region: region_num + 1),
+                             ("x", lambda fish_num, region_num, region: region.x_pos),
+                             ("y", lambda fish_num, region_num, region: region.y_pos),
+                             ("z", lambda fish_num, region_num, region: region.z_pos),
+                             ("z stack", lambda fish_num, region_num, region: region.z_stack_enabled),
+                             ("start", lambda fish_num, region_num, region: region.z_stack_start_pos),
+                             ("end", lambda fish_num, region_num, region: region.z_stack_end_pos),
+                             ("step", lambda fish_num, region_num, region: region.z_stack_step_size),
+                             ("chans", lambda fish_num, region_num, region: region.z_stack_channel_list),
+                             ("snap", lambda fish_num, region_num, region: region.snap_enabled),
+                             ("exp", lambda fish_num, region_num, region: region.snap_exposure),
+                             ("chans", lambda fish_num, region_num, region: region.snap_channel_list),
+                             ("video", lambda fish_num, region_num, region: region.video_enabled),
+                             ("frames", lambda fish_num, region_num, region: region.video_num_frames),
+                             ("exp", lambda fish_num, region_num, region: region.video_exposure),
+                             ("chans", lambda fish_num, region_num, region: region.video_channel_list),
+                             ("# images", lambda fish_num, region_num, region: region.num_images)]
 
     def __init__(self):
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -67,15 +91,29 @@ class CLSController(object):
         self._fish_copy = deepcopy(self._fish)
         self._region_copy = deepcopy(self._region)
 
+        #settings are saved once changes stop coming in. See save_settings().
+        self._autosave = DebouncedSaver(self._acq_settings.write_to_config)
+        #pending changes are also written when a settings window is closed or the app quits
+        for dialog in [self.regions_dialog, self._acq_settings_dialog, self._adv_settings_dialog, self._acq_order_dialog]:
+            dialog.finished.connect(lambda result: self.save_settings())
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.save_settings)
+
         self._set_widget_models()
         self._set_validators()
         self._connect_signals()
         self._set_additional_widget_settings()
         self._update_dialogs()
     
+    def save_settings(self):
+        """
+        Writes any pending settings changes to config immediately.
+        """
+        self._autosave.flush()
+
     def _set_widget_models(self):
          # initialize item (list) models
-        self._region_table_model = QtGui.QStandardItemModel()
+        self._region_table_model = RegionTableModel(lambda: self._acq_settings.fish_list, CLSController._REGION_TABLE_COLUMNS)
+        self._region_table_sized = False
         self._z_stack_available_model = QtGui.QStandardItemModel()
         self._z_stack_used_model = QtGui.QStandardItemModel()
         self._snap_available_model = QtGui.QStandardItemModel()
@@ -130,6 +168,7 @@ class CLSController(object):
         self.regions_dialog.video_num_frames_line_edit.setValidator(validator)
         self._acq_settings_dialog.num_time_points_line_edit.setValidator(validator)
         self._adv_settings_dialog.end_videos_num_frames_line_edit.setValidator(validator)
+        self._adv_settings_dialog.post_processing_num_workers_line_edit.setValidator(validator)
 
         validator = QtGui.QDoubleValidator()
         validator.setDecimals(CLSController.NUM_DECIMAL_PLACES)
@@ -139,6 +178,11 @@ class CLSController(object):
         self.regions_dialog.video_exposure_line_edit.setValidator(validator)
         self._adv_settings_dialog.z_stack_exposure_line_edit.setValidator(validator)
         self._adv_settings_dialog.end_videos_exposure_line_edit.setValidator(validator)
+
+        validator = QtGui.QDoubleValidator()
+        validator.setDecimals(CLSController.NUM_DECIMAL_PLACES)
+        validator.setBottom(1)
+        self._adv_settings_dialog.post_processing_io_line_edit.setValidator(validator)
     
     def _connect_signals(self):
         # Initialize AcquisitionRegionsDialog event handlers. Organized by where they show up in the GUI.
@@ -223,6 +267,16 @@ class CLSController(object):
         self._adv_settings_dialog.end_videos_num_frames_line_edit.textEdited.connect(self._end_videos_num_frames_line_edit_event)
         self._adv_settings_dialog.end_videos_exposure_line_edit.textEdited.connect(self._end_videos_exposure_line_edit)
 
+        self._adv_settings_dialog.storage_directories_browse_button.clicked.connect(self._storage_directories_browse_button_clicked)
+        self._adv_settings_dialog.storage_directories_line_edit.textEdited.connect(self._storage_directories_line_edit_event)
+        self._adv_settings_dialog.storage_striping_check_box.clicked.connect(self._storage_striping_check_box_clicked)
+
+        self._adv_settings_dialog.post_processing_check_box.clicked.connect(self._post_processing_check_box_clicked)
+        for job, check_box in self._get_post_processing_job_check_boxes().items():
+            check_box.clicked.connect(lambda checked, job=job: self._post_processing_job_check_box_clicked(job, checked))
+        self._adv_settings_dialog.post_processing_num_workers_line_edit.textEdited.connect(self._post_processing_num_workers_line_edit_event)
+        self._adv_settings_dialog.post_processing_io_line_edit.textEdited.connect(self._post_processing_io_line_edit_event)
+
     def _set_additional_widget_settings(self):
         self._acq_settings_dialog.channel_order_list_view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.regions_dialog.region_table_view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
@@ -252,10 +306,10 @@ class CLSController(object):
         #of the model based on settings in model and core, but this should be called frequently anyway and it seems
         #like a decent spot or it.
         self._update_regions_dialog()
-        self._update_region_table()
+        self._update_region_table(self._region)
         self._update_acq_settings_dialog()
         self._update_adv_settings_dialog()
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _update_acq_settings_dialog(self):
         """
@@ -289,7 +343,7 @@ class CLSController(object):
         if self._adv_settings.acq_order == AcqOrder.TIME_SAMP:
             self._acq_settings_dialog.num_images_per_line_edit.setText(str(self._acq_settings.images_per_time_point))
             self._acq_settings_dialog.total_images_line_edit.setText(str(self._acq_settings.total_num_images))
-        elif self._adv_settings.acq_order == AcqOrder.SAMP_TIME:
+        elif self._adv_settings.acq_order in (AcqOrder.SAMP_TIME, AcqOrder.INTERLEAVED):
             # NA because different fish have different number of images
             self._acq_settings_dialog.num_images_per_line_edit.setText("N/A")
             self._acq_settings_dialog.total_images_line_edit.setText(str(self._acq_settings.total_num_images))
@@ -307,6 +361,8 @@ class CLSController(object):
         self._update_acq_order_widgets()
         self._update_adv_backup_directory_widgets()
         self._update_end_videos_widgets()
+        self._update_storage_widgets()
+        self._update_post_processing_widgets()
 
     # update_adv_settings_dialog helpers
     def _update_adv_z_stack_widgets(self):
@@ -336,6 +392,34 @@ class CLSController(object):
         self._adv_settings_dialog.end_videos_exposure_line_edit.setEnabled(self._adv_settings.end_videos_enabled)
         self._adv_settings_dialog.end_videos_exposure_line_edit.setText(str(self._adv_settings.end_videos_exposure))
 
+    def _update_storage_widgets(self):
+        #only set if it's different, so separators aren't removed while directories are being typed
+        line_edit = self._adv_settings_dialog.storage_directories_line_edit
+        if self._get_storage_directories(line_edit.text()) != self._adv_settings.storage_directories:
+            line_edit.setText(CLSController._STORAGE_DIRECTORY_SEPARATOR.join(self._adv_settings.storage_directories))
+        self._adv_settings_dialog.storage_striping_check_box.setChecked(self._adv_settings.storage_striping_enabled)
+
+    def _update_post_processing_widgets(self):
+        enabled = self._adv_settings.post_processing_enabled
+        self._adv_settings_dialog.post_processing_check_box.setChecked(enabled)
+        for job, check_box in self._get_post_processing_job_check_boxes().items():
+            check_box.setChecked(job in self._adv_settings.post_processing_jobs)
+            check_box.setEnabled(enabled)
+        self._adv_settings_dialog.post_processing_num_workers_line_edit.setEnabled(enabled)
+        self._adv_settings_dialog.post_processing_num_workers_line_edit.setText(str(self._adv_settings.post_processing_num_workers))
+        self._adv_settings_dialog.post_processing_io_line_edit.setEnabled(enabled)
+        self._adv_settings_dialog.post_processing_io_line_edit.setText(str(self._adv_settings.post_processing_io_mb_per_s))
+
+    def _get_post_processing_job_check_boxes(self) -> dict[str, QtWidgets.QCheckBox]:
+        return {"mip": self._adv_settings_dialog.post_processing_mip_check_box,
+                "preview": self._adv_settings_dialog.post_processing_preview_check_box,
+                "checksum": self._adv_settings_dialog.post_processing_checksum_check_box,
+                "qc": self._adv_settings_dialog.post_processing_qc_check_box}
+
+    def _get_storage_directories(self, text: str) -> list[str]:
+        directories = [directory.strip() for directory in text.split(CLSController._STORAGE_DIRECTORY_SEPARATOR)]
+        return [directory for directory in directories if directory]
+
     def _update_regions_dialog(self):
         """
         Updates all GUI elements of AcquisitionRegionsDialog to reflect the values in the acq_settings
@@ -370,7 +454,8 @@ class CLSController(object):
             self._region = self._fish.region_list[self._region_num]
             region_found = True
         except IndexError:
-            self._region = Region()
+            #new region starts with the settings of the last one shown
+            self._region = deepcopy(self._region)
         return region_found
 
     def _update_fish(self):
@@ -379,7 +464,7 @@ class CLSController(object):
             self._fish = self._acq_settings.fish_list[self._fish_num]
             fish_found = True
         except IndexError:
-            self._fish = Fish()
+            self._fish = self._fish.copy_notes()
         return fish_found
 
     def _region_widgets_update(self, region_bool):
@@ -470,58 +555,16 @@ class CLSController(object):
             if channel not in channel_list:
                 available_model.appendRow(QtGui.QStandardItem(channel))
 
-    def _update_region_table(self):
+    def _update_region_table(self, region: Region = None):
         """
-        Sets the table to display values in current region_list within
-        acquistiion_settings.
-
-        #TODO make this not as disgusting. Perhaps find a way to automatically set headers
-        based on attributes names. Only problem is attribute names are long. Maybe just use 
-        small font? Wrapping headers? idk but this is awful.
+        Updates table rows of regions that changed. If region is given, only its row is updated unless regions 
+        were added or removed. Columns are only sized the first time the table has rows, since sizing them goes 
+        through every row.
         """
-        self._region_table_model.clear()
-        headers = ["fish #", 
-                   "reg #", 
-                   "x", 
-                   "y", 
-                   "z", 
-                   "z stack", 
-                   "start",
-                   "end", 
-                   "step", 
-                   "chans", 
-                   "snap", 
-                   "exp", 
-                   "chans", 
-                   "video",
-                   "frames", 
-                   "exp", 
-                   "chans", 
-                   "# images"]
-        self._region_table_model.setHorizontalHeaderLabels(headers)
-        for fish_num, fish in enumerate(self._acq_settings.fish_list):
-            for region_num, region in enumerate(fish.region_list):
-                row_list = [str(fish_num + 1), 
-                            str(region_num + 1),
-                            str(region.x_pos), 
-                            str(region.y_pos),
-                            str(region.z_pos), 
-                            str(region.z_stack_enabled),
-                            str(region.z_stack_start_pos), 
-                            str(region.z_stack_end_pos),
-                            str(region.z_stack_step_size), 
-                            ','.join(region.z_stack_channel_list),
-                            str(region.snap_enabled), 
-                            str(region.snap_exposure),
-                            ','.join(region.snap_channel_list), 
-                            str(region.video_enabled),
-                            str(region.video_num_frames), 
-                            str(region.video_exposure),
-                            ','.join(region.video_channel_list), 
-                            str(region.num_images)]
-                row_list = [QtGui.QStandardItem(element) for element in row_list]
-                self._region_table_model.appendRow(row_list)
-        self.regions_dialog.region_table_view.resizeColumnsToContents()
+        self._region_table_model.refresh(region)
+        if not self._region_table_sized and self._region_table_model.rowCount():
+            self.regions_dialog.region_table_view.resizeColumnsToContents()
+            self._region_table_sized = True
 
     def _go_to_button_clicked(self):
         # Goes to position set in current instance of Region
@@ -617,6 +660,9 @@ class CLSController(object):
     def _acq_setup_button_clicked(self):
         # Brings up acquisition settings dialog
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        #ROI or binning may have been changed in Micro-Manager, which changes the memory estimate
+        camera_geometry.invalidate()
+        self._update_memory_widgets()
         self._acq_settings_dialog.show()
         self._acq_settings_dialog.activateWindow()
 
@@ -734,19 +780,19 @@ class CLSController(object):
         # Changes fish type text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.fish_type = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _age_line_edit_event(self, text):
         # Changes fish age text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.age = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _treatment_line_edit_event(self, text):
         # Changes inoculum type text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.treatment = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _add_notes_text_edit_event(self):
         # For now, removed logging from this event. Currently is triggered off of textChanged
@@ -754,7 +800,7 @@ class CLSController(object):
         # floods the logs. Couldn't find a different signal for QT Text Edit.
         text = self.regions_dialog.add_notes_text_edit.toPlainText()
         self._fish.add_notes = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _start_z_line_edit_event(self, text):
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
@@ -782,7 +828,7 @@ class CLSController(object):
         with contextlib.suppress(ValueError):
             if self.regions_dialog.snap_exposure_line_edit.hasAcceptableInput():
                 self._region.snap_exposure = float(text)
-                self._update_region_table()
+                self._update_region_table(self._region)
             else:
                 self._update_dialogs()
 
@@ -798,7 +844,7 @@ class CLSController(object):
         with contextlib.suppress(ValueError):
             if self.regions_dialog.video_exposure_line_edit.hasAcceptableInput():
                 self._region.video_exposure = float(text)
-                self._update_region_table()
+                self._update_region_table(self._region)
             else:
                 self._update_dialogs()
 
@@ -840,7 +886,7 @@ class CLSController(object):
             # correctly, so this function just writes to config and updates the order list.
             self._acq_settings.channel_order_list = self._get_list_from_model(self._acq_order_model)
             self._update_regions_dialog()
-            self._acq_settings.write_to_config()
+            self._autosave.request_save()
 
     def _channel_move_down_button_clicked(self):
         # Same as move_up but moves channel down
@@ -854,7 +900,7 @@ class CLSController(object):
                 self._acq_settings_dialog.channel_order_list_view.setCurrentIndex(new_index)
             self._acq_settings.channel_order_list = self._get_list_from_model(self._acq_order_model)
             self._update_regions_dialog()
-            self._acq_settings.write_to_config()
+            self._autosave.request_save()
 
 
     def _adv_settings_button_clicked(self):
@@ -887,6 +933,7 @@ class CLSController(object):
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         # Update before starting acquisition to update all values beforehand.
         self._update_dialogs()
+        self.save_settings()
         try:
             if self._acquisition.is_alive():
                 return
@@ -1010,3 +1057,52 @@ class CLSController(object):
                 self._update_region_table()
             else:
                 self._update_dialogs()
+
+    def _storage_directories_browse_button_clicked(self):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        browse = BrowseDialog()
+        directories = self._adv_settings.storage_directories
+        start_path = str(Path(directories[-1] if directories else self._acq_settings.directory).parent)
+        path = str(browse.getExistingDirectory(browse, "Select Directory", start_path))
+        if path and path not in directories:
+            self._adv_settings.storage_directories = directories + [path]
+        self._update_dialogs()
+
+    def _storage_directories_line_edit_event(self, text):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        self._adv_settings.storage_directories = self._get_storage_directories(text)
+        self._update_dialogs()
+
+    def _storage_striping_check_box_clicked(self, checked):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        self._adv_settings.storage_striping_enabled = checked
+        self._update_dialogs()
+
+    def _post_processing_check_box_clicked(self, checked):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        self._adv_settings.post_processing_enabled = checked
+        self._update_dialogs()
+
+    def _post_processing_job_check_box_clicked(self, job: str, checked: bool):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        jobs = [other_job for other_job in self._adv_settings.post_processing_jobs if other_job != job]
+        if checked:
+            jobs.append(job)
+        self._adv_settings.post_processing_jobs = jobs
+        self._update_dialogs()
+
+    def _post_processing_num_workers_line_edit_event(self, text):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        with contextlib.suppress(ValueError):
+            if self._adv_settings_dialog.post_processing_num_workers_line_edit.hasAcceptableInput():
+                self._adv_settings.post_processing_num_workers = int(text)
+            self._update_dialogs()
+
+    def _post_processing_io_line_edit_event(self, text):
+        self._logger.info(sys._getframe().f_code.co_name.strip("_"))
+        with contextlib.suppress(ValueError):
+            if self._adv_settings_dialog.post_processing_io_line_edit.hasAcceptableInput():
+                self._adv_settings.post_processing_io_mb_per_s = float(text)
+                self._autosave.request_save()
+            else:
+                self._update_dialogs()
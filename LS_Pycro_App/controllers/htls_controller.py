@@ -13,8 +13,10 @@ from LS_Pycro_App.hardware import Stage, Camera
 from LS_Pycro_App.hardware.camera import Hamamatsu
 from LS_Pycro_App.models.acq_settings import Region
 from LS_Pycro_App.models.acq_directory import AcqDirectory
+from LS_Pycro_App.views.region_table_model import RegionTableModel
 from LS_Pycro_App.views import BrowseDialog, HTLSAcqRegionsDialog, HTLSAcqSettingsDialog, HTLSAdvSettingsDialog, HTLSAcqDialog, AbortDialog
-from LS_Pycro_App.utils import exceptions
+from LS_Pycro_App.utils import exceptions, user_store
+from LS_Pycro_App.utils.autosave import DebouncedSaver
 
 
 class HTLSController(object):
@@ -49,6 +51,18 @@ class HTLSController(object):
     """
     
     NUM_DECIMAL_PLACES = 3
+    #(header, value) of each column in region table. Values are functions of (fish_num, region_num, region).
+    _REGION_TABLE_COLUMNS = [("reg #", lambda fish_num, region_num, region: region_num + 1),
+                             ("z stack", lambda fish_num, region_num, region: region.z_stack_enabled),
+                             ("step", lambda fish_num, region_num, region: region.z_stack_step_size),
+                             ("chans", lambda fish_num, region_num, region: region.z_stack_channel_list),
+                             ("snap", lambda fish_num, region_num, region: region.snap_enabled),
+                             ("exp", lambda fish_num, region_num, region: region.snap_exposure),
+                             ("chans", lambda fish_num, region_num, region: region.snap_channel_list),
+                             ("video", lambda fish_num, region_num, region: region.video_enabled),
+                             ("frames", lambda fish_num, region_num, region: region.video_num_frames),
+                             ("exp", lambda fish_num, region_num, region: region.video_exposure),
+                             ("chans", lambda fish_num, region_num, region: region.video_channel_list)]
 
     def __init__(self):
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -64,15 +78,34 @@ class HTLSController(object):
         self._region_num = 0
         self._region = Region()
 
+        #settings are saved once changes stop coming in. See save_settings().
+        self._autosave = DebouncedSaver(self._save_settings)
+        #pending changes are also written when a settings window is closed or the app quits
+        for dialog in [self.regions_dialog, self._acq_settings_dialog, self._adv_settings_dialog]:
+            dialog.finished.connect(lambda result: self.save_settings())
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.save_settings)
+
         self._set_widget_models()
         self._set_validators()
         self._connect_signals()
         self._set_additional_widget_settings()
         self._update_dialogs()
     
+    def save_settings(self):
+        """
+        Writes any pending settings changes to config immediately.
+        """
+        self._autosave.flush()
+
+    def _save_settings(self):
+        with user_store.batch():
+            self._adv_settings.write_to_config()
+            self._htls_settings.write_to_config()
+
     def _set_widget_models(self):
          # initialize item (list) models
-        self._region_table_model = QtGui.QStandardItemModel()
+        self._region_table_model = RegionTableModel(lambda: [self._fish], HTLSController._REGION_TABLE_COLUMNS)
+        self._region_table_sized = False
         self._z_stack_available_model = QtGui.QStandardItemModel()
         self._z_stack_used_model = QtGui.QStandardItemModel()
         self._snap_available_model = QtGui.QStandardItemModel()
@@ -213,10 +246,10 @@ class HTLSController(object):
         #of the model based on settings in model and core, but this should be called frequently anyway and it seems
         #like a decent spot or it.
         self._update_regions_dialog()
-        self._update_region_table()
+        self._update_region_table(self._region)
         self._update_acq_settings_dialog()
         self._update_adv_settings_dialog()
-        self._htls_settings.write_to_config()
+        self._autosave.request_save()
 
     def _update_acq_settings_dialog(self):
         """
@@ -297,7 +330,8 @@ class HTLSController(object):
             self._region = self._fish.region_list[self._region_num]
             region_found = True
         except IndexError:
-            self._region = Region()
+            #new region starts with the settings of the last one shown
+            self._region = deepcopy(self._region)
         return region_found
 
     def _region_widgets_update(self, region_bool):
@@ -369,43 +403,16 @@ class HTLSController(object):
             if channel not in channel_list:
                 available_model.appendRow(QtGui.QStandardItem(channel))
 
-    def _update_region_table(self):
+    def _update_region_table(self, region: Region = None):
         """
-        Sets the table to display values in current region_list within
-        acquistiion_settings.
-
-        #TODO make this not as disgusting. Perhaps find a way to automatically set headers
-        based on attributes names. Only problem is attribute names are long. Maybe just use 
-        small font? Wrapping headers? idk but this is awful.
+        Updates table rows of regions that changed. If region is given, only its row is updated unless regions 
+        were added or removed. Columns are only sized the first time the table has rows, since sizing them goes 
+        through every row.
         """
-        self._region_table_model.clear()
-        headers = ["reg #", 
-                   "z stack",
-                   "step", 
-                   "chans", 
-                   "snap", 
-                   "exp", 
-                   "chans", 
-                   "video",
-                   "frames", 
-                   "exp", 
-                   "chans"]
-        self._region_table_model.setHorizontalHeaderLabels(headers)
-        for region_num, region in enumerate(self._fish.region_list):
-            row_list = [str(region_num + 1),
-                        str(region.z_stack_enabled),
-                        str(region.z_stack_step_size), 
-                        ','.join(region.z_stack_channel_list),
-                        str(region.snap_enabled), 
-                        str(region.snap_exposure),
-                        ','.join(region.snap_channel_list), 
-                        str(region.video_enabled),
-                        str(region.video_num_frames), 
-                        str(region.video_exposure),
-                        ','.join(region.video_channel_list)]
-            row_list = [QtGui.QStandardItem(element) for element in row_list]
-            self._region_table_model.appendRow(row_list)
-        self.regions_dialog.region_table_view.resizeColumnsToContents()
+        self._region_table_model.refresh(region)
+        if not self._region_table_sized and self._region_table_model.rowCount():
+            self.regions_dialog.region_table_view.resizeColumnsToContents()
+            self._region_table_sized = True
 
     def start_go_to_button_clicked(self):
         # Goes to position set in current instance of Region
@@ -592,19 +599,19 @@ class HTLSController(object):
         # Changes fish type text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.fish_type = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _age_line_edit_event(self, text):
         # Changes fish age text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.age = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _treatment_line_edit_event(self, text):
         # Changes inoculum type text for current fish
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         self._fish.treatment = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _add_notes_text_edit_event(self):
         # For now, removed logging from this event. Currently is triggered off of textChanged
@@ -612,7 +619,7 @@ class HTLSController(object):
         # floods the logs. Couldn't find a different signal for QT Text Edit.
         text = self.regions_dialog.add_notes_text_edit.toPlainText()
         self._fish.add_notes = text
-        self._acq_settings.write_to_config()
+        self._autosave.request_save()
 
     def _step_size_line_edit_event(self, text):
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
@@ -628,7 +635,7 @@ class HTLSController(object):
         with contextlib.suppress(ValueError):
             if self.regions_dialog.snap_exposure_line_edit.hasAcceptableInput():
                 self._region.snap_exposure = float(text)
-                self._update_region_table()
+                self._update_region_table(self._region)
             else:
                 self._update_dialogs()
 
@@ -644,7 +651,7 @@ class HTLSController(object):
         with contextlib.suppress(ValueError):
             if self.regions_dialog.video_exposure_line_edit.hasAcceptableInput():
                 self._region.video_exposure = float(text)
-                self._update_region_table()
+                self._update_region_table(self._region)
             else:
                 self._update_dialogs()
 
@@ -667,7 +674,7 @@ class HTLSController(object):
             # correctly, so this function just writes to config and updates the order list.
             self._acq_settings.channel_order_list = self._get_list_from_model(self._acq_order_model)
             self._update_regions_dialog()
-            self._acq_settings.write_to_config()
+            self._autosave.request_save()
 
     def _channel_move_down_button_clicked(self):
         # Same as move_up but moves channel down
@@ -681,7 +688,7 @@ class HTLSController(object):
                 self._acq_settings_dialog.channel_order_list_view.setCurrentIndex(new_index)
             self._acq_settings.channel_order_list = self._get_list_from_model(self._acq_order_model)
             self._update_regions_dialog()
-            self._acq_settings.write_to_config()
+            self._autosave.request_save()
 
     def _adv_settings_button_clicked(self):
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
@@ -713,6 +720,7 @@ class HTLSController(object):
         self._logger.info(sys._getframe().f_code.co_name.strip("_"))
         # Update before starting acquisition to update all values beforehand.
         self._update_dialogs()
+        self.save_settings()
         try:
             if self._acquisition.is_alive():
                 return
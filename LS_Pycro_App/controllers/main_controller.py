@@ -35,10 +35,11 @@ from LS_Pycro_App.controllers.htls_controller import HTLSController
 from LS_Pycro_App.controllers.galvo_controller import GalvoController
 from LS_Pycro_App.controllers.htls_hardware_controller import HTLSHardwareController
 from LS_Pycro_App.controllers.select_controller import microscope, MicroscopeConfig
+from LS_Pycro_App.hardware.device_init import InitReport
 from LS_Pycro_App.views import HTLSMainWindow, KlaMainWindow, WilMainWindow
 
 class MainController(object):
-    def __init__(self):
+    def __init__(self, device_report: InitReport = None):
         #Same instances of studio, core, mm_hardware_commands, and spim_commands used throughout
         if microscope == MicroscopeConfig.KLAMATH:
             self._main_window = KlaMainWindow()
@@ -60,11 +61,21 @@ class MainController(object):
         self._main_window.regions_button.clicked.connect(self._regions_button_clicked)
         self._main_window.exit_button.clicked.connect(self._exit_button_clicked)
 
+        if device_report:
+            self._show_device_report(device_report)
+
         #This flag is set to disable thebuttons on the top right of the window.
         self._main_window.setWindowFlags(QtCore.Qt.WindowTitleHint)
         
         self._main_window.show()
     
+    def _show_device_report(self, device_report: InitReport):
+        #summary stays in status bar, and status of every device is shown when it's hovered over
+        self._main_window.statusbar.showMessage(device_report.get_summary())
+        self._main_window.statusbar.setToolTip(device_report.get_details())
+        if not device_report.ok:
+            self._main_window.statusbar.setStyleSheet("color: red")
+
     def _galvo_button_clicked(self):
         self._galvo_controller.galvo_dialog.show()
         self._galvo_controller.galvo_dialog.activateWindow()
@@ -78,4 +89,6 @@ class MainController(object):
         self._acquisition_controller.regions_dialog.activateWindow()
 
     def _exit_button_clicked(self):
+        #settings are autosaved after a delay, so any unsaved changes are written before exiting.
+        self._acquisition_controller.save_settings()
         quit()
@@ -1,6 +1,5 @@
-import contextlib
 from LS_Pycro_App.controllers.select_controller import microscope, MicroscopeConfig
-from LS_Pycro_App.utils import exceptions
+from LS_Pycro_App.hardware.device_init import DeviceGroup, InitReport, init_device_groups
 
 from LS_Pycro_App.hardware.plc import Plc
 Galvo = None
@@ -22,24 +21,25 @@ elif microscope == MicroscopeConfig.HTLS:
     from LS_Pycro_App.hardware.camera import Hamamatsu as Camera
     from LS_Pycro_App.hardware.stage import KlaStage as Stage
 
-#Initializes camera to default state.
-with contextlib.suppress(exceptions.HardwareException):
-    Camera.set_burst_mode()
+_CAMERA_INIT_TIMEOUT_S = 20.
+_STAGE_INIT_TIMEOUT_S = 20.
+_SERIAL_INIT_TIMEOUT_S = 10.
 
-#Initialize stage to default state.
-with contextlib.suppress(exceptions.HardwareException):
-    Stage.init()
 
-#Initializes plc to default state.
-with contextlib.suppress(exceptions.HardwareException):
-    Plc.init_pulse_mode()
+def init_devices() -> InitReport:
+    """
+    Puts devices into their default states. This used to be done when this package was imported, which
+    meant anything that imported a hardware class (or anything that imports one) talked to every device
+    first. It should be called once at startup, before devices are used.
 
-if microscope == MicroscopeConfig.HTLS:
-    with contextlib.suppress(exceptions.HardwareException):
-        Pump.init()
-
-    with contextlib.suppress(exceptions.HardwareException):
-        Rotation.init()
-
-    with contextlib.suppress(exceptions.HardwareException):
-        Valves.init()
+    Devices that don't share a controller are initialized at the same time, so this takes as long as
+    the slowest one. Returns report of how each device went, which is shown in the main window.
+    """
+    #Stage and PLC are on the same controller, so they're initialized one after the other.
+    groups = [DeviceGroup({"Camera": Camera.set_burst_mode}, _CAMERA_INIT_TIMEOUT_S),
+              DeviceGroup({"Stage": Stage.init, "PLC": Plc.init_pulse_mode}, _STAGE_INIT_TIMEOUT_S)]
+    if microscope == MicroscopeConfig.HTLS:
+        groups += [DeviceGroup({"Pump": Pump.init}, _SERIAL_INIT_TIMEOUT_S),
+                   DeviceGroup({"Rotation": Rotation.init}, _SERIAL_INIT_TIMEOUT_S),
+                   DeviceGroup({"Valves": Valves.init}, _SERIAL_INIT_TIMEOUT_S)]
+    return init_device_groups(groups)
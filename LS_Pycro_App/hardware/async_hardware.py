@@ -0,0 +1,154 @@
+"""
+asyncio wrappers for the hardware classes, so that calls to different devices can run at the same
+time. Every call on a device is run in that device's own thread, so calls to the same device still
+happen one at a time and in order, but something like configuring the PLC while the stage moves
+can be written as:
+
+    with AsyncHardware(Stage, Camera, Plc, Galvo) as hardware:
+        hardware.run(hardware.gather(hardware.move_stage(x, y, z), hardware.plc.set_for_z_stack(1, 30)))
+
+Stage and PLC are on the same controller, so by default they share one thread and are never run
+at the same time. Devices from hardware/simulated.py can be passed in instead of the real ones
+for testing. hardware.device_init uses the same threads to initialize devices at startup.
+"""
+
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import Executor, Future
+
+
+class DeviceExecutor(Executor):
+    """
+    Runs calls one at a time, in the order they're submitted, in a single thread. Same as a 
+    ThreadPoolExecutor with one worker, except the thread is a daemon, so a device that never 
+    responds doesn't keep the app from closing.
+
+    ## Constructor parameters:
+
+    #### name : str
+        name of thread, shows up in logs.
+    """
+    def __init__(self, name: str = "DeviceExecutor"):
+        self._calls = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run_calls, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        self._calls.put((future, functools.partial(fn, *args, **kwargs)))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._calls.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run_calls(self):
+        while (call := self._calls.get()) is not None:
+            future, fn = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class AsyncDevice():
+    """
+    Wraps hardware class or module so that every callable attribute becomes a coroutine function
+    that runs the call in the device's thread. Non-callable attributes (constants, settings) are
+    returned as is.
+
+    ## Constructor parameters:
+
+    #### device
+        hardware class, module, or simulated device.
+
+    #### executor : Executor
+        executor calls are run in. Should have a single worker. If None, a new DeviceExecutor is made. 
+        Pass in the same executor for devices that share a controller.
+    """
+    def __init__(self, device, executor: Executor = None):
+        self.device = device
+        self.executor = executor or DeviceExecutor()
+
+    def __getattr__(self, name):
+        attr = getattr(self.device, name)
+        if not callable(attr):
+            return attr
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(attr, *args, **kwargs))
+        return call
+
+
+class AsyncHardware():
+    """
+    Holds AsyncDevice for each device and awaitable versions of common multi-step operations.
+    Devices that are None (for example, Galvo on the Willamette setup) are left as None.
+
+    ## Constructor parameters:
+
+    stage, camera, plc, galvo, pump, valves
+        hardware classes/modules (or simulated devices) to wrap.
+
+    #### shared_stage_plc : bool
+        if True (default), stage and PLC calls are run in the same thread, since they go through the same
+        controller.
+
+    ## Methods:
+
+    #### run(awaitable)
+        runs awaitable to completion from synchronous code (such as an acquisition thread) and returns its result.
+
+    #### gather(*awaitables)
+        runs awaitables concurrently. Just asyncio.gather().
+
+    #### move_stage(x_pos, y_pos, z_pos)
+        moves stage and waits until it's done moving.
+
+    #### close()
+        shuts down device threads. Also called when used as a context manager.
+    """
+    def __init__(self, stage = None, camera = None, plc = None, galvo = None, pump = None, valves = None,
+                 shared_stage_plc: bool = True):
+        self._executors = []
+        stage_executor = self._new_executor() if stage else None
+        self.stage = AsyncDevice(stage, stage_executor) if stage else None
+        self.camera = AsyncDevice(camera, self._new_executor()) if camera else None
+        plc_executor = stage_executor if shared_stage_plc and stage_executor else self._new_executor()
+        self.plc = AsyncDevice(plc, plc_executor) if plc else None
+        self.galvo = AsyncDevice(galvo, self._new_executor()) if galvo else None
+        self.pump = AsyncDevice(pump, self._new_executor()) if pump else None
+        self.valves = AsyncDevice(valves, self._new_executor()) if valves else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _new_executor(self) -> DeviceExecutor:
+        executor = DeviceExecutor()
+        self._executors.append(executor)
+        return executor
+
+    def run(self, awaitable):
+        async def _await():
+            return await awaitable
+        return asyncio.run(_await())
+
+    async def gather(self, *awaitables):
+        return await asyncio.gather(*awaitables)
+
+    async def move_stage(self, x_pos, y_pos, z_pos):
+        await self.stage.move_stage(x_pos, y_pos, z_pos)
+        await self.stage.wait_for_xy_stage()
+        await self.stage.wait_for_z_stage()
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
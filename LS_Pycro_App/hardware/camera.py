@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod
 from LS_Pycro_App.hardware.exceptions_handle import handle_exception
 from LS_Pycro_App.utils.abc_attributes_wrapper import abstractattributes
 from LS_Pycro_App.utils import general_functions, constants
-from LS_Pycro_App.utils.pycro import studio, core
+from LS_Pycro_App.utils.pycro import studio, core, camera_geometry, CoreDeviceName
 
 
 @abstractattributes
@@ -22,7 +22,7 @@ class Camera(ABC):
         pass
     
     _logger = logging.getLogger(__name__)
-    CAM_NAME : str = core.get_camera_device()
+    CAM_NAME : str = CoreDeviceName("get_camera_device")
 
     _WAIT_FOR_IMAGE_MS : float = 0.01
     DEFAULT_EXPOSURE : float = 20
@@ -31,9 +31,11 @@ class Camera(ABC):
     @handle_exception
     def set_property(cls, property_name: str, value):
         """
-        Sets given camera MM property to value.
+        Sets given camera MM property to value. Since properties like binning change the image size, 
+        cached camera geometry is invalidated.
         """
         core.set_property(cls.CAM_NAME, property_name, value)
+        camera_geometry.invalidate()
 
     @classmethod
     @handle_exception
@@ -260,7 +262,7 @@ class Hamamatsu(Camera):
         Please see the framerate section of the Hamamatsu documentation for more details on this.
         """
         if not core.is_sequence_running():
-            readout_delay = cls.get_edge_trigger_readout(core.get_image_height())
+            readout_delay = cls.get_edge_trigger_readout(camera_geometry.height)
             max_exposure = (1/framerate - readout_delay)*constants.S_TO_MS
             exposure = general_functions.value_in_range(desired_exposure, cls.MIN_EXPOSURE, max_exposure)
         else:
@@ -281,7 +283,7 @@ class Hamamatsu(Camera):
         
         Please see the framerate section of the Hamamatsu documentation for more details on this.
         """
-        readout_delay = cls.get_edge_trigger_readout(core.get_image_height())
+        readout_delay = cls.get_edge_trigger_readout(camera_geometry.height)
         return (1/framerate - readout_delay)*constants.S_TO_MS
 
     @classmethod
@@ -0,0 +1,169 @@
+"""
+Initializes devices concurrently at startup, and reports how each one went.
+
+Devices are split into groups of devices that can't be talked to at the same time (stage and PLC are on
+the same controller). Each group is initialized in its own device thread, the same way 
+hardware.async_hardware runs device calls, so startup takes as long as the slowest group instead of the 
+sum of all of them. Every group has a timeout. A device that's still initializing when
+its group times out is reported as timed out, and is left to finish (or not) in the background, since
+there's no safe way to stop a thread that's stuck waiting on a device.
+
+Devices from hardware/simulated.py can be used to test this without hardware.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from LS_Pycro_App.hardware.async_hardware import DeviceExecutor
+
+
+class DeviceStatus():
+    """
+    Result of initializing one device.
+
+    ## Constructor parameters:
+
+    #### name : str
+        name of device, shown in report.
+
+    #### state : str
+        one of DeviceStatus.OK, FAILED, TIMED_OUT, or NOT_STARTED (an earlier device in the same group
+        timed out).
+
+    #### duration_s : float
+        time initialization took (or time until it timed out).
+
+    #### error : str
+        error message if initialization failed.
+    """
+    OK = "ok"
+    FAILED = "failed"
+    TIMED_OUT = "timed out"
+    NOT_STARTED = "not started"
+
+    def __init__(self, name: str, state: str, duration_s: float = 0., error: str = ""):
+        self.name = name
+        self.state = state
+        self.duration_s = duration_s
+        self.error = error
+
+    def __str__(self):
+        status = f"{self.name}: {self.state}"
+        if self.state != DeviceStatus.NOT_STARTED:
+            status += f" ({self.duration_s:.2f} s)"
+        if self.error:
+            status += f" - {self.error}"
+        return status
+
+
+class DeviceGroup():
+    """
+    Devices that are initialized one after another in the same device thread (see 
+    hardware.async_hardware.DeviceExecutor).
+
+    ## Constructor parameters:
+
+    #### devices : dict[str, Callable]
+        device names and the functions that initialize them, in the order they're called.
+
+    #### timeout_s : float
+        time the whole group has to initialize.
+
+    ## Methods:
+
+    #### init() -> list[DeviceStatus]
+        coroutine that initializes devices until they're all finished or the group times out, and 
+        returns the status of every device in it.
+    """
+    def __init__(self, devices: dict[str, Callable], timeout_s: float = 10.):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.devices = devices
+        self.timeout_s = timeout_s
+
+    async def init(self) -> list[DeviceStatus]:
+        loop = asyncio.get_running_loop()
+        executor = DeviceExecutor(self.__class__.__name__)
+        deadline = time.perf_counter() + self.timeout_s
+        statuses = []
+        names = list(self.devices)
+        for name in names:
+            start_time = time.perf_counter()
+            call = loop.run_in_executor(executor, self.devices[name])
+            try:
+                await asyncio.wait_for(call, max(deadline - start_time, 0))
+            except asyncio.TimeoutError:
+                self._logger.error(f"{name} didn't finish initializing in {self.timeout_s} s")
+                statuses.append(DeviceStatus(name, DeviceStatus.TIMED_OUT, time.perf_counter() - start_time))
+                statuses += [DeviceStatus(remaining, DeviceStatus.NOT_STARTED) for remaining in names[len(statuses):]]
+                break
+            except Exception as e:
+                self._logger.exception(f"{name} failed to initialize")
+                statuses.append(DeviceStatus(name, DeviceStatus.FAILED, time.perf_counter() - start_time,
+                                             str(e) or e.__class__.__name__))
+            else:
+                statuses.append(DeviceStatus(name, DeviceStatus.OK, time.perf_counter() - start_time))
+        #device that timed out is left to finish (or not) in the background
+        executor.shutdown(wait=False)
+        return statuses
+
+
+class InitReport():
+    """
+    Status of every device after initialization.
+
+    ## Constructor parameters:
+
+    #### statuses : list[DeviceStatus]
+        status of each device.
+
+    #### duration_s : float
+        total time initialization took.
+
+    ## Methods:
+
+    #### ok -> bool
+        True if every device initialized.
+
+    #### get_summary() -> str
+        one line summary, short enough for the status bar of the main window.
+
+    #### get_details() -> str
+        status and time of every device, one per line.
+    """
+    def __init__(self, statuses: list[DeviceStatus], duration_s: float):
+        self.statuses = statuses
+        self.duration_s = duration_s
+
+    @property
+    def ok(self) -> bool:
+        return all(status.state == DeviceStatus.OK for status in self.statuses)
+
+    def get_summary(self) -> str:
+        if self.ok:
+            return f"{len(self.statuses)} devices initialized in {self.duration_s:.1f} s"
+        problems = [f"{status.name} {status.state}" for status in self.statuses if status.state != DeviceStatus.OK]
+        return f"Device problems: {', '.join(problems)}. Check devices and logs."
+
+    def get_details(self) -> str:
+        lines = [str(status) for status in self.statuses]
+        lines.append(f"total: {self.duration_s:.2f} s")
+        return "\n".join(lines)
+
+
+def init_device_groups(groups: list[DeviceGroup]) -> InitReport:
+    """
+    Initializes groups at the same time and returns report once all of them are finished or timed out.
+    """
+    async def init_groups():
+        return await asyncio.gather(*(group.init() for group in groups))
+    start_time = time.perf_counter()
+    statuses = [status for group_statuses in asyncio.run(init_groups()) for status in group_statuses]
+    report = InitReport(statuses, time.perf_counter() - start_time)
+    logger = logging.getLogger(__name__)
+    if report.ok:
+        logger.info(f"devices initialized\n{report.get_details()}")
+    else:
+        logger.error(f"devices failed to initialize\n{report.get_details()}")
+    return report
@@ -60,8 +60,9 @@ _VOLT_PER_LINE = .00045
 settings = GalvoSettings()
 settings.init_from_config()
 _logger = logging.getLogger(__name__)
-_scan_output = nidaqmx.Task()
-_cam_output = nidaqmx.Task()
+#tasks are created by _reset_tasks(), which every mode calls first, so importing this doesn't touch the DAQ.
+_scan_output: nidaqmx.Task = None
+_cam_output: nidaqmx.Task = None
 
 
 @handle_exception
@@ -217,8 +218,7 @@ def exit():
     settings.dslm_offset = 0
     settings.dslm_scan_width = 0
     set_dslm_mode()
-    _scan_output.close()
-    _cam_output.close()
+    _close_tasks()
 
 
 def _get_alignment_scan_sample(num_samples: int, offset: float):
@@ -257,9 +257,15 @@ def _reset_tasks():
     closes DAQ tasks and creates new, empty tasks with the same variable names.
     """
     global _scan_output, _cam_output
-    _scan_output.close()
-    _cam_output.close()
+    _close_tasks()
     _scan_output = nidaqmx.Task()
     _cam_output = nidaqmx.Task()
     _scan_output.ao_channels.add_ao_voltage_chan(settings.FOCUS_CHANNEL)
     _scan_output.ao_channels.add_ao_voltage_chan(settings.OFFSET_CHANNEL)
+
+
+def _close_tasks():
+    if _scan_output:
+        _scan_output.close()
+    if _cam_output:
+        _cam_output.close()
@@ -1,8 +1,10 @@
 import contextlib
+import threading
 import time
 from enum import Enum
 
-import serial
+from LS_Pycro_App.hardware.serial_transport import SerialTransport
+from LS_Pycro_App.utils import exceptions
 
 
 class Port(Enum):
@@ -14,6 +16,18 @@ class Port(Enum):
 _COM_PORT = "COM5"
 _START = "/1"
 _END = "R\r"
+#Responses are of the form "/0<status><data><ETX>\r\n". Frames are split at ETX, so the "\r\n"
+#of the previous response ends up in front of the next one.
+_RESPONSE_START = b"/0"
+_ETX = b"\x03"
+#low 4 bits of status byte are the error code
+_ERROR_MASK = 0x0F
+#error code pump answers with when it gets a command while it's still executing the last one (plunger still
+#moving, valve still turning). Command isn't executed, so it's sent again until pump accepts it.
+_BUSY_ERROR = 15
+_BUSY_WAIT_S = 0.05
+_BUSY_TIMEOUT_S = 10
+_QUERY_ATTEMPTS = 3
 DEFAULT_SPEED = 2
 DETECTION_VELOCITY = 4
 FILL_VELOCITY = 200
@@ -30,7 +44,7 @@ def init():
     port = FILL_PORT
     speed = DEFAULT_SPEED
     velocity = DETECTION_VELOCITY
-    com = serial.Serial(_COM_PORT, timeout=0.05)
+    com = SerialTransport(_COM_PORT, _ETX)
     set_speed(speed)
     set_velocity(velocity)
     set_port(port)
@@ -41,29 +55,25 @@ def is_empty():
 
 
 def is_full():
-    return get_position == MAX_POSITION
+    return get_position() >= MAX_POSITION
 
 
 def get_position():
-    position = None
-    while position is None:
-        com.reset_output_buffer()
-        _write_command("?")
-        #? command returns a bunch of characters in addition to the position.
-        #This grabs the position from the string of characters.
-        try:
-            position = int((str(com.read(30)).split("`")[1].split("\\")[0]))
-            return position
-        except (IndexError, ValueError):
-            continue
+    for attempt in range(_QUERY_ATTEMPTS):
+        with contextlib.suppress(ValueError, exceptions.HardwareException):
+            return int(_write_command("?"))
+    raise exceptions.HardwareException("Pump position query failed")
 
 
-def fill():
+def fill(stop_event: threading.Event = None):
+    """
+    Fills syringe. If stop_event is given and gets set, stops filling after the current step.
+    """
     port = FILL_PORT
     velocity = FILL_VELOCITY
     set_port(port)
     set_velocity(velocity)
-    while get_position() < MAX_POSITION:
+    while get_position() < MAX_POSITION and not (stop_event and stop_event.is_set()):
         set_max()
         time.sleep(POSITION_WAIT_S)
         terminate()
@@ -121,9 +131,31 @@ def close_com():
     com.close()
 
 
-def _write_command(command: str):
-    com.write(f"{_START}{command}{_END}".encode())
-    time.sleep(0.2)
+def _write_command(command: str) -> str:
+    """
+    Sends command and waits for pump to acknowledge it. Returns data part of the response. If pump is
+    busy, command is sent again until it's accepted or _BUSY_TIMEOUT_S passes.
+    """
+    start_time = time.time()
+    while True:
+        try:
+            return _parse_response(com.send(f"{_START}{command}{_END}".encode()))
+        except exceptions.PumpBusyException:
+            if time.time() - start_time > _BUSY_TIMEOUT_S:
+                raise
+            time.sleep(_BUSY_WAIT_S)
+
+
+def _parse_response(frame: bytes) -> str:
+    start = frame.find(_RESPONSE_START)
+    if start == -1 or len(frame) < start + 3:
+        raise exceptions.HardwareException(f"Invalid pump response {frame}")
+    error = frame[start + 2] & _ERROR_MASK
+    if error == _BUSY_ERROR:
+        raise exceptions.PumpBusyException("Pump busy")
+    if error:
+        raise exceptions.HardwareException(f"Pump error code {error}")
+    return frame[start + 3:].decode(errors="ignore")
 
 
 def z_init():
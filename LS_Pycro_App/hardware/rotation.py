@@ -1,22 +1,22 @@
-import serial
+from LS_Pycro_App.hardware.serial_transport import SerialTransport
 
 
 _COM_PORT = "COM15"
 _START = "/1"
 _END = "\n"
+_TERMINATOR = b"\n"
 _DEFAULT_SPEED = 50
 
 
 def init():
     global com
-    com = serial.Serial(_COM_PORT, timeout=0.3)
+    com = SerialTransport(_COM_PORT, _TERMINATOR)
     set_speed(_DEFAULT_SPEED)
     pass
 
 
 def get_position():
-    write_command("?")
-    return com.read()
+    return com.send(f"{_START}?{_END}".encode())
 
 
 def set_speed(speed: float):
@@ -40,5 +40,5 @@ def close():
 
 
 def write_command(command: str):
-    com.write(f"{_START}{command}{_END}".encode())
+    com.send(f"{_START}{command}{_END}".encode(), expect_response=False)
         
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Shared serial transport used by the serial devices (pump, valves, rotation stage).
+
+Commands are put in a queue and written by a writer thread, and everything the device sends back
+is read by a reader thread and split into frames at the device's terminator. A command that expects
+a response is only complete once its response frame has been received (or it times out), so there's
+no need to sleep a fixed amount of time after every command. Since commands are queued, a caller that
+doesn't need the response right away can use send_async() and keep going while the command goes out.
+
+pyserial's serial_for_url() is used to open the port, so "loop://" can be used as the port to test
+without a device.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+import serial
+
+from LS_Pycro_App.utils import exceptions
+
+
+class SerialTransport():
+    """
+    Serial connection with a reader thread, framed responses, and a command queue.
+
+    ## Constructor parameters:
+
+    #### port : str
+        port name (such as "COM5") or pyserial URL (such as "loop://")
+
+    #### terminator : bytes
+        byte sequence that ends every response frame. Not included in returned responses.
+
+    #### baudrate : int
+        baudrate of device
+
+    #### response_timeout_s : float
+        default time to wait for a response before the command fails
+
+    ## Methods:
+
+    #### send(command, expect_response=True, timeout_s=None)
+        queues command and blocks until it's complete. Returns response frame, or None if
+        expect_response is False. Raises HardwareException if the response times out.
+
+    #### send_async(command, expect_response=True, timeout_s=None)
+        queues command and returns a Future that completes the same way send() does.
+
+    #### close()
+        stops threads and closes the port.
+    """
+    _READ_TIMEOUT_S = 0.01
+    DEFAULT_RESPONSE_TIMEOUT_S = 1
+
+    def __init__(self, port: str, terminator: bytes, baudrate: int = 9600,
+                 response_timeout_s: float = DEFAULT_RESPONSE_TIMEOUT_S):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._port = port
+        self._terminator = terminator
+        self._response_timeout_s = response_timeout_s
+        self._com = serial.serial_for_url(port, baudrate=baudrate, timeout=SerialTransport._READ_TIMEOUT_S)
+        self._commands = queue.Queue()
+        self._responses = queue.Queue()
+        self._closed = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    def send(self, command: bytes, expect_response: bool = True, timeout_s: float = None) -> bytes | None:
+        return self.send_async(command, expect_response, timeout_s).result()
+
+    def send_async(self, command: bytes, expect_response: bool = True, timeout_s: float = None) -> Future:
+        future = Future()
+        if self._closed.is_set():
+            future.set_exception(exceptions.HardwareException(f"{self._port} is closed"))
+        else:
+            self._commands.put((command, expect_response, timeout_s or self._response_timeout_s, future))
+        return future
+
+    def close(self):
+        self._closed.set()
+        self._commands.put(None)
+        self._writer.join()
+        self._reader.join()
+        self._com.close()
+
+    def _write_loop(self):
+        while True:
+            item = self._commands.get()
+            if item is None:
+                break
+            command, expect_response, timeout_s, future = item
+            #responses left over from commands that timed out would otherwise be taken as the
+            #response to this command.
+            self._clear_responses()
+            try:
+                self._com.write(command)
+            except serial.SerialException as e:
+                self._logger.exception(f"{self._port} write failed")
+                future.set_exception(exceptions.HardwareException(str(e)))
+                continue
+            if not expect_response:
+                future.set_result(None)
+                continue
+            try:
+                future.set_result(self._responses.get(timeout=timeout_s))
+            except queue.Empty:
+                message = f"{self._port} response to {command} timed out"
+                self._logger.warning(message)
+                future.set_exception(exceptions.HardwareException(message))
+        #fail anything still queued so callers don't block forever
+        while not self._commands.empty():
+            item = self._commands.get()
+            if item:
+                item[-1].set_exception(exceptions.HardwareException(f"{self._port} is closed"))
+
+    def _read_loop(self):
+        buffer = bytearray()
+        while not self._closed.is_set():
+            try:
+                data = self._com.read(self._com.in_waiting or 1)
+            except serial.SerialException:
+                self._logger.exception(f"{self._port} read failed")
+                break
+            if not data:
+                continue
+            buffer += data
+            while self._terminator in buffer:
+                frame, _, remainder = bytes(buffer).partition(self._terminator)
+                buffer = bytearray(remainder)
+                self._responses.put(frame)
+
+    def _clear_responses(self):
+        while not self._responses.empty():
+            self._logger.info(f"{self._port} discarded unexpected response {self._responses.get()}")
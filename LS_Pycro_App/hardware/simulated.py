@@ -0,0 +1,438 @@
+"""
+Simulated devices with the same interface the acquisition code uses for the real hardware. Nothing
+here talks to Micro-Manager or any serial port, so it can be used on any computer.
+
+Every call takes roughly as long as it would on the real device (these are rough numbers I
+measured/guessed, not specs) and is recorded in call_log as (name, start time, end time) so tests
+can check which calls overlapped. Like the real stage, moves return right away and the wait_for
+methods block until the move is done.
+
+Time is taken from clock, which is the time module by default. Anything with time() and sleep()
+functions can be passed in instead, such as VirtualClock, which doesn't actually sleep (used by the
+dry run to play out hours of acquisition in a second or two).
+"""
+
+import math
+import threading
+import time
+
+
+class VirtualClock():
+    """
+    Clock where sleep() just moves time forward instead of blocking. Should only be used from a
+    single thread, since there's no way to tell which sleep should come first.
+    """
+    def __init__(self, start_time: float = 0.):
+        self._time = start_time
+
+    def time(self) -> float:
+        return self._time
+
+    def sleep(self, seconds: float):
+        self._time += max(0, seconds)
+
+
+class SimDevice():
+    """
+    Base class for simulated devices.
+
+    ## Constructor parameters:
+
+    #### clock
+        object with time() and sleep() methods. Defaults to time module.
+    """
+    #time it takes for device to receive and respond to a single command
+    COMMAND_TIME_S = 0.005
+
+    def __init__(self, clock = time):
+        self.clock = clock
+        self.call_log: list[tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def _busy(self, name: str, duration_s: float = 0):
+        """
+        Blocks for COMMAND_TIME_S + duration_s and records call.
+        """
+        start = self.clock.time()
+        self.clock.sleep(SimDevice.COMMAND_TIME_S + duration_s)
+        with self._lock:
+            self.call_log.append((name, start, self.clock.time()))
+
+
+class SimStage(SimDevice):
+    DEFAULT_SPEED_UM_PER_S = 1000
+
+    def __init__(self, clock = time):
+        super().__init__(clock)
+        self.position = [0., 0., 0.]
+        self._speed = [SimStage.DEFAULT_SPEED_UM_PER_S]*3
+        self._busy_until = [0., 0., 0.]
+        self.scan_start_time: float = None
+        self.scan_speed: float = None
+
+    def init(self):
+        self._busy("init", 4*SimDevice.COMMAND_TIME_S)
+
+    def _move_axis(self, axis: int, position: float, speed: float = DEFAULT_SPEED_UM_PER_S):
+        #moves are queued after any move already in progress on that axis
+        start = max(self.clock.time(), self._busy_until[axis])
+        self._busy_until[axis] = start + abs(position - self.position[axis])/speed
+        self.position[axis] = position
+
+    def move_stage(self, x_pos, y_pos, z_pos):
+        self._busy("move_stage", 3*SimDevice.COMMAND_TIME_S)
+        self._move_axis(0, x_pos)
+        self._move_axis(1, y_pos)
+        self._move_axis(2, z_pos)
+
+    def set_x_position(self, x_pos):
+        self._busy("set_x_position")
+        self._move_axis(0, x_pos)
+
+    def set_y_position(self, y_pos):
+        self._busy("set_y_position")
+        self._move_axis(1, y_pos)
+
+    def set_xy_position(self, x_pos, y_pos):
+        self._busy("set_xy_position")
+        self._move_axis(0, x_pos)
+        self._move_axis(1, y_pos)
+
+    def set_z_position(self, z_pos):
+        self._busy("set_z_position")
+        self._move_axis(2, z_pos)
+
+    def set_z_at_speed(self, z_pos, speed):
+        self._busy("set_z_at_speed")
+        self._move_axis(2, z_pos, speed)
+
+    def wait_for_xy_stage(self):
+        self._busy("wait_for_xy_stage", max(0, max(self._busy_until[:2]) - self.clock.time()))
+
+    def wait_for_z_stage(self):
+        self._busy("wait_for_z_stage", max(0, self._busy_until[2] - self.clock.time()))
+
+    def initialize_scan(self, start_z, end_z):
+        self._busy("initialize_scan", 4*SimDevice.COMMAND_TIME_S)
+        self._move_axis(2, start_z)
+        self._scan_end = end_z
+
+    def scan_start(self, stage_speed):
+        self._busy("scan_start")
+        speed = SimPlc.get_true_z_stack_stage_speed(stage_speed)
+        #scan starts once z-stage gets to the start position
+        self.scan_start_time = max(self.clock.time(), self._busy_until[2])
+        self.scan_speed = speed
+        self._move_axis(2, self._scan_end, speed)
+        return speed
+
+    def halt(self):
+        self._busy("halt")
+        self._busy_until = [self.clock.time()]*3
+
+    def get_x_position(self):
+        self._busy("get_x_position")
+        return self.position[0]
+
+    def get_y_position(self):
+        self._busy("get_y_position")
+        return self.position[1]
+
+    def get_z_position(self):
+        self._busy("get_z_position")
+        return self.position[2]
+
+    def reset_joystick(self):
+        self._busy("reset_joystick", 2*SimDevice.COMMAND_TIME_S)
+
+
+class SimCamera(SimDevice):
+    DEFAULT_EXPOSURE = 20
+    MAX_EXPOSURE = 2000
+    MIN_EXPOSURE = .010
+    DEFAULT_BINNING = 1
+    DETECTION_BINNING = 2
+    DETECTION_EXPOSURE = 10
+    LSRM_MAX_FRAMERATE = 49
+    #sensor of the Orca Flash 4 with the 10x objective, so image sizes match the real setup
+    SENSOR_WIDTH = 2048
+    SENSOR_HEIGHT = 2048
+    BYTES_PER_PIXEL = 2
+    SENSOR_PIXEL_SIZE_UM = 0.65
+    #time to change camera mode/settings that require the camera to re-initialize
+    _MODE_CHANGE_TIME_S = 0.1
+    _READOUT_TIME_S = 0.01
+
+    def __init__(self, clock = time):
+        super().__init__(clock)
+        self.exposure = SimCamera.DEFAULT_EXPOSURE
+        self.binning = SimCamera.DEFAULT_BINNING
+        self.sequence_start_time: float = None
+        self.sequence_num_frames = 0
+
+    def set_exposure(self, exposure: float):
+        self._busy("set_exposure")
+        self.exposure = exposure
+
+    def set_binning(self, binning: int):
+        self._busy("set_binning", SimCamera._MODE_CHANGE_TIME_S)
+        self.binning = binning
+
+    def set_property(self, property_name: str, value):
+        self._busy("set_property")
+
+    def set_burst_mode(self):
+        self._busy("set_burst_mode", SimCamera._MODE_CHANGE_TIME_S)
+
+    def set_ext_trig_mode(self):
+        self._busy("set_ext_trig_mode", SimCamera._MODE_CHANGE_TIME_S)
+
+    def set_edge_trigger_mode(self):
+        self._busy("set_edge_trigger_mode", SimCamera._MODE_CHANGE_TIME_S)
+
+    def set_sync_readout_mode(self):
+        self._busy("set_sync_readout_mode", SimCamera._MODE_CHANGE_TIME_S)
+
+    def set_lsrm_mode(self, ili: float, num_lines: int):
+        self._busy("set_lsrm_mode", SimCamera._MODE_CHANGE_TIME_S)
+
+    def wait_for_camera(self):
+        self._busy("wait_for_camera")
+
+    def snap_image(self):
+        self._busy("snap_image", self.exposure/1000 + SimCamera._READOUT_TIME_S)
+
+    def start_sequence_acquisition(self, num_frames: int):
+        self._busy("start_sequence_acquisition")
+        self.sequence_start_time = self.clock.time()
+        self.sequence_num_frames = num_frames
+
+    def get_frame_interval_s(self) -> float:
+        """
+        time between images when camera isn't externally triggered.
+        """
+        return self.exposure/1000 + SimCamera._READOUT_TIME_S
+
+    def stop_live_acquisition(self):
+        self._busy("stop_live_acquisition")
+
+    def start_live_acquisition(self):
+        self._busy("start_live_acquisition")
+
+
+class SimPlc(SimDevice):
+    _CLOCK_TICKS_PER_MS = 4
+    #number of cells set when PLC is initialized, each of which takes several commands.
+    _NUM_CELLS = 7
+    _COMMANDS_PER_CELL = 5
+
+    def __init__(self, clock = time):
+        super().__init__(clock)
+        self.step_size = 1
+
+    def init_pulse_mode(self):
+        self._busy("init_pulse_mode", SimPlc._NUM_CELLS*SimPlc._COMMANDS_PER_CELL*SimDevice.COMMAND_TIME_S)
+
+    def set_for_z_stack(self, step_size: int, stage_scan_speed: float):
+        self._busy("set_for_z_stack", 2*SimDevice.COMMAND_TIME_S)
+        self.step_size = step_size
+
+    def set_continuous_pulses(self, frequency: int):
+        self._busy("set_continuous_pulses", 2*SimDevice.COMMAND_TIME_S)
+
+    @classmethod
+    def get_true_z_stack_stage_speed(cls, z_scan_speed: float):
+        #same calculation as Plc.get_true_z_stack_stage_speed()
+        frame_interval = math.ceil((1/(z_scan_speed/1000))*cls._CLOCK_TICKS_PER_MS)/cls._CLOCK_TICKS_PER_MS
+        return round(1/frame_interval*1000, 3)
+
+
+class SimGalvo(SimDevice):
+    DECON_MODE_SHIFT = .01
+    _TASK_RESET_TIME_S = 0.05
+
+    def __init__(self, clock = time, settings = None):
+        super().__init__(clock)
+        self.settings = settings
+
+    def set_dslm_mode(self):
+        self._busy("set_dslm_mode", SimGalvo._TASK_RESET_TIME_S)
+
+    def set_lsrm_mode(self):
+        self._busy("set_lsrm_mode", SimGalvo._TASK_RESET_TIME_S)
+
+    def exit(self):
+        self._busy("exit", SimGalvo._TASK_RESET_TIME_S)
+
+
+class SimPump(SimDevice):
+    DEFAULT_SPEED = 2
+    DETECTION_VELOCITY = 4
+    FILL_VELOCITY = 200
+    MIN_POSITION = 300
+    MAX_POSITION = 2900
+    FILL_PORT = "E"
+    ACQ_PORT = "O"
+
+    def __init__(self, clock = time):
+        super().__init__(clock)
+        self.position = 0
+        self.port = SimPump.FILL_PORT
+
+    def get_position(self):
+        self._busy("get_position")
+        return self.position
+
+    def is_empty(self):
+        return self.get_position() <= SimPump.MIN_POSITION
+
+    def is_full(self):
+        return self.get_position() >= SimPump.MAX_POSITION
+
+    def fill(self, stop_event = None):
+        self._busy("fill", (SimPump.MAX_POSITION - self.position)/SimPump.FILL_VELOCITY)
+        self.position = SimPump.MAX_POSITION
+
+    def set_port(self, port):
+        self._busy("set_port")
+        self.port = getattr(port, "name", port)
+
+    def set_speed(self, speed: int):
+        self._busy("set_speed")
+
+    def set_velocity(self, velocity: int):
+        self._busy("set_velocity")
+
+    def set_zero(self):
+        self._busy("set_zero")
+
+    def terminate(self):
+        self._busy("terminate")
+
+
+class SimValves(SimDevice):
+    def __init__(self, clock = time):
+        super().__init__(clock)
+        self.are_open = False
+
+    def open(self):
+        self._busy("open")
+        self.are_open = True
+
+    def close(self):
+        self._busy("close")
+        self.are_open = False
+
+    def get_status(self):
+        return self.are_open
+
+
+class SimCore():
+    """
+    Stand-in for the parts of the Micro-Manager core that the imaging sequences use while collecting
+    images from a sequence acquisition. Images arrive in the buffer when they would on the real setup.
+    If a stage scan was started after the sequence, the camera is being triggered by the PLC, so an image
+    comes in every time the stage passes a step. Otherwise, an image comes in every frame interval of
+    the camera.
+
+    ## Constructor parameters:
+
+    #### camera : SimCamera
+
+    #### stage : SimStage
+
+    #### plc : SimPlc
+
+    #### clock
+        object with time() and sleep() methods. Should be the same clock the devices use.
+
+    It also has the image size and channel config methods of the core, with image size taken from the
+    camera and channels from configs, so settings can be made with it instead of Micro-Manager (see
+    pycro.simulated()).
+    """
+    #same names as pycro.BF_CHANNEL and pycro.GFP_CHANNEL
+    CHANNELS = ["BF", "GFP"]
+
+    def __init__(self, camera: SimCamera, stage: SimStage, plc: SimPlc, clock = time):
+        self.clock = clock
+        #config group -> presets, like the config groups in Micro-Manager
+        self.configs = {"Channel": list(SimCore.CHANNELS)}
+        self._camera = camera
+        self._stage = stage
+        self._plc = plc
+        self._sequence_start_time = None
+        self._num_popped = 0
+        self._num_cleared = 0
+        self._stop_time = None
+
+    def get_remaining_image_count(self) -> int:
+        self._check_new_sequence()
+        return self._get_num_arrived() - self._num_popped - self._num_cleared
+
+    def is_sequence_running(self) -> bool:
+        self._check_new_sequence()
+        return self._stop_time is None and self._get_num_arrived() < self._camera.sequence_num_frames
+
+    def pop_next_image(self):
+        self._num_popped += 1
+
+    def sleep(self, ms: float):
+        self.clock.sleep(ms/1000)
+
+    def stop_sequence_acquisition(self):
+        self._check_new_sequence()
+        if self._stop_time is None:
+            self._stop_time = self.clock.time()
+
+    def clear_circular_buffer(self):
+        self._num_cleared = self._get_num_arrived() - self._num_popped
+
+    def get_image_width(self) -> int:
+        return self._camera.SENSOR_WIDTH//self._camera.binning
+
+    def get_image_height(self) -> int:
+        return self._camera.SENSOR_HEIGHT//self._camera.binning
+
+    def get_bytes_per_pixel(self) -> int:
+        return self._camera.BYTES_PER_PIXEL
+
+    def get_pixel_size_um(self) -> float:
+        return self._camera.SENSOR_PIXEL_SIZE_UM*self._camera.binning
+
+    def get_available_configs(self, group: str) -> "_SimStrVector":
+        return _SimStrVector(self.configs.get(group, []))
+
+    def _check_new_sequence(self):
+        if self._camera.sequence_start_time != self._sequence_start_time:
+            self._sequence_start_time = self._camera.sequence_start_time
+            self._num_popped = 0
+            self._num_cleared = 0
+            self._stop_time = None
+
+    def _get_num_arrived(self) -> int:
+        if self._sequence_start_time is None:
+            return 0
+        scan_start_time = self._stage.scan_start_time
+        if scan_start_time is not None and scan_start_time >= self._sequence_start_time:
+            first_frame_time = scan_start_time
+            frame_interval = self._plc.step_size/self._stage.scan_speed
+        else:
+            first_frame_time = self._sequence_start_time
+            frame_interval = self._camera.get_frame_interval_s()
+        end_time = self.clock.time() if self._stop_time is None else self._stop_time
+        num_arrived = int(max(0, end_time - first_frame_time)/frame_interval)
+        return min(num_arrived, self._camera.sequence_num_frames)
+
+
+class _SimStrVector():
+    """
+    Stand-in for the StrVector the core returns, which only has size() and get().
+    """
+    def __init__(self, strings: list[str]):
+        self._strings = list(strings)
+
+    def size(self) -> int:
+        return len(self._strings)
+
+    def get(self, i: int) -> str:
+        return self._strings[i]
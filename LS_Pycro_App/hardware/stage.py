@@ -6,7 +6,7 @@ from LS_Pycro_App.hardware import Plc
 from LS_Pycro_App.hardware.exceptions_handle import handle_exception
 from LS_Pycro_App.utils import constants
 from LS_Pycro_App.utils.abc_attributes_wrapper import abstractattributes
-from LS_Pycro_App.utils.pycro import core
+from LS_Pycro_App.utils.pycro import core, CoreDeviceName
 
 @abstractattributes
 class Stage(ABC):
@@ -58,8 +58,8 @@ class Stage(ABC):
         pass
     
     _logger = logging.getLogger(__name__)
-    XY_STAGE_NAME : str = core.get_xy_stage_device()
-    Z_STAGE_NAME : str = core.get_focus_device()
+    XY_STAGE_NAME : str = CoreDeviceName("get_xy_stage_device")
+    Z_STAGE_NAME : str = CoreDeviceName("get_focus_device")
 
     _HALT_COMMAND = "HALT"
     _SERIAL : str = "SerialCommand"
@@ -1,12 +1,13 @@
-import serial
+from LS_Pycro_App.hardware.serial_transport import SerialTransport
 
 _COM_PORT = "COM16"
 _END = "\n"
+_TERMINATOR = b"\n"
 
 
 def init():
     global com, are_open
-    com = serial.Serial(_COM_PORT, timeout=0.3)
+    com = SerialTransport(_COM_PORT, _TERMINATOR)
     are_open = True
     open()
     pass
@@ -30,4 +31,5 @@ def get_status():
 
 
 def write_command(command: str):
-    com.write(f"{command}{_END}".encode())
+    #valve controller doesn't respond to commands, so this only waits for the command to be written.
+    com.send(f"{command}{_END}".encode(), expect_response=False)
@@ -5,6 +5,17 @@ class AcqDirectory(object):
     Class to create and update directory for acquisition. As the acquisition progresses, fish, region, acq_type,
     and time_point are updated. Finally, in the imaging sequences, get_directory() is called to get the updated
     directory as a string to be passed to a datastore.
+
+    journal is the AcquisitionJournal of the acquisition (see acquisition.journal), or None if the acquisition
+    doesn't keep one.
+
+    storage is the StorageManager of the acquisition (see acquisition.storage), which changes root to the
+    volume each region is saved on, or None if everything is saved in root.
+
+    post_processor is the PostProcessor (see acquisition.post_processing) that finished datastores are
+    submitted to, or None if post-processing is disabled.
+
+    sub_directory is a directory in root that everything is saved in instead, like "end_videos".
     """
     FOLDER_NAME = "Acquisition"
     _FISH = "fish"
@@ -18,17 +29,37 @@ class AcqDirectory(object):
         self._region = "pos1"
         self._acq_type = "acq_type"
         self._time_point = "timepoint1"
+        self.fish_num = 0
+        self.region_num = 0
+        self.time_point = 0
+        self.journal = None
+        self.storage = None
+        self.post_processor = None
+        self.sub_directory = ""
+
+    @classmethod
+    def from_root(cls, root: str) -> "AcqDirectory":
+        """
+        Returns AcqDirectory with root set to root as is, instead of a new unique directory. Used to
+        resume an acquisition in its original directory.
+        """
+        acq_directory = cls(root)
+        acq_directory.root = root
+        return acq_directory
 
     def set_fish_num(self, fish_num: int):
+        self.fish_num = fish_num
         self._fish = f"{self._FISH}{fish_num + 1}"
 
     def set_region_num(self, region_num: int):
+        self.region_num = region_num
         self._region = f"{self._REGION}{region_num + 1}"
 
     def set_acq_type(self, acq_type: str):
         self._acq_type = acq_type
 
     def set_time_point(self, time_point: int):
+        self.time_point = time_point
         self._time_point = f"{self._TIME_POINT}{time_point + 1}"
 
     def set_root(self, new_root: str):
@@ -37,6 +68,26 @@ class AcqDirectory(object):
     def get_file_name(self) -> str:
         return f"{self._fish}/{self._region}/{self._acq_type}/{self._time_point}".replace("/", "_")
 
+    def get_region_key(self) -> str:
+        """
+        Returns get_region_directory() relative to root.
+        """
+        return f"{self._get_sub_directory()}{self._fish}/{self._region}/{self._time_point}"
+
+    def get_region_directory(self) -> str:
+        """
+        Returns directory that holds everything of current region. Directories of a region are split up by
+        acq_type, so this doesn't actually exist. It's only used to identify the region and time point.
+        """
+        return f"{self.root}/{self.get_region_key()}"
+
     def get_directory(self) -> str:
-        return f"{self.root}/{self._fish}/{self._region}/{self._acq_type}/{self._time_point}/{self.get_file_name()}"
+        """
+        Returns directory the datastore of the current sequence is saved in. Micro-Manager names files after
+        their directory, so it's named get_file_name() and replaces the time point directory.
+        """
+        return f"{self.root}/{self._get_sub_directory()}{self._fish}/{self._region}/{self._acq_type}/{self.get_file_name()}"
+
+    def _get_sub_directory(self) -> str:
+        return f"{self.sub_directory}/" if self.sub_directory else ""
     
\ No newline at end of file
@@ -17,6 +17,7 @@ Future Changes:
   
 - consider using dataclass decorator for these. Would make it much prettier and field methods could be useful.
 """
+import logging
 import numpy as np
 import re
 from copy import deepcopy
@@ -24,8 +25,18 @@ from enum import Enum
 
 import LS_Pycro_App.hardware.camera
 from LS_Pycro_App.hardware import Camera
-from LS_Pycro_App.utils import constants, user_config, pycro, general_functions
-from LS_Pycro_App.utils.pycro import core
+from LS_Pycro_App.models.region_table import RegionTable
+from LS_Pycro_App.utils import constants, user_config, user_store, pycro, general_functions, settings_store
+from LS_Pycro_App.utils.pycro import camera_geometry
+
+
+#incremented whenever a region is created or changed, so cached RegionTables know to rebuild.
+_plan_revision = 0
+
+
+def _mark_plan_changed():
+    global _plan_revision
+    _plan_revision += 1
 
 
 class Region():
@@ -82,6 +93,13 @@ class Region():
     #### num_images : int
         number of images to be acquired at this region. set by update_num_images().
     """
+    STORE_SCHEMA = {"x_pos": int, "y_pos": int, "z_pos": int, 
+                    "z_stack_enabled": bool, "z_stack_start_pos": int, "z_stack_end_pos": int, 
+                    "z_stack_step_size": int, "z_stack_channel_list": list, 
+                    "snap_enabled": bool, "snap_exposure": float, "snap_channel_list": list, 
+                    "video_enabled": bool, "video_num_frames": int, "video_exposure": float, 
+                    "video_channel_list": list}
+
     #default values don't matter much. Exposures are set to 20 ms, which is what I generally use.
     _x_pos: int = 0
     _y_pos: int = 0
@@ -107,16 +125,17 @@ class Region():
         self._z_stack_start_pos: int = Region._z_stack_start_pos
         self._z_stack_end_pos: int = Region._z_stack_end_pos
         self._z_stack_step_size: int = Region._z_stack_step_size
-        self._z_stack_channel_list: list[str] = deepcopy(Region._z_stack_channel_list)
+        self._z_stack_channel_list: list[str] = list(Region._z_stack_channel_list)
         self._snap_enabled: bool = Region._snap_enabled
         self._snap_exposure: float = Region._snap_exposure
-        self._snap_channel_list: list[str] = deepcopy(Region._snap_channel_list)
+        self._snap_channel_list: list[str] = list(Region._snap_channel_list)
         self._video_enabled: bool = Region._video_enabled
         self._video_num_frames: int = Region._video_num_frames
         self._video_exposure: float = Region._video_exposure
-        self._video_channel_list: list[str] = deepcopy(Region._video_channel_list)
+        self._video_channel_list: list[str] = list(Region._video_channel_list)
+        _mark_plan_changed()
 
-    #This setter pattern is used to store default values for created Region objects. 
+    #Setters mark the plan as changed so cached RegionTables are rebuilt. See AcqSettings.region_table.
     @property
     def x_pos(self):
         return self._x_pos
@@ -124,7 +143,7 @@ class Region():
     @x_pos.setter
     def x_pos(self, value):
         self._x_pos = value
-        Region._x_pos = value
+        _mark_plan_changed()
 
     @property
     def y_pos(self):
@@ -133,7 +152,7 @@ class Region():
     @y_pos.setter
     def y_pos(self, value):
         self._y_pos = value
-        Region._y_pos = value
+        _mark_plan_changed()
 
     @property
     def z_pos(self):
@@ -142,7 +161,7 @@ class Region():
     @z_pos.setter
     def z_pos(self, value):
         self._z_pos = value
-        Region._z_pos = value
+        _mark_plan_changed()
 
     @property
     def z_stack_enabled(self):
@@ -151,7 +170,7 @@ class Region():
     @z_stack_enabled.setter
     def z_stack_enabled(self, value):
         self._z_stack_enabled = value
-        Region._z_stack_enabled = value
+        _mark_plan_changed()
 
     @property
     def z_stack_start_pos(self):
@@ -160,7 +179,7 @@ class Region():
     @z_stack_start_pos.setter
     def z_stack_start_pos(self, value):
         self._z_stack_start_pos = value
-        Region._z_stack_start_pos = value
+        _mark_plan_changed()
 
     @property
     def z_stack_end_pos(self):
@@ -169,7 +188,7 @@ class Region():
     @z_stack_end_pos.setter
     def z_stack_end_pos(self, value):
         self._z_stack_end_pos = value
-        Region._z_stack_end_pos = value
+        _mark_plan_changed()
 
     @property
     def z_stack_step_size(self):
@@ -178,7 +197,7 @@ class Region():
     @z_stack_step_size.setter
     def z_stack_step_size(self, value):
         self._z_stack_step_size = value
-        Region._z_stack_step_size = value
+        _mark_plan_changed()
 
     @property
     def z_stack_channel_list(self):
@@ -188,7 +207,7 @@ class Region():
     @z_stack_channel_list.setter
     def z_stack_channel_list(self, value):
         self._z_stack_channel_list = value
-        Region._z_stack_channel_list = value
+        _mark_plan_changed()
 
     @property
     def snap_enabled(self):
@@ -197,7 +216,7 @@ class Region():
     @snap_enabled.setter
     def snap_enabled(self, value):
         self._snap_enabled = value
-        Region._snap_enabled = value
+        _mark_plan_changed()
 
     @property
     def snap_exposure(self):
@@ -207,7 +226,7 @@ class Region():
     def snap_exposure(self, value):
         value = general_functions.value_in_range(value, Camera.MIN_EXPOSURE, Camera.MAX_EXPOSURE)
         self._snap_exposure = value
-        Region._snap_exposure = value
+        _mark_plan_changed()
 
     @property
     def snap_channel_list(self):
@@ -217,7 +236,7 @@ class Region():
     @snap_channel_list.setter
     def snap_channel_list(self, value):
         self._snap_channel_list = value
-        Region._snap_channel_list = value
+        _mark_plan_changed()
 
     @property
     def video_enabled(self):
@@ -226,7 +245,7 @@ class Region():
     @video_enabled.setter
     def video_enabled(self, value):
         self._video_enabled = value
-        Region._video_enabled = value
+        _mark_plan_changed()
 
     @property
     def video_num_frames(self):
@@ -235,7 +254,7 @@ class Region():
     @video_num_frames.setter
     def video_num_frames(self, value):
         self._video_num_frames = value
-        Region._video_num_frames = value
+        _mark_plan_changed()
 
     @property
     def video_exposure(self):
@@ -245,7 +264,7 @@ class Region():
     def video_exposure(self, value):
         value = general_functions.value_in_range(value, Camera.MIN_EXPOSURE, Camera.MAX_EXPOSURE)
         self._video_exposure = value
-        Region._video_exposure = value
+        _mark_plan_changed()
 
     @property
     def video_channel_list(self):
@@ -255,12 +274,11 @@ class Region():
     @video_channel_list.setter
     def video_channel_list(self, value):
         self._video_channel_list = value
-        Region._video_channel_list = value
+        _mark_plan_changed()
 
     @property
     def size_mb(self):
-        image_size = core.get_image_width()*core.get_image_height()*core.get_bytes_per_pixel()*constants.B_TO_MB
-        return image_size*self.num_images
+        return camera_geometry.image_size_mb*self.num_images
 
     @property
     def num_images(self):
@@ -284,12 +302,10 @@ class Region():
     def imaging_enabled(self):
         return self.snap_enabled or self.video_enabled or self.z_stack_enabled
     
-    #config api methods
-    def init_from_config(self, fish_num: int, region_num: int) -> bool:
+    #legacy config methods. Regions are saved as part of their Fish in the settings store, so this is only
+    #used to move regions from old config files.
+    def init_from_legacy_config(self, fish_num: int, region_num: int) -> bool:
         return user_config.init_class(self, Region.config_section(fish_num, region_num))
-    
-    def write_to_config(self, fish_num, region_num):
-        user_config.write_class(self, Region.config_section(fish_num, region_num))
 
     def config_section(fish_num, region_num):
         if isinstance(fish_num, int):
@@ -334,8 +350,12 @@ class Fish():
 
     #### append_blank_region()
         appends new instance of Region to region_list
+
+    #### copy_notes() -> Fish
+        returns new Fish with the same notes and no regions.
     """
     NOT_CONFIG_PROPS = ["region_list"]
+    STORE_SCHEMA = {"fish_type": str, "age": str, "treatment": str, "add_notes": str}
 
     _fish_type: str = ""
     _age: str = ""
@@ -362,7 +382,6 @@ class Fish():
     @fish_type.setter
     def fish_type(self, value):
         self._fish_type = value
-        Fish._fish_type = value
     
     @property
     def age(self):
@@ -371,7 +390,6 @@ class Fish():
     @age.setter
     def age(self, value):
         self._age = value
-        Fish._age = value
 
     @property
     def treatment(self):
@@ -380,7 +398,6 @@ class Fish():
     @treatment.setter
     def treatment(self, value):
         self._treatment = value
-        Fish._treatment= value
 
     @property
     def add_notes(self):
@@ -389,16 +406,12 @@ class Fish():
     @add_notes.setter
     def add_notes(self, value):
         self._add_notes = value
-        Fish._add_notes= value
 
     @property
     def num_images(self):
-        fish_num_images = 0
-        for region in self.region_list:
-            region.num_images
-            fish_num_images += region.num_images
-        self._num_images = fish_num_images
-        return fish_num_images
+        #a RegionTable isn't worth building for a single fish
+        self._num_images = sum(region.num_images for region in self.region_list)
+        return self._num_images
     
     @property
     def imaging_enabled(self):
@@ -410,12 +423,24 @@ class Fish():
 
     @property
     def size_mb(self):
-        image_size = core.get_image_width()*core.get_image_height()*core.get_bytes_per_pixel()*constants.B_TO_MB
-        return image_size*self.num_images
+        return camera_geometry.image_size_mb*self.num_images
+
+    def copy_notes(self) -> "Fish":
+        """
+        Returns new Fish with the same notes and no regions. Used by the GUI so a new fish starts 
+        with the notes of the one before it.
+        """
+        fish = Fish()
+        fish.fish_type, fish.age, fish.treatment, fish.add_notes = self.fish_type, self.age, self.treatment, self.add_notes
+        return fish
 
     #region_list methods
     def append_blank_region(self) -> Region:
-        region = Region()
+        """
+        Appends region with the same settings as the last region in region_list (or default settings if
+        there isn't one), and returns it.
+        """
+        region = deepcopy(self.region_list[-1]) if self.region_list else Region()
         self.region_list.append(region)
         return region
     
@@ -430,28 +455,49 @@ class Fish():
 
     #config api methods
     def init_from_config(self, fish_num: int) -> bool:
-        initialized = user_config.init_class(self, Fish.config_section(fish_num))
-        if initialized:
-            self._init_regions_from_config(fish_num)
-        return initialized
+        data = user_store.get_fish(Fish.store_key(fish_num))
+        if data is None:
+            return False
+        #same as a file that can't be read, fish is skipped instead of stopping the app from starting
+        try:
+            fish_data, regions_data = data["fish"], list(data["regions"])
+        except (KeyError, TypeError):
+            logging.getLogger(self.__class__.__name__).warning(f"fish {Fish.store_key(fish_num)} is missing fish or regions, skipped")
+            return False
+        settings_store.decode(self, fish_data)
+        self.region_list = []
+        for region_data in regions_data:
+            region = Region()
+            settings_store.decode(region, region_data)
+            self.region_list.append(region)
+        return True
 
     def write_to_config(self, fish_num: int):
-        user_config.write_class(self, Fish.config_section(fish_num))
-        self._write_regions_to_config(fish_num)
+        data = {"fish": settings_store.encode(self), 
+                "regions": [settings_store.encode(region) for region in self.region_list]}
+        user_store.set_fish(Fish.store_key(fish_num), data)
 
-    def _init_regions_from_config(self, fish_num: int):
-        region_num = 0
-        while True:
-            region = Region()
-            if region.init_from_config(fish_num, region_num):
-                self.region_list.append(region)
-            else:
-                break
-            region_num += 1 
+    def init_from_legacy_config(self, fish_num: int) -> bool:
+        """
+        Initializes fish and its regions from old config file sections.
+        """
+        initialized = user_config.init_class(self, Fish.config_section(fish_num))
+        if initialized:
+            region_num = 0
+            while True:
+                region = Region()
+                if region.init_from_legacy_config(fish_num, region_num):
+                    self.region_list.append(region)
+                else:
+                    break
+                region_num += 1 
+        return initialized
 
-    def _write_regions_to_config(self, fish_num: int):
-        for region_num, region in enumerate(self.region_list):
-            region.write_to_config(fish_num, region_num)
+    def store_key(fish_num: int):
+        if isinstance(fish_num, str):
+            return fish_num
+        else:
+            return str(fish_num + 1)
 
     def config_section(fish_num: int):
         if isinstance(fish_num, str):
@@ -460,10 +506,54 @@ class Fish():
             return f"Fish {fish_num + 1} Notes"
 
 
+#Patterns of config sections written by Fish and Region instances. Compiled once since every section 
+#in the config is checked against them whenever the fish list is written.
+_FISH_SECTION_PATTERN = re.compile(Fish.config_section("[0-9]+"))
+_REGION_SECTION_PATTERN = re.compile(Region.config_section("[0-9]+", "[0-9]+"))
+
+
+def _remove_sections(*patterns: re.Pattern):
+    """
+    Removes all sections in user_config that fully match any of patterns.
+    """
+    user_store.remove_legacy_sections(
+        *[section for section in user_config.sections() if any(pattern.fullmatch(section) for pattern in patterns)])
+
+
+class AcqOrder(Enum):
+    """
+    Enum class to select acquisition order.
+    
+    ## enums:
+
+    #### TIME_SAMP
+        time_point is iterated in the outermost loop. the default acquisition order. For each time point, 
+        each sample is imaged in sequence before moving to the next time point.
+
+    #### SAMP_TIME
+        sample is iterated in outermost loop. This causes a full time series to be performed at each sample before 
+        moving to the next.
+
+    #### POS_TIME
+        position is iterated in outermost. This causes a full time series to be performed at each region before moving
+        to the next.
+
+    #### INTERLEAVED
+        each sample has its own time series like SAMP_TIME, but other samples are imaged while a sample waits for
+        its next time point.
+    """
+    TIME_SAMP = 1
+    SAMP_TIME = 2
+    POS_TIME = 3
+    INTERLEAVED = 4
+
+
 class AdvSettings():
     """
-    General idea of this class is to hold acquisition properties that the average user shouldn't have to worry about
-    and that should be reset between sessions so that the average user isn't plagued by unexpected behavior.
+    General idea of this class is to hold acquisition properties that the average user shouldn't have to worry about.
+    These used to be reset between sessions, but storage directories and post-processing are set up once per
+    machine, and headless acquisitions need the settings they were set up with, so they're saved and read like
+    AcqSettings now.
 
     ## Instance Attributes:
 
@@ -503,7 +593,39 @@ class AdvSettings():
     #### backup_directory : str
         Second save path to be changed to if directory in AcquisitionSettings gets low during an acquisition. 
         Will only be used if backup_directory_enabled is True.
+
+    #### storage_directories : list[str]
+        More save paths after backup_directory, for acquisitions that don't fit on two disks. These are
+        always used (backup_directory_enabled only affects backup_directory), and count as full at
+        backup_directory_limit like the others. See acquisition.storage.
+
+    #### storage_striping_enabled : bool
+        If True, regions are spread across every save path instead of filling them in order.
+
+    #### post_processing_enabled : bool
+        If True, post_processing_jobs are run on every datastore in the background during the acquisition.
+        See acquisition.post_processing.
+
+    #### post_processing_jobs : list[str]
+        post-processing jobs. Any of "mip", "preview", "checksum", and "qc".
+
+    #### post_processing_num_workers : int
+        number of processes post-processing is run in.
+
+    #### post_processing_io_mb_per_s : float
+        total rate post-processing reads datastores at, so it doesn't slow down the acquisition writing them.
     """
+    STORE_SCHEMA = {"z_stack_exposure": float, "end_videos_exposure": float, "spectral_z_stack_enabled": bool, 
+                    "decon_z_stack_enabled": bool, "z_stack_stage_speed": int, "spectral_video_enabled": bool, 
+                    "edge_trigger_enabled": bool, "acq_order": AcqOrder, "backup_directory_enabled": bool, 
+                    "backup_directory_limit": float, "backup_directory": str, "end_videos_enabled": bool, 
+                    "end_videos_num_frames": int, "storage_directories": list, "storage_striping_enabled": bool,
+                    "post_processing_enabled": bool, "post_processing_jobs": list, "post_processing_num_workers": int,
+                    "post_processing_io_mb_per_s": float}
+    #old config files have AdvSettings (it was written as part of acquisition notes), but enums can't be read
+    #back from them and speed_list depends on the camera.
+    NOT_CONFIG_PROPS = ["acq_order", "speed_list"]
+
     def __init__(self):
         self._z_stack_exposure: float = 33.
         self._end_videos_exposure = 20.
@@ -517,6 +639,12 @@ class AdvSettings():
         self.backup_directory_enabled: bool = False
         self.backup_directory_limit: float = 0.9
         self.backup_directory: str = "D:/"
+        self.storage_directories: list[str] = []
+        self.storage_striping_enabled: bool = False
+        self.post_processing_enabled: bool = False
+        self.post_processing_jobs: list[str] = ["mip", "preview", "checksum", "qc"]
+        self.post_processing_num_workers: int = 2
+        self.post_processing_io_mb_per_s: float = 100.
         self.end_videos_enabled: bool = False
         self.end_videos_num_frames: int = 100
     
@@ -544,8 +672,11 @@ class AdvSettings():
             self.speed_list.append(60)
         return self.speed_list
             
+    def init_from_config(self) -> bool:
+        return user_store.init_class(self)
+
     def write_to_config(self):
-        user_config.write_class(self)
+        user_store.write_class(self)
 
     def _get_z_stack_exposure(self, value):
         if issubclass(Camera, LS_Pycro_App.hardware.camera.Hamamatsu):
@@ -568,29 +699,6 @@ class AdvSettings():
                 return general_functions.value_in_range(value, Camera.MIN_EXPOSURE, Camera.MAX_EXPOSURE)
 
 
-class AcqOrder(Enum):
-    """
-    Enum class to select acquisition order.
-    
-    ## enums:
-
-    #### TIME_SAMP
-        time_point is iterated in the outermost loop. the default acquisition order. For each time point, 
-        each sample is imaged in sequence before moving to the next time point.
-
-    #### SAMP_TIME
-        sample is iterated in outermost loop. This causes a full time series to be performed at each sample before 
-        moving to the next.
-
-    #### POS_TIME
-        position is iterated in outermost. This causes a full time series to be performed at each region before moving
-        to the next.
-    """
-    TIME_SAMP = 1
-    SAMP_TIME = 2
-    POS_TIME = 3
-
-
 class AcqSettings():
     """
     Data class that stores properties that apply to the entire image acquisition. Also includes list that holds Fish
@@ -647,9 +755,12 @@ class AcqSettings():
     #### append_blank_fish()
         Appends new Fish() object to self.fish_list
     """
-    NOT_CONFIG_PROPS = ["fish_list", "adv_settings"]
-    core_channel_list: list[str] = pycro.get_channel_list()
-    _channel_order_list: list[str] = deepcopy(core_channel_list)
+    NOT_CONFIG_PROPS = ["fish_list", "adv_settings", "region_table", "region_table_key"]
+    STORE_SCHEMA = {"time_points_enabled": bool, "time_points_interval_sec": int, "directory": str, 
+                    "researcher": str, "num_time_points": int, "channel_order_list": list}
+    #set from the core by init_channel_order_list(), so that importing this doesn't connect to Micro-Manager
+    core_channel_list: list[str] = []
+    _channel_order_list: list[str] = []
 
     def __init__(self):
         self.adv_settings: AdvSettings = AdvSettings()
@@ -659,6 +770,8 @@ class AcqSettings():
         self.directory: str = "C:/"
         self.researcher: str = ""
         self._num_time_points: int = 1
+        self._region_table: RegionTable = None
+        self._region_table_key: tuple = None
         self.init_from_config()
 
     @property
@@ -694,57 +807,50 @@ class AcqSettings():
 
     @property
     def image_width(self):
-        return core.get_image_width()
+        return camera_geometry.width
     
     @property
     def image_height(self):
-        return core.get_image_height()
+        return camera_geometry.height
 
     @property
     def bytes_per_pixel(self):
-        return core.get_bytes_per_pixel()
+        return camera_geometry.bytes_per_pixel
 
     @property
     def image_size_mb(self):
-        return self.image_width*self.image_height*self.bytes_per_pixel*constants.B_TO_MB
+        return camera_geometry.image_size_mb
     
+    @property
+    def region_table(self) -> RegionTable:
+        """
+        RegionTable of fish_list. Cached, and only built again when a region has been created or changed,
+        fish or regions have been added, removed, or reordered, or channel_order_list has changed. The 
+        returned table is shared, so it shouldn't be changed (use RegionTable.copy() for that).
+        """
+        key = (_plan_revision, tuple(self.channel_order_list), 
+               tuple((id(fish), *map(id, fish.region_list)) for fish in self.fish_list))
+        if key != self._region_table_key:
+            self._region_table = RegionTable.from_fish_list(self.fish_list, self.channel_order_list)
+            self._region_table_key = key
+        return self._region_table
+
     @property
     def images_per_time_point(self):
-        images_per_time_point = 0
-        for fish in self.fish_list:
-            images_per_time_point += fish.num_images
-        self._images_per_time_point = images_per_time_point
-        return images_per_time_point
+        self._images_per_time_point = self.region_table.total_num_images
+        return self._images_per_time_point
     
     @property
     def total_num_images(self):
-        if self.time_points_enabled:
-            self._total_num_images = self.images_per_time_point*self.num_time_points
-        else:
-            self._total_num_images = self.images_per_time_point
-        if self.adv_settings.end_videos_enabled:
-            self._total_num_images += self._end_videos_total_num_frames
-        return self._total_num_images
+        return self._get_total_num_images(self.region_table)
     
     @property
     def end_videos_total_num_frames(self):
-        if not self.adv_settings.end_videos_enabled:
-            self._end_videos_total_num_frames = 0
-        elif self.adv_settings.acq_order == AcqOrder.TIME_SAMP or self.adv_settings.acq_order == AcqOrder.SAMP_TIME:
-            num_fish = len([f for f in self.fish_list if f.imaging_enabled])
-            self._end_videos_total_num_frames = num_fish*self.adv_settings.end_videos_num_frames
-        elif self.adv_settings.acq_order == AcqOrder.POS_TIME:
-            num_regions = len([r for f in self.fish_list for r in f.region_list if r.imaging_enabled()])
-            self._end_videos_total_num_frames = num_regions*self.adv_settings.end_videos_num_frames
-        return self._end_videos_total_num_frames
+        return self._get_end_videos_total_num_frames(self.region_table)
     
     @property
     def imaging_enabled(self):
-        for fish in self.fish_list:
-            if fish.imaging_enabled:
-                return True
-        else:
-            return False
+        return bool(self.region_table.imaging_enabled.any())
     
     @property
     def size_mb(self):
@@ -767,30 +873,24 @@ class AcqSettings():
 
     #misc api methods
     def is_step_size_same(self):
-        step_size = self.get_first_step_size()
-        for fish in self.fish_list:
-            for region in fish.region_list:
-                if region.z_stack_step_size != step_size and region.z_stack_enabled:
-                    return False
-        else:
-            return True
+        return self.region_table.is_step_size_same()
         
     def get_first_step_size(self):
-        for fish in self.fish_list:
-            for region in fish.region_list:
-                if region.z_stack_enabled:
-                    return region.z_stack_step_size
+        return self.region_table.get_first_step_size()
 
     #config api methods
     def init_from_config(self):
-        user_config.init_class(self)
-        self.init_channel_order_list()
-        self._init_fish_list_from_config()
+        with user_store.batch():
+            user_store.init_class(self)
+            self.adv_settings.init_from_config()
+            self.init_channel_order_list()
+            self._init_fish_list_from_config()
         
     def write_to_config(self):
-        user_config.write_class(self)
-        user_config.write_class(self.adv_settings)
-        self._write_fish_list_to_config()
+        with user_store.batch():
+            user_store.write_class(self)
+            user_store.write_class(self.adv_settings)
+            self._write_fish_list_to_config()
 
     #api class methods
     @classmethod
@@ -808,33 +908,65 @@ class AcqSettings():
 
     #config helpers
     def _init_fish_list_from_config(self):
+        if user_store.num_fish is None:
+            self._init_fish_list_from_legacy_config()
+            return
+        for fish_num in range(user_store.num_fish):
+            fish = Fish()
+            #fish that can't be read are skipped, so the fish after them aren't lost
+            if fish.init_from_config(fish_num):
+                self.fish_list.append(fish)
+
+    def _init_fish_list_from_legacy_config(self):
+        """
+        Reads fish list from old config file, moves it to the settings store, and removes it from the config.
+        """
         fish_num = 0
         while True:
             fish = Fish()
-            if fish.init_from_config(fish_num):
+            if fish.init_from_legacy_config(fish_num):
                 self.fish_list.append(fish)
             else:
                 break
             fish_num += 1
+        self._write_fish_list_to_config()
+        self._remove_fish_sections()
 
     def _remove_fish_sections(self):
         """
-        Checks for all sections that match format of region_section and fish_section and removes them.
-        Example: "Fish 1 Notes" is of the form f"Fish {'[0-9]'} Notes", as is "Fish 150 Notes",
-        so bool(re.match()) returns True.
+        Checks for all legacy config sections that match format of region_section and fish_section and removes them.
+        Example: "Fish 1 Notes" is of the form f"Fish {'[0-9]+'} Notes", as is "Fish 150 Notes",
+        so _FISH_SECTION_PATTERN.fullmatch() matches both.
         """
-        for section in user_config.sections():
-            region_section_bool = bool(re.match(Region.config_section('[0-9]', '[0-9]'), section))
-            fish_section_bool = bool(re.match(Fish.config_section('[0-9]'), section))
-            if region_section_bool or fish_section_bool:
-                user_config.remove_section(section)
+        _remove_sections(_REGION_SECTION_PATTERN, _FISH_SECTION_PATTERN)
     
     def _write_fish_list_to_config(self):
-        self._remove_fish_sections()
-        for fish_num, fish in enumerate(self.fish_list):
-            fish.write_to_config(fish_num)
+        #only fish that changed are actually written
+        with user_store.batch():
+            for fish_num, fish in enumerate(self.fish_list):
+                fish.write_to_config(fish_num)
+            user_store.set_num_fish(self.num_fish)
 
     #misc privates
+    def _get_total_num_images(self, region_table: RegionTable) -> int:
+        if self.time_points_enabled:
+            self._total_num_images = region_table.total_num_images*self.num_time_points
+        else:
+            self._total_num_images = region_table.total_num_images
+        self._total_num_images += self._get_end_videos_total_num_frames(region_table)
+        return self._total_num_images
+
+    def _get_end_videos_total_num_frames(self, region_table: RegionTable) -> int:
+        if not self.adv_settings.end_videos_enabled:
+            self._end_videos_total_num_frames = 0
+        elif self.adv_settings.acq_order in (AcqOrder.TIME_SAMP, AcqOrder.SAMP_TIME, AcqOrder.INTERLEAVED):
+            num_fish = int(region_table.get_fish_imaging_enabled(self.num_fish).sum())
+            self._end_videos_total_num_frames = num_fish*self.adv_settings.end_videos_num_frames
+        elif self.adv_settings.acq_order == AcqOrder.POS_TIME:
+            num_regions = int(region_table.imaging_enabled.sum())
+            self._end_videos_total_num_frames = num_regions*self.adv_settings.end_videos_num_frames
+        return self._end_videos_total_num_frames
+
     def init_channel_order_list(self):
         """
         Initializes channel order list so that all channels in the core list are in the order list, since core channel
@@ -910,6 +1042,10 @@ class HTLSSettings():
     NOT_CONFIG_PROPS = ["acq_settings", "fish_list", "fish_settings", "region_settings"]
     FISH_SETTINGS_SECTION = "Fish Settings"
     REGION_FISH_NUM = "Settings"
+    _SETTINGS_FISH_SECTION_PATTERN = re.compile(Fish.config_section(REGION_FISH_NUM))
+    _SETTINGS_REGION_SECTION_PATTERN = re.compile(Region.config_section(REGION_FISH_NUM, "[0-9]+"))
+    STORE_SCHEMA = {"start_pos": list, "num_fish": int, "num_regions": int, "detect_roi": list, 
+                    "detect_stride": int, "coarse_z_sweep_enabled": bool}
 
     def __init__(self):
         self.acq_settings: AcqSettings = AcqSettings()
@@ -918,56 +1054,72 @@ class HTLSSettings():
         self.start_pos: list[int] = [0, 0, 0]
         self.num_fish: int = 0
         self.num_regions: int = 0
+        #[row_start, row_end, col_start, col_end] of capillary in detection images. Empty uses whole image.
+        self.detect_roi: list[int] = []
+        self.detect_stride: int = 1
+        #if True, z sweeps that find z-stack positions of each region are done at a higher speed, with fewer frames.
+        self.coarse_z_sweep_enabled: bool = False
         self.init_from_config()
 
     #config api methods
     def init_from_config(self):
-        user_config.init_class(self)
-        user_config.init_class(self.acq_settings)
-        self.init_fish_settings_from_config()
-        self.acq_settings.init_channel_order_list()
+        with user_store.batch():
+            user_store.init_class(self)
+            user_store.init_class(self.acq_settings)
+            self.init_fish_settings_from_config()
+            self.acq_settings.init_channel_order_list()
 
     def init_fish_settings_from_config(self):
+        if not self.fish_settings.init_from_config(HTLSSettings.REGION_FISH_NUM):
+            self._init_fish_settings_from_legacy_config()
+
+    def _init_fish_settings_from_legacy_config(self):
+        """
+        Reads fish settings from old config file, moves them to the settings store, and removes them from the config.
+        """
         user_config.init_class(self.fish_settings, HTLSSettings.FISH_SETTINGS_SECTION)
         region_num = 0
         while True:
             region = Region()
-            if region.init_from_config(HTLSSettings.REGION_FISH_NUM, region_num):
+            if region.init_from_legacy_config(HTLSSettings.REGION_FISH_NUM, region_num):
                 self.fish_settings.region_list.append(region)
             else:
                 break
             region_num += 1
+        self.fish_settings.write_to_config(HTLSSettings.REGION_FISH_NUM)
+        self._remove_fish_settings_sections()
 
     def remove_fish_sections(self):
         """
-        Checks for all sections that match format of region_section and fish_section and removes them.
-        Example: "Fish 1 Notes" is of the form f"Fish {'[0-9]'} Notes", as is "Fish 150 Notes",
-        so bool(re.match()) returns True.
+        Removes saved fish list (fish acquired in the last acquisition) from settings store and any old fish and 
+        region sections from the legacy config. Example: "Fish 1 Notes" is of the form f"Fish {'[0-9]+'} Notes", 
+        as is "Fish 150 Notes", so _FISH_SECTION_PATTERN.fullmatch() matches both.
+        """
+        with user_store.batch():
+            user_store.set_num_fish(0)
+            _remove_sections(_REGION_SECTION_PATTERN, _FISH_SECTION_PATTERN)
+
+    def write_fish_to_config(self, fish_num: int):
         """
-        for section in user_config.sections():
-            region_section_bool = bool(re.match(Region.config_section('[0-9]', '[0-9]'), section))
-            fish_section_bool = bool(re.match(Fish.config_section('[0-9]'), section))
-            if region_section_bool or fish_section_bool:
-                user_config.remove_section(section) 
+        Writes a single fish from fish_list. Used to save each fish as it's acquired.
+        """
+        with user_store.batch():
+            self.fish_list[fish_num].write_to_config(fish_num)
+            user_store.set_num_fish(len(self.fish_list))
         
     def write_to_config(self):
-        user_config.write_class(self)
-        self._remove_fish_settings_sections()
-        self.remove_fish_sections()
-        for fish_num, fish in enumerate(self.fish_list):
-            fish.write_to_config(fish_num)
-        self.fish_settings.write_to_config(HTLSSettings.REGION_FISH_NUM)
-        
-        user_config.write_class(self.acq_settings)
+        with user_store.batch():
+            user_store.write_class(self)
+            for fish_num, fish in enumerate(self.fish_list):
+                fish.write_to_config(fish_num)
+            user_store.set_num_fish(len(self.fish_list))
+            self.fish_settings.write_to_config(HTLSSettings.REGION_FISH_NUM)
+            user_store.write_class(self.acq_settings)
 
     def _remove_fish_settings_sections(self):
         """
-        Checks for all sections that match format of region_section and fish_section and removes them.
-        Example: "Fish 1 Notes" is of the form f"Fish {'[0-9]'} Notes", as is "Fish 150 Notes",
-        so bool(re.match()) returns True.
+        Checks for all legacy config sections that match format of fish settings region_section and fish_section and
+        removes them.
         """
-        for section in user_config.sections():
-            region_section_bool = bool(re.match(Region.config_section(HTLSSettings.REGION_FISH_NUM, '[0-9]'), section))
-            fish_section_bool = bool(re.match(Fish.config_section(HTLSSettings.REGION_FISH_NUM), section))
-            if region_section_bool or fish_section_bool:
-                user_config.remove_section(section)
+        user_store.remove_legacy_sections(HTLSSettings.FISH_SETTINGS_SECTION)
+        _remove_sections(HTLSSettings._SETTINGS_REGION_SECTION_PATTERN, HTLSSettings._SETTINGS_FISH_SECTION_PATTERN)
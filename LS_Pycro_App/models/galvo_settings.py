@@ -1,4 +1,4 @@
-from LS_Pycro_App.utils import user_config, general_functions
+from LS_Pycro_App.utils import user_store, general_functions
 
 
 class GalvoSettings(object):
@@ -78,6 +78,9 @@ class GalvoSettings(object):
     NUM_LINES_TOP_LIMIT = 80
     #framerate-laser_delay pairs for lsrm mode. Found empirically.
     LASER_DELAYS = {5: 2., 10: 1., 20: 0.45, 30: 0.3, 40: 0.25}
+    STORE_SCHEMA = {"is_lsrm": bool, "focus": float, "dslm_offset": float, "dslm_scan_width": float, 
+                    "lsrm_cur_pos": float, "lsrm_upper": float, "lsrm_lower": float, "lsrm_framerate": int, 
+                    "lsrm_laser_delay": float, "lsrm_cam_delay": float, "lsrm_num_lines": int}
 
     def __init__(self):
         self.is_lsrm = False
@@ -192,7 +195,7 @@ class GalvoSettings(object):
         return 1/(self.lsrm_sample_rate)
 
     def write_to_config(self):
-        user_config.write_class(self)
+        user_store.write_class(self)
 
     def init_from_config(self):
-        user_config.init_class(self)
+        user_store.init_class(self)
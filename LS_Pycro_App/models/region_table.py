@@ -0,0 +1,186 @@
+"""
+Structure-of-arrays view of every region in a fish list. Region stores its values behind properties,
+so adding up images or checking step sizes for a plan means going through several properties per 
+region, and AcqSettings did this separately for every number shown in the GUI. RegionTable reads the fish list once into NumPy arrays and does the math on whole
+arrays at a time.
+
+Channel lists are stored as bitmasks, where bit i is set if channels[i] is in the list, so a region's
+channels take up a single integer.
+
+A RegionTable is a snapshot. It doesn't change when the fish list does, so it should be built again
+(with RegionTable.from_fish_list()) after the fish list is changed. AcqSettings.region_table caches
+its table and does this itself.
+"""
+
+import numpy as np
+
+
+class RegionTable():
+    """
+    Holds every region of a fish list as arrays, one element per region, in the same order as the
+    fish list and each fish's region_list.
+
+    ## Constructor parameters:
+
+    #### channels : list[str]
+        channels that bits in the channel masks refer to.
+
+    #### num_regions : int
+        number of regions. Arrays are initialized to zeros.
+
+    ## Arrays:
+
+    fish_num, x_pos, y_pos, z_pos, z_stack_enabled, z_stack_start_pos, z_stack_end_pos, z_stack_step_size,
+    z_stack_channels, snap_enabled, snap_exposure, snap_channels, video_enabled, video_num_frames,
+    video_exposure, video_channels
+
+    ## Methods:
+
+    #### from_fish_list(fish_list, channels=None) -> RegionTable
+        class method that builds table from fish_list.
+
+    #### copy() -> RegionTable
+        returns copy of table. Much cheaper than deepcopy of fish list.
+
+    #### get_channel_mask(channel_list) -> int
+        returns bitmask of channel_list
+
+    #### get_channel_list(mask) -> list[str]
+        returns channels in bitmask
+
+    #### get_fish_num_images(num_fish) -> np.ndarray
+        returns number of images per fish.
+
+    #### get_size_mb(image_size_mb) -> np.ndarray
+        returns size in MB of each region.
+
+    #### is_step_size_same() -> bool
+        returns True if all regions with z-stacks enabled have the same step size.
+
+    #### get_first_step_size() -> int
+        returns step size of first region with z-stack enabled, or None if there isn't one.
+    """
+    #field name -> dtype. Channel masks are uint64, so up to 64 channels are supported.
+    FIELDS = {"fish_num": np.int32,
+              "x_pos": np.float64,
+              "y_pos": np.float64,
+              "z_pos": np.float64,
+              "z_stack_enabled": np.bool_,
+              "z_stack_start_pos": np.float64,
+              "z_stack_end_pos": np.float64,
+              "z_stack_step_size": np.int64,
+              "z_stack_channels": np.uint64,
+              "snap_enabled": np.bool_,
+              "snap_exposure": np.float64,
+              "snap_channels": np.uint64,
+              "video_enabled": np.bool_,
+              "video_num_frames": np.int64,
+              "video_exposure": np.float64,
+              "video_channels": np.uint64}
+    _CHANNEL_FIELDS = {"z_stack_channels": "z_stack_channel_list",
+                       "snap_channels": "snap_channel_list",
+                       "video_channels": "video_channel_list"}
+    MAX_CHANNELS = 64
+
+    def __init__(self, channels: list[str], num_regions: int = 0):
+        self.channels = list(channels)
+        for name, dtype in RegionTable.FIELDS.items():
+            setattr(self, name, np.zeros(num_regions, dtype))
+
+    @classmethod
+    def from_fish_list(cls, fish_list: list, channels: list[str] = None) -> "RegionTable":
+        """
+        Builds table from fish_list. Channels in regions that aren't in channels are added to the end
+        of the table's channel list.
+        """
+        regions = [(fish_num, region) for fish_num, fish in enumerate(fish_list) for region in fish.region_list]
+        table = cls(channels or [])
+        columns = {name: [] for name in RegionTable.FIELDS}
+        for fish_num, region in regions:
+            columns["fish_num"].append(fish_num)
+            for name in RegionTable.FIELDS:
+                if name == "fish_num":
+                    continue
+                elif name in RegionTable._CHANNEL_FIELDS:
+                    columns[name].append(table.get_channel_mask(getattr(region, RegionTable._CHANNEL_FIELDS[name])))
+                else:
+                    columns[name].append(getattr(region, name))
+        for name, dtype in RegionTable.FIELDS.items():
+            setattr(table, name, np.array(columns[name], dtype))
+        return table
+
+    def __len__(self):
+        return len(self.fish_num)
+
+    def copy(self) -> "RegionTable":
+        table = RegionTable(self.channels)
+        for name in RegionTable.FIELDS:
+            setattr(table, name, getattr(self, name).copy())
+        return table
+
+    def get_channel_mask(self, channel_list: list[str]) -> int:
+        mask = 0
+        for channel in channel_list:
+            if channel not in self.channels:
+                if len(self.channels) == RegionTable.MAX_CHANNELS:
+                    raise ValueError(f"RegionTable supports at most {RegionTable.MAX_CHANNELS} channels")
+                self.channels.append(channel)
+            mask |= 1 << self.channels.index(channel)
+        return mask
+
+    def get_channel_list(self, mask: int) -> list[str]:
+        return [channel for bit, channel in enumerate(self.channels) if int(mask) >> bit & 1]
+
+    @property
+    def z_stack_num_frames(self) -> np.ndarray:
+        #same as Region.z_stack_num_frames. Step size is only 0 for regions that never had it set, so those are
+        #treated as 1 frame instead of dividing by 0.
+        step_size = np.where(self.z_stack_step_size == 0, 1, self.z_stack_step_size)
+        return np.ceil(np.abs(self.z_stack_end_pos - self.z_stack_start_pos)/step_size).astype(np.int64)
+
+    @property
+    def num_images(self) -> np.ndarray:
+        """
+        Number of images of each region. Same as Region.num_images.
+        """
+        num_images = self.z_stack_enabled*_count_bits(self.z_stack_channels)*self.z_stack_num_frames
+        num_images += self.snap_enabled*_count_bits(self.snap_channels)
+        num_images += self.video_enabled*_count_bits(self.video_channels)*self.video_num_frames
+        return num_images
+
+    @property
+    def total_num_images(self) -> int:
+        """
+        Number of images of all regions (one time point).
+        """
+        return int(self.num_images.sum())
+
+    @property
+    def imaging_enabled(self) -> np.ndarray:
+        return self.z_stack_enabled | self.snap_enabled | self.video_enabled
+
+    def get_fish_num_images(self, num_fish: int) -> np.ndarray:
+        return np.bincount(self.fish_num, weights=self.num_images, minlength=num_fish).astype(np.int64)
+
+    def get_fish_imaging_enabled(self, num_fish: int) -> np.ndarray:
+        return np.bincount(self.fish_num, weights=self.imaging_enabled, minlength=num_fish) > 0
+
+    def get_size_mb(self, image_size_mb: float) -> np.ndarray:
+        return self.num_images*image_size_mb
+
+    def is_step_size_same(self) -> bool:
+        step_sizes = self.z_stack_step_size[self.z_stack_enabled]
+        return bool(np.all(step_sizes == step_sizes[0])) if step_sizes.size else True
+
+    def get_first_step_size(self):
+        step_sizes = self.z_stack_step_size[self.z_stack_enabled]
+        if step_sizes.size:
+            return step_sizes[0].item()
+
+
+def _count_bits(masks: np.ndarray) -> np.ndarray:
+    """
+    Returns number of set bits in each element of masks (uint64 array).
+    """
+    as_bytes = masks.astype(">u8").view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1).astype(np.int64)
@@ -0,0 +1,59 @@
+import time
+import unittest
+
+from LS_Pycro_App.hardware.async_hardware import AsyncHardware
+from LS_Pycro_App.hardware.simulated import SimCamera, SimPlc, SimPump, SimStage
+
+
+def _overlaps(call_1, call_2):
+    return call_1[1] < call_2[2] and call_2[1] < call_1[2]
+
+
+class TestAsyncHardware(unittest.TestCase):
+    def setUp(self):
+        self.stage = SimStage()
+        self.camera = SimCamera()
+        self.plc = SimPlc()
+        self.pump = SimPump()
+        #so fill doesn't take long
+        self.pump.position = SimPump.MAX_POSITION - 40
+        self.hardware = AsyncHardware(self.stage, self.camera, self.plc, pump=self.pump)
+
+    def tearDown(self):
+        self.hardware.close()
+
+    def test_different_devices_overlap(self):
+        hardware = self.hardware
+        start_time = time.time()
+        hardware.run(hardware.gather(
+            hardware.move_stage(200, 0, 0),
+            hardware.camera.set_binning(2),
+            hardware.pump.fill()))
+        elapsed = time.time() - start_time
+        self.assertEqual(self.stage.position, [200, 0, 0])
+        self.assertEqual(self.camera.binning, 2)
+        self.assertTrue(any(_overlaps(stage_call, self.pump.call_log[-1]) for stage_call in self.stage.call_log))
+        total = sum(call[2] - call[1] for device in [self.stage, self.camera, self.pump] for call in device.call_log)
+        self.assertLess(elapsed, total)
+
+    def test_stage_and_plc_are_serialized(self):
+        hardware = self.hardware
+        hardware.run(hardware.gather(
+            hardware.move_stage(100, 100, 100),
+            hardware.plc.init_pulse_mode(),
+            hardware.stage.reset_joystick()))
+        for stage_call in self.stage.call_log:
+            for plc_call in self.plc.call_log:
+                self.assertFalse(_overlaps(stage_call, plc_call))
+
+    def test_calls_to_same_device_keep_order(self):
+        hardware = self.hardware
+        hardware.run(hardware.gather(*[hardware.stage.set_x_position(x) for x in range(5)]))
+        self.assertEqual(self.stage.position[0], 4)
+
+    def test_constants_pass_through(self):
+        self.assertEqual(self.hardware.camera.DEFAULT_BINNING, SimCamera.DEFAULT_BINNING)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import threading
+import time
+import unittest
+
+from LS_Pycro_App.hardware.device_init import DeviceGroup, DeviceStatus, init_device_groups
+from LS_Pycro_App.hardware.simulated import SimCamera, SimPlc, SimStage
+from LS_Pycro_App.utils.exceptions import HardwareException
+
+
+def _fail():
+    raise HardwareException
+
+
+class TestDeviceInit(unittest.TestCase):
+    def setUp(self):
+        self.stage = SimStage()
+        self.camera = SimCamera()
+        self.plc = SimPlc()
+        self._release = threading.Event()
+
+    def tearDown(self):
+        self._release.set()
+
+    def test_groups_run_concurrently(self):
+        def slow_camera():
+            time.sleep(0.3)
+            self.camera.set_burst_mode()
+        def slow_stage():
+            time.sleep(0.3)
+            self.stage.init()
+        report = init_device_groups([DeviceGroup({"Camera": slow_camera}),
+                                     DeviceGroup({"Stage": slow_stage, "PLC": self.plc.init_pulse_mode})])
+        self.assertTrue(report.ok)
+        self.assertEqual([status.name for status in report.statuses], ["Camera", "Stage", "PLC"])
+        self.assertLess(report.duration_s, sum(status.duration_s for status in report.statuses))
+
+    def test_failure_and_timeout_are_reported(self):
+        report = init_device_groups([DeviceGroup({"Pump": _fail, "Valves": self.camera.set_burst_mode}),
+                                     DeviceGroup({"Rotation": self._release.wait, "Stage": self.stage.init}, 0.2)])
+        self.assertFalse(report.ok)
+        self.assertEqual([status.state for status in report.statuses],
+                         [DeviceStatus.FAILED, DeviceStatus.OK, DeviceStatus.TIMED_OUT, DeviceStatus.NOT_STARTED])
+        self.assertEqual(report.statuses[0].error, "HardwareException")
+        self.assertLess(report.duration_s, 1)
+        self.assertIn("Rotation timed out", report.get_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from LS_Pycro_App.utils import dir_functions
+
+
+class TestUniqueDirectory(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_suffix_is_only_appended(self):
+        #name ends in characters of the suffix, which strip() used to remove
+        directory = f"{self._temp_dir.name}/fish1_pos1_video_BF_timepoint1"
+        os.mkdir(directory)
+        os.mkdir(f"{directory}_1")
+        self.assertEqual(dir_functions.get_unique_directory(directory), f"{directory}_2")
+
+    def test_reserved_directories_are_unique(self):
+        directory = f"{self._temp_dir.name}/fish1/pos1/Acquisition"
+        reserved = [dir_functions.reserve_unique_directory(directory) for _ in range(3)]
+        self.assertEqual(reserved, [directory, f"{directory}_1", f"{directory}_2"])
+        #Micro-Manager creates the directory itself, so it can't exist yet
+        self.assertFalse(any(os.path.exists(path) for path in reserved))
+
+    def test_created_directory_stays_reserved(self):
+        directory = f"{self._temp_dir.name}/Acquisition"
+        reserved = dir_functions.reserve_unique_directory(directory)
+        os.mkdir(reserved)
+        dir_functions.release_directory(reserved)
+        self.assertEqual(os.listdir(self._temp_dir.name), ["Acquisition"])
+        self.assertEqual(dir_functions.reserve_unique_directory(directory), f"{directory}_1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import math
+import unittest
+
+from LS_Pycro_App.acquisition import sequences
+from LS_Pycro_App.acquisition.dry_run import DryRun, simulated_micro_manager
+from LS_Pycro_App.hardware.simulated import SimCamera, SimPlc
+from LS_Pycro_App.models.acq_settings import AcqSettings, Fish, Region
+from LS_Pycro_App.utils import constants, exceptions
+
+
+class TestDryRun(unittest.TestCase):
+    IMAGE_SIZE_MB = 8.
+    INTERVAL_S = 60
+    NUM_TIME_POINTS = 3
+
+    def setUp(self):
+        #there's no Micro-Manager, so settings get their channel list from the simulated core
+        with simulated_micro_manager():
+            self.acq_settings = AcqSettings()
+        self.acq_settings.fish_list = []
+        self.acq_settings.time_points_enabled = True
+        self.acq_settings.num_time_points = TestDryRun.NUM_TIME_POINTS
+        self.acq_settings.time_points_interval_sec = TestDryRun.INTERVAL_S
+        for fish_num in range(2):
+            region = Region()
+            region.x_pos, region.y_pos, region.z_pos = fish_num*5000, 0, 0
+            region.z_stack_enabled = True
+            region.z_stack_start_pos, region.z_stack_end_pos, region.z_stack_step_size = 0, 100, 1
+            region.z_stack_channel_list = ["GFP"]
+            region.snap_enabled = True
+            region.snap_channel_list = ["BF"]
+            fish = Fish()
+            fish.region_list.append(region)
+            self.acq_settings.fish_list.append(fish)
+
+    def _run(self):
+        return DryRun(self.acq_settings, sequences.TimeSampAcquisition, TestDryRun.IMAGE_SIZE_MB).run()
+
+    def test_time_samp_prediction(self):
+        report = self._run()
+        num_images = self.acq_settings.images_per_time_point
+        self.assertEqual(len(report.time_points), TestDryRun.NUM_TIME_POINTS)
+        self.assertAlmostEqual(report.size_mb, num_images*TestDryRun.NUM_TIME_POINTS*TestDryRun.IMAGE_SIZE_MB)
+        #each time point at least has to scan both z-stacks
+        scan_s = 2*100/SimPlc.get_true_z_stack_stage_speed(self.acq_settings.adv_settings.z_stack_stage_speed)
+        for time_point_num, time_point in enumerate(report.time_points):
+            self.assertAlmostEqual(time_point.start_s, time_point_num*TestDryRun.INTERVAL_S, delta=1)
+            self.assertGreater(time_point.duration_s, scan_s)
+            self.assertLess(time_point.duration_s, TestDryRun.INTERVAL_S)
+            self.assertAlmostEqual(time_point.size_mb, num_images*TestDryRun.IMAGE_SIZE_MB)
+        self.assertFalse(report.missed_time_points)
+        last = report.time_points[-1]
+        #acquisition ends with hardware being reset, so it ends a bit after the last time point
+        self.assertGreaterEqual(report.duration_s, last.start_s + last.duration_s)
+        self.assertLess(report.duration_s, last.start_s + TestDryRun.INTERVAL_S)
+
+    def test_simulated_image_size(self):
+        #Micro-Manager isn't connected, so image size comes from the simulated camera
+        report = DryRun(self.acq_settings, sequences.TimeSampAcquisition).run()
+        image_size_mb = SimCamera.SENSOR_WIDTH*SimCamera.SENSOR_HEIGHT*SimCamera.BYTES_PER_PIXEL*constants.B_TO_MB
+        self.assertAlmostEqual(report.image_size_mb, image_size_mb)
+        self.assertAlmostEqual(report.size_mb, self.acq_settings.images_per_time_point*TestDryRun.NUM_TIME_POINTS*image_size_mb)
+
+    def test_missed_interval(self):
+        self.acq_settings.time_points_interval_sec = 1
+        report = self._run()
+        self.assertEqual(len(report.missed_time_points), TestDryRun.NUM_TIME_POINTS - 1)
+        self.assertGreater(report.duration_s, math.floor(report.time_points[0].duration_s)*TestDryRun.NUM_TIME_POINTS)
+
+    def test_refused_during_acquisition(self):
+        with sequences.hardware_lock:
+            with self.assertRaises(exceptions.AcquisitionRunningException):
+                self._run()
+        self.assertIsNotNone(self._run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from LS_Pycro_App.utils import fish_detection
+from LS_Pycro_App.utils.fish_detection import DetectionBackground, SettleDetector
+
+
+class TestDetectionBackground(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def _get_frame(self, brightness: float = 1000., noise: float = 5.) -> np.ndarray:
+        return brightness + self.rng.normal(0, noise, (64, 96))
+
+    def _get_background(self) -> DetectionBackground:
+        background = DetectionBackground(self._get_frame())
+        for _ in range(30):
+            background.update(background.get_block_means(self._get_frame()))
+        return background
+
+    def test_drift_is_absorbed(self):
+        background = self._get_background()
+        gradient = np.linspace(0, 1, 96)
+        for frame_num in range(300):
+            #overall brightness and a left to right gradient both drift slowly
+            frame = self._get_frame(1000 + frame_num) + 0.5*frame_num*gradient
+            block_means = background.get_block_means(frame)
+            self.assertFalse(background.is_object_present(block_means), f"triggered on frame {frame_num}")
+            background.update(block_means)
+
+    def test_flicker_does_not_trigger(self):
+        background = self._get_background()
+        self.assertFalse(background.is_object_present(background.get_block_means(self._get_frame(900))))
+
+    def test_fish_triggers(self):
+        background = self._get_background()
+        frame = self._get_frame()
+        #fish is much smaller than the image, and much darker than the capillary
+        frame[24:40, 10:50] -= 400
+        self.assertTrue(background.is_object_present(background.get_block_means(frame)))
+
+
+class TestSettleDetector(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.noise = [rng.normal(0, 5, (64, 96)) for _ in range(20)]
+
+    def _get_frame(self, fish_x: int, frame_num: int) -> np.ndarray:
+        frame = 1000 + self.noise[frame_num % len(self.noise)]
+        frame[24:40, fish_x:fish_x + 30] -= 400
+        return frame
+
+    def test_noise_is_below_threshold(self):
+        energy = fish_detection.get_motion_energy(self._get_frame(10, 0), self._get_frame(10, 1))
+        self.assertLess(energy, 0.01)
+        self.assertGreater(fish_detection.get_motion_energy(self._get_frame(10, 0), self._get_frame(15, 1)), 0.01)
+
+    def test_settles_after_still_frames(self):
+        detector = SettleDetector(0.01, 5)
+        #fish is still moving, then stops at x=40
+        settled = [detector.add(self._get_frame(x, frame_num)) for frame_num, x in enumerate(range(0, 40, 5))]
+        self.assertFalse(any(settled))
+        settled = [detector.add(self._get_frame(40, frame_num)) for frame_num in range(8, 14)]
+        #first frame at x=40 is still compared to a frame where the fish was moving
+        self.assertEqual(settled, [False, False, False, False, False, True])
+
+    def test_motion_restarts_count(self):
+        detector = SettleDetector(0.01, 5)
+        for frame_num in range(4):
+            self.assertFalse(detector.add(self._get_frame(40, frame_num)))
+        self.assertFalse(detector.add(self._get_frame(50, 4)))
+        settled = [detector.add(self._get_frame(50, frame_num)) for frame_num in range(5, 10)]
+        self.assertEqual(settled, [False, False, False, False, True])
+
+
+class TestZBounds(unittest.TestCase):
+    def setUp(self):
+        self.z_positions = list(range(0, 101, 5))
+
+    def _get_metric(self, start_z: float, end_z: float) -> list[float]:
+        return [10. if start_z <= z <= end_z else 1. for z in self.z_positions]
+
+    def test_noisy_metric(self):
+        metric = self._get_metric(30, 70)
+        #single bad frames inside and outside the sample shouldn't move the bounds
+        metric[self.z_positions.index(50)] = 1.
+        metric[self.z_positions.index(90)] = 10.
+        self.assertEqual(fish_detection.get_z_bounds(self.z_positions, metric, 5, 50), (30, 70))
+
+    def test_no_run_contains_center(self):
+        metric = self._get_metric(10, 30)
+        metric[self.z_positions.index(80)] = metric[self.z_positions.index(85)] = 10.
+        self.assertEqual(fish_detection.get_z_bounds(self.z_positions, metric, 5, 50), (10, 85))
+
+    def test_run_at_range_edge(self):
+        self.assertEqual(fish_detection.get_z_bounds(self.z_positions, self._get_metric(40, 100), 5, 50), (40, 100))
+        self.assertEqual(fish_detection.get_z_bounds(self.z_positions, self._get_metric(0, 60), 5, 50), (0, 60))
+
+    def test_nothing_above_threshold(self):
+        self.assertEqual(fish_detection.get_z_bounds(self.z_positions, self._get_metric(-1, -1), 5, 50), (0, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from LS_Pycro_App.acquisition import sequences
+from LS_Pycro_App.acquisition.dry_run import DryRun, DryRunReport, simulated_micro_manager
+from LS_Pycro_App.models.acq_settings import AcqSettings, Fish, Region
+
+
+class TestInterleavedAcquisition(unittest.TestCase):
+    """
+    Runs InterleavedAcquisition as a dry run, so the scheduler runs against simulated hardware on a
+    VirtualClock, and checks the order and start times of the time points it records.
+    """
+    NUM_FISH = 3
+    NUM_TIME_POINTS = 3
+
+    def setUp(self):
+        #there's no Micro-Manager, so settings get their channel list from the simulated core
+        with simulated_micro_manager():
+            self.acq_settings = AcqSettings()
+        self.acq_settings.fish_list = []
+        self.acq_settings.time_points_enabled = True
+        self.acq_settings.num_time_points = TestInterleavedAcquisition.NUM_TIME_POINTS
+        for fish_num in range(TestInterleavedAcquisition.NUM_FISH):
+            region = Region()
+            region.x_pos, region.y_pos, region.z_pos = fish_num*5000, 0, 0
+            region.z_stack_enabled = True
+            region.z_stack_start_pos, region.z_stack_end_pos, region.z_stack_step_size = 0, 100, 1
+            region.z_stack_channel_list = ["GFP"]
+            fish = Fish()
+            fish.region_list.append(region)
+            self.acq_settings.fish_list.append(fish)
+
+    def _run(self, interval_s: float) -> DryRunReport:
+        self.acq_settings.time_points_interval_sec = interval_s
+        return DryRun(self.acq_settings, sequences.InterleavedAcquisition, 1.).run()
+
+    def _get_order(self, report: DryRunReport) -> list[tuple[str, int]]:
+        return [(time_point.label, time_point.time_point_num) for time_point in report.time_points]
+
+    def _assert_earliest_deadline_first(self, report: DryRunReport, interval_s: float):
+        #planned start of every fish's next time point. Fish that haven't been imaged are due from the start.
+        next_time_point = {f"fish {fish_num + 1}": 0 for fish_num in range(TestInterleavedAcquisition.NUM_FISH)}
+        series_start = {}
+        def get_planned_start(label):
+            if label not in series_start:
+                return 0.
+            return series_start[label] + next_time_point[label]*interval_s
+
+        for time_point in report.time_points:
+            self.assertEqual(time_point.time_point_num, next_time_point[time_point.label])
+            planned_start = get_planned_start(time_point.label)
+            pending = [label for label, num in next_time_point.items() if num < TestInterleavedAcquisition.NUM_TIME_POINTS]
+            self.assertEqual(planned_start, min(get_planned_start(label) for label in pending), time_point.label)
+            #time point is recorded once imaging starts, just after the series start is taken
+            self.assertGreaterEqual(time_point.start_s, planned_start)
+            series_start.setdefault(time_point.label, time_point.start_s)
+            next_time_point[time_point.label] += 1
+
+    def test_fish_are_interleaved(self):
+        interval_s = 60
+        report = self._run(interval_s)
+        order = [(f"fish {fish_num + 1}", time_point_num) for time_point_num in range(TestInterleavedAcquisition.NUM_TIME_POINTS)
+                 for fish_num in range(TestInterleavedAcquisition.NUM_FISH)]
+        self.assertEqual(self._get_order(report), order)
+        self._assert_earliest_deadline_first(report, interval_s)
+        self.assertFalse(report.missed_time_points)
+        #every fish is sampled on time, so whole acquisition takes about as long as one series
+        for fish_start in report.time_points[:TestInterleavedAcquisition.NUM_FISH]:
+            for time_point in report.time_points:
+                if time_point.label == fish_start.label:
+                    self.assertAlmostEqual(time_point.start_s, fish_start.start_s + time_point.time_point_num*interval_s, delta=0.1)
+        self.assertLess(report.duration_s, TestInterleavedAcquisition.NUM_TIME_POINTS*interval_s)
+
+    def test_overloaded_schedule(self):
+        #one time point of every fish doesn't fit in the interval, so time points start late
+        interval_s = 1
+        report = self._run(interval_s)
+        self.assertEqual(len(report.time_points), TestInterleavedAcquisition.NUM_FISH*TestInterleavedAcquisition.NUM_TIME_POINTS)
+        self._assert_earliest_deadline_first(report, interval_s)
+        #no fish is imaged again before every fish has been imaged once
+        first_labels = [label for label, _ in self._get_order(report)[:TestInterleavedAcquisition.NUM_FISH]]
+        self.assertEqual(len(set(first_labels)), TestInterleavedAcquisition.NUM_FISH)
+        #nothing waits, so acquisition takes as long as imaging and moving between fish
+        busy_s = sum(time_point.duration_s for time_point in report.time_points)
+        self.assertGreater(report.duration_s, busy_s)
+        self.assertLess(report.duration_s, 3*busy_s)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from LS_Pycro_App.acquisition.journal import AcquisitionJournal
+from LS_Pycro_App.utils.exceptions import JournalMismatchException
+
+
+class TestAcquisitionJournal(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = f"{self._temp_dir.name}/Acquisition"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_resumed_journal_has_finished_entries(self):
+        journal = AcquisitionJournal(self.root)
+        self.assertFalse(journal.is_resumed)
+        journal.record_series_start(0, 1234.5)
+        journal.record_sequence(f"{self.root}/fish1/pos1/zstack/GFP/timepoint1", 0, 0, 0, "zstack", "GFP")
+        journal.record_region(f"{self.root}/fish1/pos1/timepoint1")
+
+        resumed = AcquisitionJournal(self.root)
+        self.assertTrue(resumed.is_resumed)
+        self.assertEqual(resumed.start_time, journal.start_time)
+        self.assertEqual(resumed.get_series_start(0), 1234.5)
+        self.assertIsNone(resumed.get_series_start(1))
+        self.assertTrue(resumed.is_complete(f"{self.root}/fish1/pos1/zstack/GFP/timepoint1"))
+        self.assertTrue(resumed.is_complete(f"{self.root}/fish1/pos1/timepoint1"))
+        self.assertFalse(resumed.is_complete(f"{self.root}/fish1/pos1/zstack/BF/timepoint1"))
+
+    def test_cut_off_line_is_skipped(self):
+        journal = AcquisitionJournal(self.root)
+        journal.record_region(f"{self.root}/fish1/pos1/timepoint1")
+        with open(journal.file_path, "a") as journal_file:
+            journal_file.write('{"type": "region", "pa')
+        resumed = AcquisitionJournal(self.root)
+        resumed.record_region(f"{self.root}/fish1/pos2/timepoint1")
+        resumed_again = AcquisitionJournal(self.root)
+        self.assertTrue(resumed_again.is_complete(f"{self.root}/fish1/pos1/timepoint1"))
+        self.assertTrue(resumed_again.is_complete(f"{self.root}/fish1/pos2/timepoint1"))
+
+    def test_save_path_is_recorded(self):
+        journal = AcquisitionJournal(self.root)
+        path = f"{self.root}/fish1/pos1/zstack/GFP/timepoint1"
+        journal.record_sequence(path, 0, 0, 0, "zstack", "GFP", f"{path}_1")
+        with open(journal.file_path) as journal_file:
+            entry = json.loads(journal_file.readlines()[-1])
+        self.assertEqual((entry["path"], entry["save_path"]), ("fish1/pos1/zstack/GFP/timepoint1", "fish1/pos1/zstack/GFP/timepoint1_1"))
+        #resuming checks the sequence's directory, not where it ended up
+        self.assertTrue(AcquisitionJournal(self.root).is_complete(path))
+
+    def test_layout_is_checked(self):
+        layout = {"acq_order": "TIME_SAMP", "num_time_points": 3, "fish": [[{"z_stack": ["GFP"], "snap": []}]]}
+        AcquisitionJournal(self.root, layout)
+        resumed = AcquisitionJournal(self.root)
+        resumed.check_layout(copy.deepcopy(layout))
+        for key, value in [("acq_order", "SAMP_TIME"), ("fish", [[{"z_stack": ["GFP", "RFP"], "snap": []}]])]:
+            with self.assertRaisesRegex(JournalMismatchException, key):
+                resumed.check_layout(dict(layout, **{key: value}))
+
+    def test_journal_without_layout_is_refused(self):
+        AcquisitionJournal(self.root)
+        with self.assertRaises(JournalMismatchException):
+            AcquisitionJournal(self.root).check_layout({"acq_order": "TIME_SAMP"})
+
+    def test_copy_shares_journal(self):
+        journal = AcquisitionJournal(self.root)
+        self.assertIs(copy.deepcopy(journal), journal)
+        self.assertTrue(os.path.exists(journal.file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
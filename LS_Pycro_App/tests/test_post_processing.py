@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tifffile
+
+from LS_Pycro_App.acquisition.post_processing import PostProcessor
+
+
+class TestPostProcessor(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = f"{self._temp_dir.name}/Acquisition"
+        self.directory = f"{self.root}/fish1/pos1/zstack/GFP/fish1_pos1_zstack_GFP_timepoint1"
+        os.makedirs(self.directory)
+        rng = np.random.default_rng(0)
+        self.stack = rng.integers(0, 1000, (6, 32, 48), dtype=np.uint16)
+        self.stack[2, 0, 0] = np.iinfo(np.uint16).max
+        self.file_path = f"{self.directory}/fish1_pos1_zstack_GFP_timepoint1_MMStack_Pos0.ome.tif"
+        tifffile.imwrite(self.file_path, self.stack)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _process(self, num_channels):
+        post_processor = PostProcessor(self.root, list(PostProcessor.JOBS), io_mb_per_s=1000.)
+        post_processor.submit(self.directory, self.root, num_channels)
+        post_processor.close()
+        with open(post_processor.results_path) as results_file:
+            return [json.loads(line) for line in results_file]
+
+    def test_jobs(self):
+        result, = self._process(1)
+        with open(self.file_path, "rb") as stack_file:
+            checksum = hashlib.sha256(stack_file.read()).hexdigest()
+        self.assertEqual(list(result["checksums"].values()), [checksum])
+        mip_path, preview_path = result["outputs"]
+        self.assertTrue(mip_path.startswith(f"{self.root}/{PostProcessor.DIRECTORY}/fish1/pos1/zstack/GFP/"))
+        np.testing.assert_array_equal(tifffile.imread(mip_path), self.stack.max(axis=0))
+        self.assertEqual(tifffile.imread(preview_path).shape, (8, 12))
+        qc, = result["qc"]
+        self.assertEqual(qc["num_frames"], 6)
+        self.assertEqual(qc["max"], np.iinfo(np.uint16).max)
+        self.assertAlmostEqual(qc["saturated_fraction"], 1/self.stack.size)
+
+    def test_spectral_channels_are_separate(self):
+        result, = self._process(2)
+        self.assertEqual([qc["num_frames"] for qc in result["qc"]], [3, 3])
+        np.testing.assert_array_equal(tifffile.imread(result["outputs"][2]), self.stack[1::2].max(axis=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
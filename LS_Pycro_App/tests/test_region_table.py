@@ -0,0 +1,70 @@
+import math
+import unittest
+from types import SimpleNamespace
+
+from LS_Pycro_App.models.region_table import RegionTable
+
+
+def _region(**kwargs):
+    region = dict(x_pos=0, y_pos=0, z_pos=0, z_stack_enabled=False, z_stack_start_pos=0, z_stack_end_pos=0,
+                  z_stack_step_size=1, z_stack_channel_list=[], snap_enabled=False, snap_exposure=20.,
+                  snap_channel_list=[], video_enabled=False, video_num_frames=100, video_exposure=20.,
+                  video_channel_list=[])
+    region.update(kwargs)
+    return SimpleNamespace(**region)
+
+
+def _num_images(region):
+    #same calculation as Region.num_images
+    num_images = 0
+    if region.z_stack_enabled:
+        num_frames = math.ceil(abs(region.z_stack_end_pos - region.z_stack_start_pos)/region.z_stack_step_size)
+        num_images += len(region.z_stack_channel_list)*num_frames
+    if region.snap_enabled:
+        num_images += len(region.snap_channel_list)
+    if region.video_enabled:
+        num_images += len(region.video_channel_list)*region.video_num_frames
+    return num_images
+
+
+class TestRegionTable(unittest.TestCase):
+    def setUp(self):
+        self.fish_list = [
+            SimpleNamespace(region_list=[
+                _region(z_stack_enabled=True, z_stack_start_pos=10, z_stack_end_pos=305, z_stack_step_size=2,
+                        z_stack_channel_list=["GFP", "BF"]),
+                _region(snap_enabled=True, snap_channel_list=["BF"])]),
+            SimpleNamespace(region_list=[]),
+            SimpleNamespace(region_list=[
+                _region(video_enabled=True, video_num_frames=50, video_channel_list=["GFP", "RFP", "BF"]),
+                _region(z_stack_enabled=True, z_stack_end_pos=100, z_stack_step_size=2, z_stack_channel_list=["RFP"],
+                        snap_enabled=True, snap_channel_list=["GFP"])])]
+        self.table = RegionTable.from_fish_list(self.fish_list, ["BF", "GFP"])
+
+    def test_num_images_same_as_regions(self):
+        expected = [_num_images(region) for fish in self.fish_list for region in fish.region_list]
+        self.assertEqual(self.table.num_images.tolist(), expected)
+        self.assertEqual(self.table.total_num_images, sum(expected))
+
+    def test_fish_num_images(self):
+        expected = [sum(_num_images(region) for region in fish.region_list) for fish in self.fish_list]
+        self.assertEqual(self.table.get_fish_num_images(len(self.fish_list)).tolist(), expected)
+
+    def test_channel_masks(self):
+        self.assertEqual(self.table.channels, ["BF", "GFP", "RFP"])
+        self.assertEqual(self.table.get_channel_list(self.table.video_channels[2]), ["BF", "GFP", "RFP"])
+
+    def test_step_size(self):
+        self.assertTrue(self.table.is_step_size_same())
+        self.assertEqual(self.table.get_first_step_size(), 2)
+        self.table.z_stack_step_size[3] = 5
+        self.assertFalse(self.table.is_step_size_same())
+
+    def test_copy_is_independent(self):
+        copy = self.table.copy()
+        copy.x_pos[0] = 1000
+        self.assertEqual(self.table.x_pos[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
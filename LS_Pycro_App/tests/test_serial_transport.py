@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+from LS_Pycro_App.hardware import pump
+from LS_Pycro_App.hardware.serial_transport import SerialTransport
+from LS_Pycro_App.utils.exceptions import HardwareException
+
+
+class TestSerialTransportLoopback(unittest.TestCase):
+    """
+    Uses pyserial's loop:// port, which echoes everything written to it back.
+    """
+    def setUp(self):
+        self.transport = SerialTransport("loop://", b"\x03", response_timeout_s=0.2)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_response_is_framed(self):
+        self.assertEqual(self.transport.send(b"/0`3000\x03\r\n"), b"/0`3000")
+
+    def test_queued_commands_keep_order(self):
+        futures = [self.transport.send_async(f"/0`{num}\x03".encode()) for num in range(20)]
+        responses = [future.result() for future in futures]
+        self.assertEqual(responses, [f"/0`{num}".encode() for num in range(20)])
+
+    def test_no_response_times_out(self):
+        #no terminator, so no frame is ever completed
+        with self.assertRaises(HardwareException):
+            self.transport.send(b"/1?R\r")
+
+    def test_no_response_expected(self):
+        self.assertIsNone(self.transport.send(b"o\n", expect_response=False))
+
+
+@unittest.skipIf(sys.platform == "win32", "pty is only available on POSIX")
+class TestSerialTransportFakePump(unittest.TestCase):
+    """
+    Fake pump on a pty that answers every command the way the real pump does.
+    """
+    def setUp(self):
+        self.master, slave = os.openpty()
+        self.transport = SerialTransport(os.ttyname(slave), b"\x03", response_timeout_s=0.2)
+        self.device = threading.Thread(target=self._fake_pump, daemon=True)
+        self.device.start()
+
+    def tearDown(self):
+        self.transport.close()
+        os.close(self.master)
+
+    def _fake_pump(self):
+        buffer = b""
+        while True:
+            try:
+                buffer += os.read(self.master, 64)
+            except OSError:
+                return
+            while b"R\r" in buffer:
+                command, _, buffer = buffer.partition(b"R\r")
+                data = b"2900" if command.endswith(b"?") else b""
+                os.write(self.master, b"/0`" + data + b"\x03\r\n")
+
+    def test_position_query(self):
+        self.assertEqual(self.transport.send(b"/1?R\r"), b"/0`2900")
+        #second response starts with the previous response's "\r\n"
+        self.assertTrue(self.transport.send(b"/1?R\r").endswith(b"/0`2900"))
+
+    def test_setup_sequence_is_fast(self):
+        start_time = time.time()
+        for command in [b"/1TR\r", b"/1OR\r", b"/1S2R\r", b"/1V4R\r", b"/1A0R\r"]:
+            self.transport.send(command)
+        self.assertLess(time.time() - start_time, 0.5)
+
+
+class _BusyPumpCom():
+    """
+    Stands in for the pump's transport. Answers busy (error 15) num_busy times, then answers normally.
+    """
+    def __init__(self, num_busy: int, response: bytes = b"\r\n/0`2900"):
+        self.num_busy = num_busy
+        self.response = response
+        self.commands = []
+
+    def send(self, command: bytes) -> bytes:
+        self.commands.append(command)
+        return b"\r\n/0O" if len(self.commands) <= self.num_busy else self.response
+
+
+class TestPumpBusy(unittest.TestCase):
+    def setUp(self):
+        self._com = getattr(pump, "com", None)
+
+    def tearDown(self):
+        pump.com = self._com
+
+    def test_busy_command_is_retried(self):
+        pump.com = _BusyPumpCom(3)
+        pump.set_zero()
+        self.assertEqual(pump.com.commands, [b"/1A0R\r"]*4)
+
+    def test_other_errors_are_not_retried(self):
+        #error 2, invalid operand
+        pump.com = _BusyPumpCom(0, b"\r\n/0b")
+        with self.assertRaises(HardwareException):
+            pump.set_zero()
+        self.assertEqual(len(pump.com.commands), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import unittest
+from enum import Enum
+
+from LS_Pycro_App.utils.config import Config
+from LS_Pycro_App.utils.settings_store import SettingsStore
+
+
+class _Order(Enum):
+    FIRST = 1
+    SECOND = 2
+
+
+class _Settings():
+    STORE_SCHEMA = {"speed": float, "count": int, "enabled": bool, "name": str, "channels": list, "order": _Order}
+    #enums can't be read back from the legacy config
+    NOT_CONFIG_PROPS = ["order"]
+
+    def __init__(self):
+        self.speed: float = 1.
+        self._count: int = 0
+        self.enabled: bool = False
+        self.name: str = ""
+        self.channels: list[str] = []
+        self.order: _Order = _Order.FIRST
+
+    @property
+    def count(self):
+        return self._count
+
+    @count.setter
+    def count(self, value):
+        self._count = value
+
+    def set_values(self) -> "_Settings":
+        self.speed = 2.5
+        self.count = 7
+        self.enabled = True
+        self.name = "fish"
+        self.channels = ["GFP", "RFP"]
+        self.order = _Order.SECOND
+        return self
+
+    def get_values(self) -> tuple:
+        return self.speed, self.count, self.enabled, self.name, self.channels, self.order
+
+
+class TestSettingsStore(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.directory = f"{self._temp_dir.name}/Settings"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_round_trip(self):
+        settings = _Settings().set_values()
+        store = SettingsStore(self.directory)
+        with store.batch():
+            store.write_class(settings)
+        read_settings = _Settings()
+        self.assertTrue(SettingsStore(self.directory).init_class(read_settings))
+        self.assertEqual(read_settings.get_values(), settings.get_values())
+        #setting a property through the store shouldn't change other instances
+        self.assertEqual(_Settings().count, 0)
+
+    def test_invalid_values_are_skipped(self):
+        os.makedirs(self.directory)
+        sections = {"_Settings": {"speed": "fast", "count": True, "enabled": True, "order": "THIRD"}}
+        with open(f"{self.directory}/{SettingsStore.FILE_NAME}", "w") as settings_file:
+            json.dump({"version": SettingsStore.VERSION, "num_fish": None, "sections": sections}, settings_file)
+        settings = _Settings()
+        SettingsStore(self.directory).init_class(settings)
+        self.assertEqual(settings.get_values(), (1., 0, True, "", [], _Order.FIRST))
+
+    def test_fish_files(self):
+        store = SettingsStore(self.directory)
+        for fish_num in range(1, 4):
+            store.set_fish(str(fish_num), {"notes": f"fish {fish_num}"})
+        store.set_num_fish(3)
+        fish_path = store._get_fish_path("2")
+        modified_time = os.stat(fish_path).st_mtime_ns
+        store.set_fish("2", {"notes": "fish 2"})
+        self.assertEqual(os.stat(fish_path).st_mtime_ns, modified_time)
+
+        read_store = SettingsStore(self.directory)
+        self.assertEqual(read_store.num_fish, 3)
+        self.assertEqual(read_store.get_fish("3"), {"notes": "fish 3"})
+        read_store.set_num_fish(1)
+        self.assertIsNone(read_store.get_fish("2"))
+        self.assertEqual(os.listdir(f"{self.directory}/{SettingsStore.FISH_DIRECTORY}"), ["fish_1.json"])
+
+    def test_deferred_files(self):
+        store = SettingsStore(self.directory)
+        with store.deferred() as files:
+            with store.batch():
+                store.write_class(_Settings())
+        self.assertEqual(list(files), [store.file_path])
+        self.assertFalse(os.path.exists(store.file_path))
+        #settings saved after deferred files were collected are newer, so deferred files don't overwrite them
+        with store.batch():
+            store.write_class(_Settings().set_values())
+        store.write_files(files)
+        read_settings = _Settings()
+        SettingsStore(self.directory).init_class(read_settings)
+        self.assertEqual(read_settings.get_values(), _Settings().set_values().get_values())
+
+    def test_legacy_config_is_moved(self):
+        legacy_config = Config(filename="LSConfig.cfg", dir=self._temp_dir.name)
+        legacy_config.write_class(_Settings().set_values())
+        store = SettingsStore(self.directory, Config(filename="LSConfig.cfg", dir=self._temp_dir.name))
+        settings = _Settings()
+        self.assertTrue(store.init_class(settings))
+        self.assertEqual(settings.get_values()[:5], _Settings().set_values().get_values()[:5])
+        #section is removed from config file, and read from store from now on
+        self.assertFalse(Config(filename="LSConfig.cfg", dir=self._temp_dir.name).has_section("_Settings"))
+        read_settings = _Settings()
+        self.assertTrue(SettingsStore(self.directory).init_class(read_settings))
+        self.assertEqual(read_settings.get_values()[:5], settings.get_values()[:5])
+
+    def test_legacy_sections_removed_after_write(self):
+        legacy_config = Config(filename="LSConfig.cfg", dir=self._temp_dir.name)
+        legacy_config.write_class(_Settings().set_values())
+        store = SettingsStore(self.directory, Config(filename="LSConfig.cfg", dir=self._temp_dir.name))
+        with store.batch():
+            self.assertTrue(store.init_class(_Settings()))
+            #settings.json isn't written until the batch ends, so section has to stay in the config until then
+            self.assertTrue(Config(filename="LSConfig.cfg", dir=self._temp_dir.name).has_section("_Settings"))
+        self.assertTrue(os.path.exists(store.file_path))
+        self.assertFalse(Config(filename="LSConfig.cfg", dir=self._temp_dir.name).has_section("_Settings"))
+
+
+if __name__ == '__main__':
+    unittest.main()
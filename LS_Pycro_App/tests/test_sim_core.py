@@ -0,0 +1,49 @@
+import unittest
+
+from LS_Pycro_App.hardware.simulated import SimCamera, SimCore, SimPlc, SimStage, VirtualClock
+
+
+class TestSimCore(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.camera = SimCamera(self.clock)
+        self.stage = SimStage(self.clock)
+        self.plc = SimPlc(self.clock)
+        self.core = SimCore(self.camera, self.stage, self.plc, self.clock)
+
+    def _collect_images(self):
+        num_images = 0
+        while self.core.get_remaining_image_count() > 0 or self.core.is_sequence_running():
+            if self.core.get_remaining_image_count() > 0:
+                self.core.pop_next_image()
+                num_images += 1
+            else:
+                self.core.sleep(2)
+        return num_images
+
+    def test_video_takes_exposure_per_frame(self):
+        self.camera.set_exposure(40)
+        self.camera.start_sequence_acquisition(100)
+        start_time = self.clock.time()
+        self.assertEqual(self._collect_images(), 100)
+        self.assertAlmostEqual(self.clock.time() - start_time, 100*self.camera.get_frame_interval_s(), delta=0.01)
+
+    def test_z_stack_images_follow_scan(self):
+        self.plc.set_for_z_stack(2, 30)
+        self.stage.initialize_scan(0, 300)
+        self.camera.start_sequence_acquisition(150)
+        speed = self.stage.scan_start(30)
+        self.assertEqual(self._collect_images(), 150)
+        self.assertAlmostEqual(self.clock.time() - self.stage.scan_start_time, 300/speed, delta=0.01)
+
+    def test_stop_sequence(self):
+        self.camera.start_sequence_acquisition(100)
+        self.clock.sleep(10*self.camera.get_frame_interval_s())
+        self.core.stop_sequence_acquisition()
+        self.assertFalse(self.core.is_sequence_running())
+        self.core.clear_circular_buffer()
+        self.assertEqual(self.core.get_remaining_image_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
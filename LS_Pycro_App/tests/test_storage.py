@@ -0,0 +1,70 @@
+import json
+import tempfile
+import unittest
+
+from LS_Pycro_App.acquisition.storage import StorageManager, placed
+from LS_Pycro_App.models.acq_directory import AcqDirectory
+
+
+class _FixedStorageManager(StorageManager):
+    #free space of each volume is set by test instead of read from disk
+    free_mb = []
+
+    def get_available_mb(self) -> list[float]:
+        return list(self.free_mb)
+
+
+class TestStorageManager(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.roots = [f"{self._temp_dir.name}/{volume}/Acquisition" for volume in ("C", "D", "E")]
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _get_storage(self, free_mb, striping_enabled=False):
+        storage = _FixedStorageManager(self.roots, 0.9, striping_enabled)
+        storage.free_mb = free_mb
+        return storage
+
+    def test_volumes_filled_in_order(self):
+        storage = self._get_storage([100, 1000, 1000])
+        self.assertEqual(storage.place("fish1/pos1/timepoint1", 80), self.roots[0])
+        #first region is still being written, so its 80 MB don't fit twice
+        self.assertEqual(storage.place("fish1/pos2/timepoint1", 80), self.roots[1])
+        storage.release("fish1/pos1/timepoint1")
+        storage.release("fish1/pos2/timepoint1")
+        self.assertEqual(storage.place("fish1/pos3/timepoint1", 80), self.roots[0])
+
+    def test_striping_spreads_writers(self):
+        storage = self._get_storage([1000, 1000, 1000], striping_enabled=True)
+        keys = [f"fish1/pos{num}/timepoint1" for num in range(1, 7)]
+        roots = []
+        for key in keys:
+            roots.append(storage.place(key, 10))
+            storage.release(key)
+        self.assertEqual(roots, self.roots*2)
+
+    def test_manifest_keeps_placements(self):
+        storage = self._get_storage([0, 1000, 1000])
+        self.assertEqual(storage.place("fish1/pos1/timepoint1", 10), self.roots[1])
+        with open(storage.file_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest["volumes"], self.roots)
+        self.assertEqual(manifest["directories"], {"fish1/pos1/timepoint1": self.roots[1]})
+
+        resumed = self._get_storage([1000, 1000, 1000])
+        self.assertEqual(resumed.place("fish1/pos1/timepoint1", 10), self.roots[1])
+        self.assertEqual(resumed.place("fish1/pos2/timepoint1", 10), self.roots[0])
+
+    def test_placed_restores_root(self):
+        acq_directory = AcqDirectory.from_root(self.roots[0])
+        acq_directory.storage = self._get_storage([0, 1000, 1000])
+        with placed(acq_directory, 10):
+            self.assertEqual(acq_directory.root, self.roots[1])
+        #notes and journal are written to root after regions, and should still go to the first volume
+        self.assertEqual(acq_directory.root, self.roots[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
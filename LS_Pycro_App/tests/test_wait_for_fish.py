@@ -11,9 +11,15 @@ import numpy as np
 from LS_Pycro_App.utils import exceptions
 from LS_Pycro_App.hardware import valves as Valves
 from LS_Pycro_App.hardware import pump as Pump
+from LS_Pycro_App import hardware
 import unittest
 
 
+def setUpModule():
+    #devices aren't initialized on import anymore
+    hardware.init_devices()
+
+
 class TestWaitForFish(unittest.TestCase):
     def test_wait_for_fish(time_no_fish_s=0):
             Valves.open()
@@ -1,9 +1,12 @@
 from LS_Pycro_App.controllers.select_controller import microscope, MicroscopeConfig
 from LS_Pycro_App.utils.init_logger import init_logger
 from LS_Pycro_App.utils.config import Config
+from LS_Pycro_App.utils.settings_store import SettingsStore
 
 init_logger()
 if microscope == MicroscopeConfig.HTLS:
     user_config = Config(filename="HTLSConfig.cfg")
+    user_store = SettingsStore("HTLSSettings", user_config)
 else:
-    user_config = Config(filename="LSConfig.cfg")
\ No newline at end of file
+    user_config = Config(filename="LSConfig.cfg")
+    user_store = SettingsStore("LSSettings", user_config)
@@ -0,0 +1,124 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from PyQt5 import QtCore
+
+from LS_Pycro_App.utils import user_store
+from LS_Pycro_App.utils.settings_store import SettingsStore
+
+
+class DebouncedSaver():
+    """
+    Runs save_function once delay_s has passed without another save being requested. Used by the
+    controllers so that typing in a line edit (which triggers an event on every keystroke) results in
+    one config write after the user stops typing, instead of a write per keystroke.
+
+    Saves are scheduled with a single-shot QTimer, so save_function runs on the GUI thread, the same
+    thread the settings are changed on. That way, settings can't be changed by the GUI in the middle of
+    a save. save_function is run in store.deferred(), so all it does on the GUI thread is encode settings,
+    and the files are written in a background thread. If writing fails, it's tried again after delay_s,
+    with the delay doubling every time, up to MAX_RETRIES times. After that, the files are kept and
+    written along with the next save.
+
+    ## Constructor parameters:
+
+    #### save_function : Callable
+        function that saves settings.
+
+    #### delay_s : float
+        quiet time after the last request_save() before saving.
+
+    #### store : SettingsStore
+        store save_function saves to. Defaults to user_store.
+
+    ## Methods:
+
+    #### request_save()
+        schedules save, pushing back any save that's already scheduled. Should only be called from
+        the GUI thread.
+
+    #### flush()
+        if a save is pending, saves immediately and waits until files are written. Should be called
+        before anything that needs the saved settings to be up to date, such as starting an acquisition
+        or exiting.
+    """
+    DELAY_S = 1
+    MAX_RETRIES = 5
+
+    def __init__(self, save_function: Callable, delay_s: float = DELAY_S, store: SettingsStore = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._save_function = save_function
+        self._delay_s = delay_s
+        self._store = store or user_store
+        self._pending = False
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(delay_s*1000))
+        self._timer.timeout.connect(self._save)
+        #files encoded by save_function that haven't been written yet, see SettingsStore.write_files()
+        self._files: dict[str, tuple[int, str]] = {}
+        self._files_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+        self._write_future: Future = None
+        #set by flush() so writer doesn't wait between retries
+        self._retry_now = threading.Event()
+
+    def request_save(self):
+        self._pending = True
+        #start() restarts timer if it's already running
+        self._timer.start()
+
+    def flush(self):
+        self._timer.stop()
+        self._encode()
+        self._retry_now.set()
+        if self._write_future:
+            self._write_future.result()
+        #one last try for anything writer gave up on
+        self._write_files(max_retries=0)
+
+    def _save(self):
+        self._encode()
+        #writes are queued even if a write is running, since it might have just found there was nothing
+        #left. Writes run one at a time, so the queued one only writes whatever the running one didn't.
+        self._retry_now.clear()
+        self._write_future = self._writer.submit(self._write_files, DebouncedSaver.MAX_RETRIES)
+
+    def _encode(self):
+        if not self._pending:
+            return
+        self._pending = False
+        try:
+            with self._store.deferred() as files:
+                self._save_function()
+        except Exception:
+            self._logger.exception("couldn't encode settings for autosave")
+            return
+        with self._files_lock:
+            self._files.update(files)
+
+    def _write_files(self, max_retries: int):
+        """
+        Writes files until there are none left, which includes files encoded while it's running.
+        """
+        num_failures = 0
+        while True:
+            with self._files_lock:
+                files, self._files = self._files, {}
+            if not files:
+                return
+            try:
+                self._store.write_files(files)
+            except OSError as e:
+                with self._files_lock:
+                    #files encoded in the meantime are newer
+                    self._files = {**files, **self._files}
+                num_failures += 1
+                if num_failures > max_retries:
+                    self._logger.error(f"autosave failed {num_failures} times, settings will be written with the next save: {e}")
+                    return
+                retry_delay_s = self._delay_s*2**(num_failures - 1)
+                self._logger.warning(f"autosave failed, trying again in {retry_delay_s} s: {e}")
+                self._retry_now.wait(retry_delay_s)
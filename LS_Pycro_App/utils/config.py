@@ -1,7 +1,9 @@
 import ast
 import configparser
+import contextlib
 import logging
 import os
+import threading
 
 from LS_Pycro_App.controllers.select_controller import microscope, MICROSCOPE_CONFIG_SECTION, MICROSCOPE_CONFIG_OPTION
 
@@ -17,7 +19,8 @@ class Config(configparser.ConfigParser):
     currently determines the type by the type of the attribute initialized in the class,
     so would need to look into type evaluating.
 
-    - get rid of this and use JSON instead
+    - Settings are now saved with SettingsStore (utils/settings_store.py). Config is only used to read in
+    settings from old config files, which are moved to the store the first time they're read.
     """
 
     COMMENTS_SECTION = "COMMENTS"
@@ -29,20 +32,61 @@ class Config(configparser.ConfigParser):
         self.dir = dir or os.curdir
         self.file_path = f"{self.dir}/{self.FILE_NAME}"
         self._logger = logging.getLogger(__name__)
+        #Settings are saved from the GUI autosave thread and from acquisition threads, so everything
+        #that reads or changes sections should hold this lock. batch() holds it for the whole batch.
+        self.lock = threading.RLock()
+        #see batch()
+        self._batch_depth = 0
+        self._dirty_sections = set()
         self.init_from_config_file()
         self._write_comments_section()
         self._write_microscope_section()
     
     def write_config_file(self, file_path: str = None):
         """
-        Writes current sections in Config to file at given path. 
+        Writes current sections in Config to file at given path. If file_path is the config's own file 
+        and a batch() is in progress, the write is put off until the batch is finished.
+
+        File is written to a temporary file first and then renamed, so a crash in the middle of writing
+        can't leave a half-written config behind.
         """
         file_path = file_path or self.file_path
+        if file_path == self.file_path and self._batch_depth:
+            return
         if not os.path.exists(os.path.dirname(file_path)):
             os.makedirs(os.path.dirname(file_path))
-        with open(file_path, "w") as configfile:
-            self.write(configfile)
-    
+        temp_path = f"{file_path}.tmp"
+        with self.lock:
+            with open(temp_path, "w") as configfile:
+                self.write(configfile)
+            os.replace(temp_path, file_path)
+            if file_path == self.file_path:
+                self._dirty_sections.clear()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that holds off writing the config file until the end of the with block. Every
+        write_class() call normally rewrites the whole file, so saving something like a fish list means 
+        writing the file once per fish and region. Inside a batch, sections are only marked as dirty and 
+        the file is written once when the outermost batch exits (and only if something changed).
+        Batches can be nested.
+
+        Usage:
+
+            with user_config.batch():
+                user_config.write_class(...)
+                user_config.write_class(...)
+        """
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty_sections:
+                    self.write_config_file()
+
     def init_from_config_file(self, file_path: str = None):
         """
         Initializes Config from file located at file_path. 
@@ -58,7 +102,10 @@ class Config(configparser.ConfigParser):
         If section = None, section name is assumed to be the name taken from
         class_instance.__class__.__name__ (this is recommended).
         """
-        section = section or class_instance.__class__.__name__
+        with self.batch():
+            self._write_class_section(class_instance, section or class_instance.__class__.__name__)
+
+    def _write_class_section(self, class_instance: object, section: str):
         if not self.has_section(section):
             self.add_section(section)
         #Iterates through all class attributes that aren't dunders
@@ -82,8 +129,17 @@ class Config(configparser.ConfigParser):
                         self.set(section, attr.strip("_"), value)
                 except AttributeError:
                     self.set(section, attr.strip("_"), value)
-        self.write_config_file(self.file_path)
+        self._dirty_sections.add(section)
     
+    def remove_sections(self, *sections: str):
+        """
+        Removes sections from Config and writes config file if any were removed.
+        """
+        with self.batch():
+            for section in sections:
+                if self.remove_section(section):
+                    self._dirty_sections.add(section)
+
     def init_class(self, class_instance, section: str = None):
         """
         Initializes instance attributes of class_instance from values in section, if it exists.
@@ -94,10 +150,11 @@ class Config(configparser.ConfigParser):
         """
         if not section:
             section = class_instance.__class__.__name__
-        has_section = self.has_section(section)
-        if has_section:
-            self._read_config_section(class_instance, section)
-            self.write_class(class_instance, section)
+        with self.batch():
+            has_section = self.has_section(section)
+            if has_section:
+                self._read_config_section(class_instance, section)
+                self.write_class(class_instance, section)
         return has_section
 
     def _read_config_section(self, class_instance: object, section: str):
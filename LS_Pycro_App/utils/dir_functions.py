@@ -1,38 +1,76 @@
+import contextlib
 import os
 import shutil
 
 from LS_Pycro_App.utils import constants
- 
+
+
+#marker file next to a directory that's been reserved but not created yet. See reserve_unique_directory().
+RESERVATION_SUFFIX = ".reserved"
+
 def get_unique_directory(dir: str) -> str:
     """
-    returns save_path with "_i" appended where i is the first integar such that save_path is unique.
+    returns dir with "_i" appended where i is the first integar such that dir doesn't exist. dir is returned
+    as is if it doesn't exist.
     """
+    unique_dir = dir
     i = 1
-    while os.path.isdir(dir):
-        dir = dir.strip(f"_{i-1}") + f"_{i}"
+    while os.path.exists(unique_dir):
+        unique_dir = f"{dir}_{i}"
         i += 1
-    return dir
+    return unique_dir
 
 
-def is_enough_space(data_mb, required_percentage, dir: str) -> bool:
-    """ 
-    returns 
+def reserve_unique_directory(dir: str) -> str:
     """
-    usage = shutil.disk_usage(dir)
-    total_space = usage[0]
-    used_space = usage[1] + data_mb*constants.MB_TO_B
-    return used_space/total_space < required_percentage
+    Same as get_unique_directory(), but also reserves the directory so two writers can't end up with the same
+    directory even if they're reserved at the same time. The directory itself isn't created, since Micro-Manager
+    won't create a datastore in a directory that already exists. Instead, a marker file is created next to it
+    with O_EXCL, which fails if the marker already exists. release_directory() should be called once the
+    directory has been created.
+    """
+    os.makedirs(os.path.dirname(dir), exist_ok=True)
+    unique_dir = dir
+    i = 1
+    while True:
+        if not os.path.exists(unique_dir) and _create_marker(unique_dir):
+            #directory could have been created (and its marker released) between the check and the marker
+            if not os.path.exists(unique_dir):
+                return unique_dir
+            release_directory(unique_dir)
+        unique_dir = f"{dir}_{i}"
+        i += 1
 
 
-def move_files_to_parent(child_dir):
+def release_directory(dir: str):
     """
-    Moves files and directories in child_dir to parent directory and then deletes 
-    child_dir.
+    Removes marker created by reserve_unique_directory().
     """
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(f"{dir}{RESERVATION_SUFFIX}")
+
+
+def _create_marker(dir: str) -> bool:
     try:
-        for name in os.listdir(child_dir):
-            shutil.move(f"{child_dir}/{name}", os.path.dirname(child_dir))
-        os.rmdir(child_dir)
-    except:
-        pass
-    
\ No newline at end of file
+        os.close(os.open(f"{dir}{RESERVATION_SUFFIX}", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def is_enough_space(data_mb, required_percentage, dir: str) -> bool:
+    """
+    returns True if data_mb can be written to dir without the disk being more than required_percentage full.
+    """
+    return get_available_mb(required_percentage, dir) > data_mb
+
+
+def get_available_mb(required_percentage, dir: str) -> float:
+    """
+    returns MB that can be written to dir before its disk is more than required_percentage full. dir
+    doesn't have to exist yet, in which case the disk of its closest existing parent is used.
+    """
+    while not os.path.exists(dir) and os.path.dirname(dir) != dir:
+        dir = os.path.dirname(dir)
+    usage = shutil.disk_usage(dir)
+    return (usage.total*required_percentage - usage.used)*constants.B_TO_MB
@@ -16,6 +16,21 @@ class AbortAcquisitionException(Exception):
     pass
 
 
+class AcquisitionRunningException(Exception):
+    """
+    Raised when something that can't run at the same time as an acquisition (such as a dry run) is 
+    started while one is running.
+    """
+    pass
+
+
+class JournalMismatchException(Exception):
+    """
+    Raised when an acquisition is resumed with settings that don't match the ones in its journal.
+    """
+    pass
+
+
 class HardwareException(Exception):
     """
     General hardware exception for the general exception handling function.
@@ -23,6 +38,14 @@ class HardwareException(Exception):
     pass
 
 
+class PumpBusyException(HardwareException):
+    """
+    Raised when the pump rejects a command because it's still executing the last one. Pump commands
+    are retried on this, so it only gets past hardware.pump if the pump stays busy.
+    """
+    pass
+
+
 class CameraTimeoutException(Exception):
     """
     This was created for when the camera would unexpectedly get stuck during an acquisition. This
@@ -1,3 +1,4 @@
+import functools
 import pandas as pd
 import pathlib
 
@@ -9,10 +10,10 @@ from skimage import measure, morphology
 
 from LS_Pycro_App.hardware import Camera, Stage
 from LS_Pycro_App.utils import pycro, stitch, exceptions
-from LS_Pycro_App.utils.pycro import core
+from LS_Pycro_App.utils.pycro import camera_geometry
 
 
-CORR_TEMPLATE_PATHS = [str(file) for file in pathlib.Path("LS_Pycro_App/utils/fish_detection_images").iterdir() if ".png" in file.suffix]
+_CORR_TEMPLATE_DIRECTORY = "LS_Pycro_App/utils/fish_detection_images"
 HOLE_AREA_UM = 4500
 FEATURE_AREA_UM = 65000
 SAME_FEATURE_MAX_D = 300
@@ -31,7 +32,7 @@ def get_stitched_image(stitched_positions):
             Stage.set_x_position(pos[0])
             Stage.wait_for_xy_stage()
             Camera.snap_image()
-            image = pycro.pop_next_image().get_raw_pixels().reshape((core.get_image_height(), core.get_image_width()))
+            image = pycro.pop_next_image().get_raw_pixels().reshape(camera_geometry.shape)
             images.append(image)
         return stitch.stitch_images(images, stitched_positions, x_stage_polarity=-1)
 
@@ -70,12 +71,12 @@ def get_features(capillary_image):
     threshed = capillary_image < threshold
     #Removes holes in objects (such as from bright pixels in swim bladder). Area argument here
     #is somewhat arbitrary, but should be large enough for holes in swim bladder to be filled.
-    filled = morphology.remove_small_holes(threshed, core.get_pixel_size_um()*HOLE_AREA_UM)
+    filled = morphology.remove_small_holes(threshed, camera_geometry.pixel_size_um*HOLE_AREA_UM)
     #label image so we can extract properties using skimage regionprops
     labeled = measure.label(filled)
     #creates list of region properties that meet criteria for fish features. Eccentricity to
     #ensure objects are round and area to ensure they're the correct size.
-    return [f for f in measure.regionprops(labeled) if f.eccentricity < ECCENTRICITY_LIMIT and f.area > core.get_pixel_size_um()*FEATURE_AREA_UM]
+    return [f for f in measure.regionprops(labeled) if f.eccentricity < ECCENTRICITY_LIMIT and f.area > camera_geometry.pixel_size_um*FEATURE_AREA_UM]
             
 
 def get_centroids(features):
@@ -117,24 +118,211 @@ def get_x_offset_um(centroids: list[tuple[float, float]],
     #In both cases, using only the mean will place the centroid at the edge of the screen
     #with the eye in the field of view. Since region 1 is where the swim bladder is 
     #in the field of view, we subtract the camera image width to move to the other side.
-    offset += -core.get_image_width()
+    offset += -camera_geometry.width
     #We make one more adjustmet to the offset to correctly move the stage so that we're
     #looking at region 1 of the fish, based on the distance between the x coords of the
     #centroids.
     dx = abs(x_positions[1] - x_positions[0])
     offset += -DX_FACTOR*dx
-    return offset*core.get_pixel_size_um()
+    return offset*camera_geometry.pixel_size_um
+
+
+def get_image_shape() -> tuple[int, int]:
+    """
+    Returns (height, width) of images currently returned by the camera. Should be called
+    after binning is set, since binning changes the image size.
+    """
+    return camera_geometry.shape
+
+
+def crop_detection_image(image: np.ndarray, roi: list[int] = None, stride: int = 1) -> np.ndarray:
+    """
+    Returns view of image cropped to roi, keeping only every stride-th pixel.
+
+    ### Parameters:
+
+    #### image : np.ndarray
+        2D detection image.
+
+    #### roi : list[int]
+        [row_start, row_end, col_start, col_end] of the capillary region. If empty or None,
+        the whole image is used.
+
+    #### stride : int
+        only every stride-th row and column is kept. Fish are much larger than a pixel, so
+        subsampling barely changes anything but makes detection a lot cheaper to compute.
+    """
+    if roi:
+        image = image[roi[0]:roi[1], roi[2]:roi[3]]
+    return image[::max(stride, 1), ::max(stride, 1)]
+
+
+class DetectionBackground():
+    """
+    Rolling background model of the capillary used to detect fish arrival. The (cropped) detection 
+    image is split into square blocks, and an exponential moving average of each block's mean 
+    and variance is kept. A frame triggers detection when enough blocks are much darker than their 
+    background, so a fish that only covers a small part of the capillary is still detected, while 
+    slow drift, lamp flicker, and debris that settles in the capillary get absorbed into the background.
+
+    Only frames that don't trigger should be passed to update(), otherwise the fish becomes part
+    of the background.
+
+    ## Constructor parameters:
+
+    #### image : np.ndarray
+        cropped detection image with no fish in it, used as the initial background.
+    """
+    BLOCK_SIZE_PX = 8
+    #weight of newest frame in moving averages
+    ALPHA = 0.05
+    #number of background standard deviations a block must be darker by to count as deviant
+    DEVIATION_THRESHOLD = 6
+    MIN_DEVIANT_BLOCKS = 2
+    #block noise is never assumed to be less than this fraction of the mean intensity. Keeps
+    #the model from being too sensitive when it's only seen a few frames.
+    MIN_STD_FACTOR = 0.02
+
+    def __init__(self, image: np.ndarray):
+        self.mean = self.get_block_means(image)
+        self.var = np.zeros_like(self.mean)
+        self._min_std = DetectionBackground.MIN_STD_FACTOR*float(np.mean(self.mean))
+
+    def get_block_means(self, image: np.ndarray) -> np.ndarray:
+        """
+        Returns mean of each BLOCK_SIZE_PX x BLOCK_SIZE_PX block of image. Edge pixels that don't fill a
+        block are ignored.
+        """
+        size = min(DetectionBackground.BLOCK_SIZE_PX, *image.shape)
+        rows, cols = image.shape[0]//size, image.shape[1]//size
+        blocks = image[:rows*size, :cols*size].reshape(rows, size, cols, size)
+        return blocks.mean(axis=(1, 3))
+
+    def get_deviation_scores(self, block_means: np.ndarray) -> np.ndarray:
+        """
+        Returns how much darker than the background each block is, in units of background standard
+        deviation. The median deviation is subtracted first so that changes in overall brightness
+        (like lamp flicker) don't count.
+        """
+        deviation = self.mean - block_means
+        deviation -= np.median(deviation)
+        return deviation/np.maximum(np.sqrt(self.var), self._min_std)
+
+    def is_object_present(self, block_means: np.ndarray) -> bool:
+        scores = self.get_deviation_scores(block_means)
+        return np.count_nonzero(scores > DetectionBackground.DEVIATION_THRESHOLD) >= DetectionBackground.MIN_DEVIANT_BLOCKS
+
+    def update(self, block_means: np.ndarray):
+        alpha = DetectionBackground.ALPHA
+        difference = block_means - self.mean
+        self.mean += alpha*difference
+        self.var = (1 - alpha)*(self.var + alpha*difference**2)
+
+
+def get_motion_energy(previous_image: np.ndarray, image: np.ndarray) -> float:
+    """
+    Returns mean absolute difference between consecutive frames, relative to the mean intensity of
+    previous_image. This is close to the camera noise level when nothing in the image is moving.
+    """
+    previous_image = previous_image.astype(np.float32)
+    difference = np.abs(image.astype(np.float32) - previous_image)
+    return float(np.mean(difference)/max(np.mean(previous_image), 1))
+
+
+class SettleDetector():
+    """
+    Decides when a fish has stopped moving from consecutive detection frames. The fish is settled once the
+    motion energy (see get_motion_energy()) between frames stays below motion_threshold for still_frames
+    frames in a row. Any frame with more motion starts the count over.
+
+    ## Constructor parameters:
+
+    #### motion_threshold : float
+        motion energy below which a frame counts as still.
+
+    #### still_frames : int
+        number of still frames in a row needed.
+
+    ## Methods:
+
+    #### add(image) -> bool
+        adds next frame and returns True if fish is settled.
+    """
+    def __init__(self, motion_threshold: float, still_frames: int):
+        self.motion_threshold = motion_threshold
+        self.still_frames = still_frames
+        self._previous_image: np.ndarray = None
+        self._num_still = 0
+
+    def add(self, image: np.ndarray) -> bool:
+        if self._previous_image is not None:
+            if get_motion_energy(self._previous_image, image) < self.motion_threshold:
+                self._num_still += 1
+            else:
+                self._num_still = 0
+        self._previous_image = image
+        return self._num_still >= self.still_frames
+
+
+def get_z_bounds(z_positions: list[float], metric: list[float], threshold: float, center_z: float) -> tuple[float, float]:
+    """
+    Returns (start, end) z positions of the sample from a z profile recorded during a stage sweep.
+    The profile is first smoothed with a 3 point running median so that single noisy frames don't end 
+    the sample early, then the bounds are taken as the edges of the run of positions above threshold 
+    that contains center_z (the position the sample was found at). If the center isn't above 
+    threshold, the outermost positions above threshold are used instead, and if nothing is above 
+    threshold, the whole sweep range is returned.
+
+    ### Parameters:
+
+    #### z_positions : list[float]
+        stage z positions of each frame in the sweep, in increasing order
+
+    #### metric : list[float]
+        metric (currently std) of each frame. Larger means more sample in the frame.
+
+    #### threshold : float
+        metric value that separates sample from background.
+
+    #### center_z : float
+        z position the sweep was centered on.
+    """
+    z_positions = np.asarray(z_positions, dtype=float)
+    metric = np.asarray(metric, dtype=float)
+    padded = np.pad(metric, 1, mode="edge")
+    smoothed = np.median(np.stack([padded[:-2], padded[1:-1], padded[2:]]), axis=0)
+    above = np.flatnonzero(smoothed > threshold)
+    if above.size == 0:
+        return float(z_positions[0]), float(z_positions[-1])
+    center = int(np.argmin(np.abs(z_positions - center_z)))
+    if smoothed[center] <= threshold:
+        return float(z_positions[above[0]]), float(z_positions[above[-1]])
+    start = end = center
+    while start > 0 and smoothed[start - 1] > threshold:
+        start -= 1
+    while end < smoothed.size - 1 and smoothed[end + 1] > threshold:
+        end += 1
+    return float(z_positions[start]), float(z_positions[end])
 
 
 def fish_detected(image, bg_image_std, bg_image_mean):
     return np.mean(image) < bg_image_mean - bg_image_std
 
 
+@functools.cache
+def get_corr_template_paths() -> list[str]:
+    """
+    Returns paths of cross correlation templates. Directory is only read the first time this is called,
+    instead of when this module is imported.
+    """
+    return [str(file) for file in pathlib.Path(_CORR_TEMPLATE_DIRECTORY).iterdir() if ".png" in file.suffix]
+
+
 def get_cross_cor_offset_um(capillary_image: np.ndarray):
     capillary = skimage.exposure.rescale_intensity(capillary_image)
     image_1d = np.mean(capillary, 0)
     offsets = []
-    for template_path in CORR_TEMPLATE_PATHS:
+    for template_path in get_corr_template_paths():
         template = skimage.io.imread(template_path)
         template_1d = np.mean(template, 0)
         #cross correlation requires functions to be centered at zero.
@@ -145,9 +333,9 @@ def get_cross_cor_offset_um(capillary_image: np.ndarray):
         #We subtract the offset from the image width because position of fish is relative to
         #where the fish entered from (the start position), which is currently from the right 
         #side of the image.
-        corrected_offset = capillary_image.shape[1] - (cross_offset + CROSS_CORRECTION) - core.get_image_width()
+        corrected_offset = capillary_image.shape[1] - (cross_offset + CROSS_CORRECTION) - camera_geometry.width
         #returns offset as um offset for stage
-        offsets.append(corrected_offset*core.get_pixel_size_um())
+        offsets.append(corrected_offset*camera_geometry.pixel_size_um)
     return np.mean(offsets)
 
 def is_fish(detection_image: np.ndarray):
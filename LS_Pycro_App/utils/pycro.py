@@ -17,20 +17,106 @@ https://micro-manager.org/apidoc/mmstudio/latest/org/micromanager/Studio.html
 """
 
 import contextlib
+import logging
+import threading
+import time
 from datetime import datetime
 
 from pycromanager import Studio, Core, JavaObject
 
-from LS_Pycro_App.utils import dir_functions
+from LS_Pycro_App.utils import constants, dir_functions
 
 
-studio = Studio()
-core = Core()
+class LazyBridge():
+    """
+    Stands in for a pycromanager Studio or Core, and creates it (which connects to Micro-Manager) the
+    first time one of its attributes is used. Before this, studio and core were created when this module
+    was imported, so nothing that imported anything from LS_Pycro_App could start without Micro-Manager
+    running, even if it never used it.
+
+    ## Constructor parameters:
+
+    #### bridge_class : type
+        Studio or Core
+
+    ## Methods:
+
+    #### connect()
+        creates Studio or Core if it hasn't been created yet and returns it.
+
+    #### is_connected -> bool
+        True if Studio or Core has been created.
+
+    #### replaced(bridge)
+        context manager that uses bridge instead of Studio or Core until it exits.
+    """
+    def __init__(self, bridge_class: type):
+        self._bridge_class = bridge_class
+        self._bridge = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self._bridge is None:
+                start_time = time.perf_counter()
+                self._bridge = self._bridge_class()
+                logging.getLogger(self.__class__.__name__).info(
+                    f"{self._bridge_class.__name__} connected in {time.perf_counter() - start_time:.2f} s")
+            return self._bridge
+
+    @property
+    def is_connected(self) -> bool:
+        return self._bridge is not None
+
+    @contextlib.contextmanager
+    def replaced(self, bridge):
+        with self._lock:
+            original = self._bridge
+            self._bridge = bridge
+        try:
+            yield bridge
+        finally:
+            with self._lock:
+                self._bridge = original
+
+    def __getattr__(self, name):
+        return getattr(self.connect(), name)
+
+
+class CoreDeviceName():
+    """
+    Class attribute that's set to the name of a device in the core the first time it's accessed, like
+    Camera.CAM_NAME. Reading it from the core in the class body connected to Micro-Manager on import.
+
+    ## Constructor parameters:
+
+    #### get_method_name : str
+        name of core method that returns device name, like "get_camera_device"
+    """
+    def __init__(self, get_method_name: str):
+        self._get_method_name = get_method_name
+        self._device_name: str = None
+
+    def __get__(self, instance, owner) -> str:
+        if self._device_name is None:
+            self._device_name = getattr(core, self._get_method_name)()
+        return self._device_name
+
+
+studio = LazyBridge(Studio)
+core = LazyBridge(Core)
+
+
+def connect():
+    """
+    Connects to Micro-Manager now instead of the first time studio or core is used.
+    """
+    studio.connect()
+    core.connect()
 
 
 BF_CHANNEL = "BF"
 GFP_CHANNEL = "GFP"
-_MULTIPAGE_TIFF = studio.data().get_preferred_save_mode().MULTIPAGE_TIFF
 #These are found in the MM summary metadata class.
 _C_AXIS = "channel"
 _T_AXIS = "time"
@@ -41,6 +127,100 @@ _P_AXIS= "position"
 _CHANNEL = "Channel"
 
 
+class CameraGeometry():
+    """
+    Cache of camera image size and pixel size. Every core call goes over the bridge, and things like the memory 
+    estimate in the GUI used to ask the core for the image size once per region every time they were updated. 
+    Values are read from the core the first time they're needed after invalidate() is called.
+
+    invalidate() is called by Camera.set_property() (which is how binning, ROI, etc. are set) and at the start 
+    of each acquisition, in case camera settings were changed in Micro-Manager itself. Anything else that 
+    changes the image size or pixel size config should call it as well.
+
+    ## Properties:
+
+    #### width : int
+        image width in pixels
+
+    #### height : int
+        image height in pixels
+
+    #### shape : tuple[int, int]
+        (height, width), same as numpy shape of images
+
+    #### bytes_per_pixel : int
+        bytes per pixel
+
+    #### image_size_mb : float
+        size of a single image in MB
+
+    #### pixel_size_um : float
+        pixel size in um with current binning and pixel size config
+
+    ## Methods:
+
+    #### invalidate()
+        clears cache so values are read from the core the next time they're needed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+    @property
+    def width(self) -> int:
+        return self._get("width")
+
+    @property
+    def height(self) -> int:
+        return self._get("height")
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return self._get("bytes_per_pixel")
+
+    @property
+    def image_size_mb(self) -> float:
+        return self.width*self.height*self.bytes_per_pixel*constants.B_TO_MB
+
+    @property
+    def pixel_size_um(self) -> float:
+        return self._get("pixel_size_um")
+
+    def _get(self, name: str):
+        with self._lock:
+            if self._values is None:
+                self._values = {"width": core.get_image_width(),
+                                "height": core.get_image_height(),
+                                "bytes_per_pixel": core.get_bytes_per_pixel(),
+                                "pixel_size_um": core.get_pixel_size_um()}
+            return self._values[name]
+
+
+camera_geometry = CameraGeometry()
+
+
+@contextlib.contextmanager
+def simulated(sim_core):
+    """
+    Context manager that uses sim_core (a hardware.simulated.SimCore) as the core until it exits, so
+    settings can be made and dry runs can run without Micro-Manager. camera_geometry is read from sim_core
+    in the meantime, and from the real core again afterwards.
+    """
+    with core.replaced(sim_core):
+        camera_geometry.invalidate()
+        try:
+            yield sim_core
+        finally:
+            camera_geometry.invalidate()
+
 
 class ImageCoordsBuilder():
     """
@@ -253,8 +433,13 @@ class MultipageDatastore():
     See: https://micro-manager.org/apidoc/mmstudio/latest/org/micromanager/data/Datastore.html
     """
     def __init__(self, save_path):
-        self.save_path = dir_functions.get_unique_directory(save_path)
-        self._datastore = studio.data().create_multipage_tiff_datastore(self.save_path, True, False)
+        #Micro-Manager names the files after the directory, so the directory is where the files belong and
+        #nothing has to be moved after the datastore is closed.
+        self.save_path = dir_functions.reserve_unique_directory(save_path)
+        try:
+            self._datastore = studio.data().create_multipage_tiff_datastore(self.save_path, True, False)
+        finally:
+            dir_functions.release_directory(self.save_path)
     
     def freeze(self):
         self._datastore.freeze()
@@ -275,16 +460,6 @@ class MultipageDatastore():
         with contextlib.suppress(Exception):
             self._datastore.close()
 
-    def close_and_move_files(self):
-        """
-        Closes and then moves files to parent directory.
-
-        Micro-Manager creates an extra, redundant folder, so move the files to parent and then
-        delete parent folder.
-        """
-        self.close()
-        dir_functions.move_files_to_parent(self.save_path)
-
 
 class RAMDatastore():
     """
@@ -307,7 +482,8 @@ class RAMDatastore():
         #MM documentation says to "freeze" datastore after data is no longer being added.
         #Not sure if it actually makes a difference...
         self.freeze()
-        self._datastore.save(_MULTIPAGE_TIFF, dir_functions.get_unique_directory(directory))
+        multipage_tiff = studio.data().get_preferred_save_mode().MULTIPAGE_TIFF
+        self._datastore.save(multipage_tiff, dir_functions.get_unique_directory(directory))
 
     def set_summary_metadata(self, summary_metadata):
         self._datastore.set_summary_metadata(summary_metadata)
@@ -338,3 +514,41 @@ def pop_next_image():
     """
     tagged = core.pop_next_tagged_image()
     return studio.data().convert_tagged_image(tagged)
+
+
+def pop_newest_image():
+    """
+    grabs newest image in image buffer, throws away the rest, and returns it as an MM image object. Used when
+    images are coming in faster than they can be looked at, so older images aren't worth looking at anymore.
+    """
+    tagged = core.get_last_tagged_image()
+    core.clear_circular_buffer()
+    return studio.data().convert_tagged_image(tagged)
+
+
+class FrameClock():
+    """
+    Gets the time (from time.time()) that images from the circular buffer were taken at, from their ElapsedTime-ms
+    metadata instead of when they happen to be popped, so time spent waiting in the buffer isn't lost. The core
+    measures ElapsedTime-ms from when the circular buffer was last started or cleared, so reset() should be
+    called right after starting a sequence acquisition and every time the buffer is cleared.
+
+    ## Methods:
+
+    #### reset()
+        sets the time that ElapsedTime-ms is measured from to now.
+
+    #### get_frame_time(image) -> float
+        returns time image was taken at. If image has no ElapsedTime-ms, returns time.time().
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._start_time = time.time()
+
+    def get_frame_time(self, image) -> float:
+        elapsed_time_ms = image.get_metadata().get_elapsed_time_ms(-1.)
+        if elapsed_time_ms < 0:
+            return time.time()
+        return self._start_time + elapsed_time_ms*constants.MS_TO_S
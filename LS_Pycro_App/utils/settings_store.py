@@ -0,0 +1,372 @@
+"""
+JSON settings store. Replaces the config file for saving settings between sessions.
+
+Settings are saved in a directory that holds:
+
+- settings.json, which has the store version, one section per settings class (AcqSettings,
+HTLSSettings, GalvoSettings, etc.), and the number of fish in the saved fish list.
+
+- fish/, which has one file per fish with the fish's notes and its list of regions.
+
+Each settings class lists what's saved in its STORE_SCHEMA class attribute, which maps names to
+types, so nothing has to be guessed when it's read back in (the config file figured out types from
+whatever the attribute was initialized to and used ast.literal_eval for everything else). Values
+that are missing or have the wrong type are skipped and the attribute keeps its default, so fields
+can be added to or removed from a schema without breaking old files.
+
+Since every fish has its own file, saving the fish list only rewrites the files of fish that
+actually changed, and loading it doesn't involve probing for sections until one is missing.
+
+If a section or the fish list isn't in the store yet, it's read from the old config file (if there
+is one) and moved to the store, so existing LSConfig.cfg/HTLSConfig.cfg settings aren't lost.
+
+Future Changes:
+
+- If the format ever has to change, bump VERSION and add a function to _MIGRATIONS that converts
+the previous version.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import threading
+from copy import deepcopy
+from enum import Enum
+
+from LS_Pycro_App.utils.config import Config
+
+
+def encode(instance: object) -> dict:
+    """
+    Returns dict of values in instance.STORE_SCHEMA that can be dumped to JSON. Enums are saved
+    by name. Lists are copied so that changing them in place later is picked up as a change.
+    """
+    data = {}
+    for name, value_type in instance.STORE_SCHEMA.items():
+        value = getattr(instance, name)
+        if issubclass(value_type, Enum):
+            value = value.name
+        data[name] = deepcopy(value)
+    return data
+
+
+def decode(instance: object, data: dict):
+    """
+    Sets attributes of instance in instance.STORE_SCHEMA to values in data. Like Config.init_class(),
+    values are set directly in the instance's __dict__ ("_" + name if it exists) so property setters
+    don't change class defaults. Attributes that only exist as properties are set through the
+    property.
+    """
+    logger = logging.getLogger(__name__)
+    class_dict = vars(instance)
+    for name, value_type in instance.STORE_SCHEMA.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if issubclass(value_type, Enum):
+            try:
+                value = value_type[value]
+            except KeyError:
+                logger.warning(f"{instance.__class__.__name__} {name} has invalid value {value}")
+                continue
+        elif not _is_type(value, value_type):
+            logger.warning(f"{instance.__class__.__name__} {name} has invalid value {value}")
+            continue
+        if f"_{name}" in class_dict:
+            class_dict[f"_{name}"] = value
+        elif name in class_dict:
+            class_dict[name] = value
+        else:
+            setattr(instance, name, value)
+
+
+def _is_type(value, value_type: type) -> bool:
+    #ints and floats are both accepted for numbers since GUI widgets and stage positions aren't
+    #consistent about which they return. bool is a subclass of int, so it's excluded.
+    if value_type in (int, float):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, value_type)
+
+
+#version -> function that converts data of that version to the next version
+_MIGRATIONS = {}
+
+
+class SettingsStore():
+    """
+    Reads and writes settings classes to a directory of JSON files. See module docstring for
+    details.
+
+    ## Constructor parameters:
+
+    #### directory : str
+        directory the store is saved in.
+
+    #### legacy_config : Config
+        config that settings are moved from if they aren't in the store yet. If None, nothing is
+        moved.
+
+    ## Methods:
+
+    #### open(directory, legacy_config=None)
+        switches store to a different directory.
+
+    #### init_class(class_instance, section=None) -> bool
+        initializes class_instance from section. Returns True if section exists.
+
+    #### write_class(class_instance, section=None)
+        writes class_instance to section.
+
+    #### batch()
+        context manager that holds off writing settings.json until the end of the with block.
+
+    #### get_fish(key) -> dict
+        returns saved data of fish with key, or None if there isn't any.
+
+    #### set_fish(key, data)
+        saves fish data to its own file. File is only written if data changed.
+
+    #### set_num_fish(num_fish)
+        sets number of fish in saved fish list and deletes files of fish past the end of the list.
+
+    #### export(directory)
+        copies the store to directory. Used to save settings along with an acquisition.
+
+    #### deferred()
+        context manager that collects files that would be written or deleted in the with block instead of 
+        writing them, and yields them as a dict. They can be written later (in another thread, for example) 
+        with write_files().
+
+    #### write_files(files)
+        writes files collected by deferred(). Files that were written with newer data in the meantime are 
+        skipped.
+    """
+    VERSION = 1
+    FILE_NAME = "settings.json"
+    FISH_DIRECTORY = "fish"
+
+    def __init__(self, directory: str, legacy_config: Config = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.lock = threading.RLock()
+        self._batch_depth = 0
+        #files are numbered in the order they're saved, so that if files from deferred() are written after
+        #newer ones, they don't overwrite them. path -> number of data last written to it.
+        self._write_lock = threading.Lock()
+        self._num_saved = 0
+        self._written: dict[str, int] = {}
+        self._deferred_files: dict[str, tuple[int, str]] = None
+        self.open(directory, legacy_config)
+
+    def open(self, directory: str, legacy_config: Config = None):
+        """
+        Switches store to directory, same as if it had been created with it. Anything read from the
+        previous directory is dropped, so this should be called before settings classes are initialized.
+        Used by headless_start.py to run with settings from somewhere other than the app's own store,
+        like the settings folder saved with an acquisition.
+        """
+        with self.lock:
+            self.directory = directory
+            self.file_path = f"{directory}/{SettingsStore.FILE_NAME}"
+            self._legacy_config = legacy_config
+            #legacy sections that are removed once settings.json is written
+            self._legacy_sections: list[str] = []
+            self._dirty = False
+            self._sections: dict[str, dict] = {}
+            #None means no fish list has ever been saved to the store
+            self._num_fish: int = None
+            #JSON last written to each fish file, so unchanged fish aren't rewritten
+            self._fish_json: dict[str, str] = {}
+            self._read_file()
+
+    @property
+    def num_fish(self) -> int:
+        return self._num_fish
+
+    def init_class(self, class_instance: object, section: str = None) -> bool:
+        """
+        Initializes attributes in class_instance.STORE_SCHEMA from section. If section = None, section
+        name is the class name. If section isn't in the store but is in the legacy config, it's read
+        from the legacy config and moved to the store.
+
+        Returns True if section was found.
+        """
+        section = section or class_instance.__class__.__name__
+        with self.lock:
+            if section in self._sections:
+                decode(class_instance, self._sections[section])
+                return True
+            if self._legacy_config and self._legacy_config.has_section(section):
+                self._legacy_config.init_class(class_instance, section)
+                self.write_class(class_instance, section)
+                self.remove_legacy_sections(section)
+                self._logger.info(f"{section} moved from {self._legacy_config.FILE_NAME}")
+                return True
+            return False
+
+    def write_class(self, class_instance: object, section: str = None):
+        """
+        Writes attributes in class_instance.STORE_SCHEMA to section. If section = None, section name
+        is the class name.
+        """
+        section = section or class_instance.__class__.__name__
+        data = encode(class_instance)
+        with self.batch():
+            if self._sections.get(section) != data:
+                self._sections[section] = data
+                self._dirty = True
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Same as Config.batch(). settings.json is written once at the end of the outermost with block,
+        and only if something changed. Fish files aren't affected, since each one is written on its own.
+        """
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self._write_file()
+
+    def get_fish(self, key: str) -> dict:
+        path = self._get_fish_path(key)
+        with self.lock:
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path) as fish_file:
+                    text = fish_file.read()
+                data = json.loads(text)
+            except (OSError, ValueError):
+                self._logger.exception(f"couldn't read {path}")
+                return None
+            self._fish_json[key] = text
+            return data
+
+    def set_fish(self, key: str, data: dict):
+        text = json.dumps(data, indent=4)
+        with self.lock:
+            if self._fish_json.get(key) == text:
+                return
+            self._save_text(self._get_fish_path(key), text)
+            self._fish_json[key] = text
+
+    def set_num_fish(self, num_fish: int):
+        """
+        Sets number of fish in saved fish list. Fish are saved with keys "1" to str(num_fish), so
+        any numbered fish past num_fish are deleted.
+        """
+        with self.batch():
+            if num_fish == self._num_fish:
+                return
+            for fish_num in range(num_fish + 1, (self._num_fish or 0) + 1):
+                key = str(fish_num)
+                self._save_text(self._get_fish_path(key), None)
+                self._fish_json.pop(key, None)
+            self._num_fish = num_fish
+            self._dirty = True
+
+    def remove_legacy_sections(self, *sections: str):
+        """
+        Removes sections from legacy config once they've been moved to the store. Sections aren't removed until 
+        settings.json is written, so if the app stops before then, they're still there to be moved next time.
+        """
+        if not self._legacy_config or not sections:
+            return
+        with self.batch():
+            self._legacy_sections.extend(sections)
+            self._dirty = True
+
+    def export(self, directory: str):
+        """
+        Copies settings.json and fish files to directory.
+        """
+        with self.lock:
+            if os.path.isdir(self.directory):
+                shutil.copytree(self.directory, directory, dirs_exist_ok=True)
+
+    @contextlib.contextmanager
+    def deferred(self):
+        """
+        Used by DebouncedSaver so that settings are encoded on the GUI thread and written on another one. The 
+        store is locked for the whole with block, so files saved by other threads aren't collected.
+        """
+        with self.lock:
+            files = {}
+            self._deferred_files = files
+            try:
+                yield files
+            finally:
+                self._deferred_files = None
+
+    def write_files(self, files: dict[str, tuple[int, str]]):
+        """
+        files is path -> (save number, text), where text is None if the file should be deleted. Raises OSError
+        if a file can't be written, in which case files can be passed in again to try again.
+        """
+        with self._write_lock:
+            for path, (save_num, text) in files.items():
+                if self._written.get(path, 0) > save_num:
+                    continue
+                if text is None:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+                else:
+                    self._write_text(path, text)
+                self._written[path] = save_num
+
+    def _get_fish_path(self, key: str) -> str:
+        return f"{self.directory}/{SettingsStore.FISH_DIRECTORY}/fish_{key}.json"
+
+    def _read_file(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path) as settings_file:
+                data = json.load(settings_file)
+        except (OSError, ValueError):
+            self._logger.exception(f"couldn't read {self.file_path}, using defaults")
+            return
+        version = data.get("version", SettingsStore.VERSION)
+        while version in _MIGRATIONS:
+            data = _MIGRATIONS[version](data)
+            version += 1
+        if version > SettingsStore.VERSION:
+            self._logger.warning(f"{self.file_path} is from a newer version ({version}) of the app")
+        self._sections = data.get("sections", {})
+        self._num_fish = data.get("num_fish")
+        self._logger.info("Settings file read")
+
+    def _write_file(self):
+        data = {"version": SettingsStore.VERSION, "num_fish": self._num_fish, "sections": self._sections}
+        self._save_text(self.file_path, json.dumps(data, indent=4))
+        self._dirty = False
+        #deferred files aren't written yet, so sections are left for the next write
+        if self._legacy_sections and self._deferred_files is None:
+            self._legacy_config.remove_sections(*self._legacy_sections)
+            self._legacy_sections = []
+
+    def _save_text(self, path: str, text: str):
+        """
+        Writes text to path, or deletes path if text is None. Inside deferred(), file is collected instead.
+        """
+        self._num_saved += 1
+        files = {path: (self._num_saved, text)}
+        if self._deferred_files is None:
+            self.write_files(files)
+        else:
+            self._deferred_files.update(files)
+
+    def _write_text(self, path: str, text: str):
+        """
+        Writes to temporary file and renames it, same as Config.write_config_file().
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as text_file:
+            text_file.write(text)
+        os.replace(temp_path, path)
@@ -0,0 +1,45 @@
+"""
+Times the phases of starting the app (imports, connecting to Micro-Manager, initializing devices, creating
+the GUI), so it's obvious which one is slow when startup gets slow again.
+"""
+
+import contextlib
+import logging
+import time
+
+
+class StartupProfile():
+    """
+    Records how long each phase of startup takes.
+
+    ## Methods:
+
+    #### phase(name)
+        context manager that times the code in it as phase name.
+
+    #### get_summary() -> str
+        returns time of each phase and total time.
+
+    #### log_summary()
+        writes summary to log. Phases are only logged at the end since the logger isn't set up until
+        LS_Pycro_App.utils is imported.
+    """
+    def __init__(self):
+        self.phases: list[tuple[str, float]] = []
+        self._start_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start_time))
+
+    def get_summary(self) -> str:
+        lines = [f"{name}: {duration_s:.2f} s" for name, duration_s in self.phases]
+        lines.append(f"total: {time.perf_counter() - self._start_time:.2f} s")
+        return "\n".join(lines)
+
+    def log_summary(self):
+        logging.getLogger(self.__class__.__name__).info(f"startup profile\n{self.get_summary()}")
@@ -1,7 +1,7 @@
 import numpy as np
 import skimage
 
-from LS_Pycro_App.utils.pycro import core
+from LS_Pycro_App.utils.pycro import camera_geometry
 
 
 def stitch_images(images: list[np.ndarray],
@@ -15,7 +15,7 @@ def stitch_images(images: list[np.ndarray],
     for image_num, image in enumerate(images):
         if image_num == 0:
             start_position = positions[image_num]
-            pixel_size = core.get_pixel_size_um()
+            pixel_size = camera_geometry.pixel_size_um
             stitched_x_range, stitched_y_range = _init_ranges(image.shape)
             stitched_image = image
         else:
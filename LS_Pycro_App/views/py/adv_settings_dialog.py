@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_AdvSettingsDialog(object):
     def setupUi(self, AdvSettingsDialog):
         AdvSettingsDialog.setObjectName("AdvSettingsDialog")
-        AdvSettingsDialog.resize(443, 301)
+        AdvSettingsDialog.resize(443, 471)
         self.acq_order_combo_box = QtWidgets.QComboBox(AdvSettingsDialog)
         self.acq_order_combo_box.setGeometry(QtCore.QRect(280, 40, 81, 22))
         self.acq_order_combo_box.setLayoutDirection(QtCore.Qt.LeftToRight)
@@ -131,6 +131,63 @@ class Ui_AdvSettingsDialog(object):
         self.z_stack_decon_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
         self.z_stack_decon_check_box.setGeometry(QtCore.QRect(60, 60, 121, 20))
         self.z_stack_decon_check_box.setObjectName("z_stack_decon_check_box")
+        self.storage_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.storage_label.setGeometry(QtCore.QRect(40, 305, 131, 20))
+        self.storage_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.storage_label.setObjectName("storage_label")
+        self.storage_directories_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.storage_directories_label.setGeometry(QtCore.QRect(10, 330, 101, 20))
+        self.storage_directories_label.setObjectName("storage_directories_label")
+        self.storage_directories_browse_button = QtWidgets.QPushButton(AdvSettingsDialog)
+        self.storage_directories_browse_button.setGeometry(QtCore.QRect(120, 330, 75, 23))
+        self.storage_directories_browse_button.setObjectName("storage_directories_browse_button")
+        self.storage_directories_line_edit = QtWidgets.QLineEdit(AdvSettingsDialog)
+        self.storage_directories_line_edit.setGeometry(QtCore.QRect(10, 360, 191, 20))
+        self.storage_directories_line_edit.setObjectName("storage_directories_line_edit")
+        self.storage_striping_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.storage_striping_check_box.setGeometry(QtCore.QRect(10, 390, 121, 20))
+        self.storage_striping_check_box.setObjectName("storage_striping_check_box")
+        self.line_8 = QtWidgets.QFrame(AdvSettingsDialog)
+        self.line_8.setGeometry(QtCore.QRect(200, 300, 20, 171))
+        self.line_8.setFrameShadow(QtWidgets.QFrame.Plain)
+        self.line_8.setLineWidth(4)
+        self.line_8.setFrameShape(QtWidgets.QFrame.VLine)
+        self.line_8.setObjectName("line_8")
+        self.post_processing_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.post_processing_label.setGeometry(QtCore.QRect(260, 305, 131, 20))
+        self.post_processing_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.post_processing_label.setObjectName("post_processing_label")
+        self.post_processing_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.post_processing_check_box.setGeometry(QtCore.QRect(230, 330, 161, 20))
+        self.post_processing_check_box.setObjectName("post_processing_check_box")
+        self.post_processing_mip_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.post_processing_mip_check_box.setGeometry(QtCore.QRect(230, 355, 61, 20))
+        self.post_processing_mip_check_box.setObjectName("post_processing_mip_check_box")
+        self.post_processing_preview_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.post_processing_preview_check_box.setGeometry(QtCore.QRect(300, 355, 81, 20))
+        self.post_processing_preview_check_box.setObjectName("post_processing_preview_check_box")
+        self.post_processing_checksum_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.post_processing_checksum_check_box.setGeometry(QtCore.QRect(230, 380, 81, 20))
+        self.post_processing_checksum_check_box.setObjectName("post_processing_checksum_check_box")
+        self.post_processing_qc_check_box = QtWidgets.QCheckBox(AdvSettingsDialog)
+        self.post_processing_qc_check_box.setGeometry(QtCore.QRect(320, 380, 61, 20))
+        self.post_processing_qc_check_box.setObjectName("post_processing_qc_check_box")
+        self.post_processing_num_workers_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.post_processing_num_workers_label.setGeometry(QtCore.QRect(230, 410, 81, 20))
+        self.post_processing_num_workers_label.setObjectName("post_processing_num_workers_label")
+        self.post_processing_num_workers_line_edit = QtWidgets.QLineEdit(AdvSettingsDialog)
+        self.post_processing_num_workers_line_edit.setGeometry(QtCore.QRect(320, 410, 61, 20))
+        self.post_processing_num_workers_line_edit.setObjectName("post_processing_num_workers_line_edit")
+        self.post_processing_io_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.post_processing_io_label.setGeometry(QtCore.QRect(230, 435, 81, 20))
+        self.post_processing_io_label.setObjectName("post_processing_io_label")
+        self.post_processing_io_line_edit = QtWidgets.QLineEdit(AdvSettingsDialog)
+        self.post_processing_io_line_edit.setGeometry(QtCore.QRect(320, 435, 61, 20))
+        self.post_processing_io_line_edit.setObjectName("post_processing_io_line_edit")
+        self.post_processing_io_unit_label = QtWidgets.QLabel(AdvSettingsDialog)
+        self.post_processing_io_unit_label.setGeometry(QtCore.QRect(380, 435, 31, 16))
+        self.post_processing_io_unit_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.post_processing_io_unit_label.setObjectName("post_processing_io_unit_label")
 
         self.retranslateUi(AdvSettingsDialog)
         QtCore.QMetaObject.connectSlotsByName(AdvSettingsDialog)
@@ -170,6 +227,29 @@ class Ui_AdvSettingsDialog(object):
         self.end_videos_num_frames_line_edit.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Exposure time for use in Z-stack. </p><p>If spectral Z-stack is enabled, exposure time is only limited by camera\'s min/max exposure time. </p><p>If both spectral Z-stack and custom exposure are disabled, exposure time will be ~ 1/stage_speed</p><p>If spectral Z-stack is disabaled but custom exposure is enabled, allowed exposure time is determined by camera\'s allowed exposure in external trigger mode. See Hamamatsu documentation for more details.</p></body></html>"))
         self.z_stack_decon_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>If checked, Z-stack will be performed in the following way:</p><p>1. stage will move to first position.</p><p>2. Images will be taken with each channel selected.</p><p>3. stage will move by the set step size.</p><p>4. repeat 2 and 3 until end position is reached.</p><p>Otherwise, Z-stack will be performed with continuous stage motion, acquiring one channel at a time.</p></body></html>"))
         self.z_stack_decon_check_box.setText(_translate("AdvSettingsDialog", "Decon Z-Stack"))
+        self.storage_label.setText(_translate("AdvSettingsDialog", "<html><head/><body><p><span style=\" font-weight:600;\">Storage</span></p></body></html>"))
+        self.storage_directories_label.setText(_translate("AdvSettingsDialog", "Extra Directories:"))
+        self.storage_directories_browse_button.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Browse and add a directory to the extra directories.</p></body></html>"))
+        self.storage_directories_browse_button.setText(_translate("AdvSettingsDialog", "Add..."))
+        self.storage_directories_line_edit.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Save directories used after the main and backup directories, separated by semicolons.</p><p>They\'re always used, and count as full at the same percentage as the backup directory.</p></body></html>"))
+        self.storage_striping_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>If checked, regions are spread across every save directory instead of filling them one at a time.</p></body></html>"))
+        self.storage_striping_check_box.setText(_translate("AdvSettingsDialog", "Stripe Regions"))
+        self.post_processing_label.setText(_translate("AdvSettingsDialog", "<html><head/><body><p><span style=\" font-weight:600;\">Post-Processing</span></p></body></html>"))
+        self.post_processing_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>If checked, the jobs below are run in the background on every datastore as soon as it\'s saved.</p></body></html>"))
+        self.post_processing_check_box.setText(_translate("AdvSettingsDialog", "Enable Post-Processing"))
+        self.post_processing_mip_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Saves a maximum intensity projection of every channel.</p></body></html>"))
+        self.post_processing_mip_check_box.setText(_translate("AdvSettingsDialog", "MIP"))
+        self.post_processing_preview_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Saves a downsampled 8-bit maximum intensity projection of every channel, for quickly looking through an acquisition.</p></body></html>"))
+        self.post_processing_preview_check_box.setText(_translate("AdvSettingsDialog", "Preview"))
+        self.post_processing_checksum_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Saves a SHA-256 checksum of every saved file.</p></body></html>"))
+        self.post_processing_checksum_check_box.setText(_translate("AdvSettingsDialog", "Checksum"))
+        self.post_processing_qc_check_box.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Saves image statistics (mean, min, max, saturation) and the sharpest frame of every channel.</p></body></html>"))
+        self.post_processing_qc_check_box.setText(_translate("AdvSettingsDialog", "QC"))
+        self.post_processing_num_workers_label.setText(_translate("AdvSettingsDialog", "Workers:"))
+        self.post_processing_num_workers_line_edit.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Number of processes post-processing is run in.</p></body></html>"))
+        self.post_processing_io_label.setText(_translate("AdvSettingsDialog", "Read Limit:"))
+        self.post_processing_io_line_edit.setWhatsThis(_translate("AdvSettingsDialog", "<html><head/><body><p>Total rate post-processing reads datastores at, so it doesn\'t slow down the acquisition.</p></body></html>"))
+        self.post_processing_io_unit_label.setText(_translate("AdvSettingsDialog", "MB/s"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+from typing import Callable
+
+from PyQt5 import QtCore
+
+
+class RegionTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model for the region table views. Values are read straight from the fish list instead of
+    being copied into a QStandardItem per cell, and refresh() only tells the view about rows that
+    actually changed. Before this, the whole QStandardItemModel was cleared and rebuilt on every edit,
+    which made the regions dialog sluggish with a few hundred regions.
+
+    ## Constructor parameters:
+
+    #### get_fish_list : Callable[[], list[Fish]]
+        returns fish list shown in table. Called on every refresh(), so the fish list can be replaced.
+
+    #### columns : list[tuple[str, Callable]]
+        (header, value function) for each column. Value function is called with (fish_num, region_num, region)
+        and should return the value shown in the column. Lists are shown comma separated.
+
+    ## Methods:
+
+    #### refresh(region=None)
+        reads fish list and updates view with rows that were added, removed, or changed. If region is given
+        and no regions have been added, removed, or reordered since the last refresh, only region's row is
+        read again, so editing a region doesn't format every cell in the table.
+    """
+    def __init__(self, get_fish_list: Callable, columns: list[tuple[str, Callable]], parent = None):
+        super().__init__(parent)
+        self._get_fish_list = get_fish_list
+        self._headers = [header for header, _ in columns]
+        self._value_functions = [value_function for _, value_function in columns]
+        self._rows: list[tuple[str]] = []
+        #id of region shown in each row, to tell if regions were added, removed, or reordered
+        self._row_ids: list[int] = []
+
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent = QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role = QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid():
+            return self._rows[index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role = QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def refresh(self, region = None):
+        entries = [(fish_num, region_num, fish_region) for fish_num, fish in enumerate(self._get_fish_list())
+                   for region_num, fish_region in enumerate(fish.region_list)]
+        row_ids = [id(entry[2]) for entry in entries]
+        if region is not None and row_ids == self._row_ids:
+            #region isn't in the table if it hasn't been set yet
+            if id(region) in row_ids:
+                row_num = row_ids.index(id(region))
+                row = self._get_row(*entries[row_num])
+                if row != self._rows[row_num]:
+                    self._rows[row_num] = row
+                    self.dataChanged.emit(self.index(row_num, 0), self.index(row_num, len(self._headers) - 1))
+            return
+        self._row_ids = row_ids
+        new_rows = [self._get_row(*entry) for entry in entries]
+        num_rows = len(self._rows)
+        num_new_rows = len(new_rows)
+        if num_new_rows < num_rows:
+            self.beginRemoveRows(QtCore.QModelIndex(), num_new_rows, num_rows - 1)
+            self._rows = self._rows[:num_new_rows]
+            self.endRemoveRows()
+        #changed rows are sent as contiguous blocks so that editing one region only repaints that row
+        first_changed = None
+        for row_num in range(min(num_rows, num_new_rows) + 1):
+            changed = row_num < min(num_rows, num_new_rows) and self._rows[row_num] != new_rows[row_num]
+            if changed:
+                self._rows[row_num] = new_rows[row_num]
+                if first_changed is None:
+                    first_changed = row_num
+            elif first_changed is not None:
+                self.dataChanged.emit(self.index(first_changed, 0), self.index(row_num - 1, len(self._headers) - 1))
+                first_changed = None
+        if num_new_rows > num_rows:
+            self.beginInsertRows(QtCore.QModelIndex(), num_rows, num_new_rows - 1)
+            self._rows.extend(new_rows[num_rows:])
+            self.endInsertRows()
+
+    def _get_row(self, fish_num: int, region_num: int, region) -> tuple[str]:
+        return tuple(_format(value_function(fish_num, region_num, region)) for value_function in self._value_functions)
+
+
+def _format(value) -> str:
+    if isinstance(value, list):
+        return ','.join(value)
+    return str(value)
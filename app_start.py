@@ -4,16 +4,32 @@ import sys
 from PyQt5 import QtGui
 from PyQt5.QtWidgets import QApplication
 
-from LS_Pycro_App.controllers.select_controller import select_microscope
 
-microscope_was_selected = select_microscope()
+#Post-processing workers import this module when they're started, so the app is only started when
+#this is run as a script.
+if __name__ == "__main__":
+    from LS_Pycro_App.controllers.select_controller import select_microscope
 
-if microscope_was_selected:
-    from LS_Pycro_App.controllers.main_controller import MainController
-    app = QApplication(sys.argv)
-    #This is what allows app icon to be used on taskbar
-    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("LS_Pycro_App")
-    controller = MainController()
-    app.setWindowIcon(QtGui.QIcon('app_icon.png'))
-    controller._main_window.setWindowIcon(QtGui.QIcon('app_icon.png'))
-    app.exec_()
+    microscope_was_selected = select_microscope()
+
+    if microscope_was_selected:
+        #utils can only be imported once microscope is selected, since it loads that microscope's settings
+        from LS_Pycro_App.utils.startup_profile import StartupProfile
+        startup_profile = StartupProfile()
+        with startup_profile.phase("import"):
+            from LS_Pycro_App import hardware
+            from LS_Pycro_App.controllers.main_controller import MainController
+            from LS_Pycro_App.utils import pycro
+        with startup_profile.phase("connect to Micro-Manager"):
+            pycro.connect()
+        with startup_profile.phase("initialize devices"):
+            device_report = hardware.init_devices()
+        with startup_profile.phase("create GUI"):
+            app = QApplication(sys.argv)
+            #This is what allows app icon to be used on taskbar
+            ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("LS_Pycro_App")
+            controller = MainController(device_report)
+            app.setWindowIcon(QtGui.QIcon('app_icon.png'))
+            controller._main_window.setWindowIcon(QtGui.QIcon('app_icon.png'))
+        startup_profile.log_summary()
+        app.exec_()
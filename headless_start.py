@@ -0,0 +1,166 @@
+"""
+Runs an acquisition without the GUI, so acquisitions can be scripted (overnight batches, dry run
+benchmarks) and don't need the Qt event loop. Micro-Manager still has to be running, same as with
+app_start.py, except for dry runs, which use the simulated core (see acquisition.dry_run).
+
+Settings are read from a settings directory, either the app's own (LSSettings/HTLSSettings) or one saved
+with an acquisition (Acquisition/settings), so an acquisition set up in the GUI can be run again
+as is. The settings directory has to have advanced settings (acquisition order, storage, post-processing)
+too, otherwise nothing is run. Progress is written to the console, or to a file with --progress.
+
+Examples:
+
+    python headless_start.py --settings D:/Acquisition/settings --directory E:/overnight
+    python headless_start.py --settings D:/Acquisition/settings --dry-run
+    python headless_start.py --resume D:/Acquisition
+    python headless_start.py --settings D:/Acquisition/settings --storage-directories E:/ F:/ --post-processing mip qc
+
+Ctrl+C aborts the acquisition the same way the abort button does.
+
+Exit codes are EXIT_SUCCESS, EXIT_FAILED (acquisition failed, device didn't initialize, or dry run
+found time points that don't fit in the time point interval), and EXIT_ABORTED. 2 is left for argparse,
+which uses it for invalid arguments.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+
+
+EXIT_SUCCESS = 0
+EXIT_FAILED = 1
+EXIT_ABORTED = 3
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Runs an acquisition without the GUI.")
+    parser.add_argument("--settings", help="settings directory (or its settings.json) to run with. Defaults to the "
+                        "app's settings, or the settings saved with the acquisition if --resume is used.")
+    parser.add_argument("--microscope", choices=["KLAMATH", "WILLAMETTE", "HTLS"],
+                        help="microscope to run on. Defaults to the one last selected in the app.")
+    parser.add_argument("--directory", help="directory to save acquisition in, in place of the one in settings")
+    parser.add_argument("--resume", metavar="ROOT", help="resumes acquisition saved in ROOT (not on HTLS)")
+    parser.add_argument("--dry-run", action="store_true", help="prints predicted timings instead of acquiring")
+    parser.add_argument("--progress", metavar="FILE", help="appends progress to FILE instead of the console")
+    parser.add_argument("--storage-directories", nargs="+", metavar="DIR",
+                        help="save directories used after the main and backup directories, in place of the ones in settings")
+    parser.add_argument("--striping", action=argparse.BooleanOptionalAction,
+                        help="spreads regions across every save directory instead of filling them in order")
+    parser.add_argument("--post-processing", nargs="*", metavar="JOB", choices=["mip", "preview", "checksum", "qc"],
+                        help="runs post-processing jobs on every datastore. With no jobs, post-processing is turned off.")
+    parser.add_argument("--post-processing-workers", type=int, metavar="N", help="number of post-processing processes")
+    parser.add_argument("--post-processing-io", type=float, metavar="MB_PER_S",
+                        help="total rate post-processing reads datastores at")
+    return parser
+
+
+def apply_adv_settings_args(args: argparse.Namespace, adv_settings):
+    """
+    Overrides adv_settings with the storage and post-processing options that were given.
+    """
+    if args.storage_directories is not None:
+        adv_settings.storage_directories = args.storage_directories
+    if args.striping is not None:
+        adv_settings.storage_striping_enabled = args.striping
+    if args.post_processing is not None:
+        adv_settings.post_processing_enabled = bool(args.post_processing)
+        if args.post_processing:
+            adv_settings.post_processing_jobs = args.post_processing
+    if args.post_processing_workers is not None:
+        adv_settings.post_processing_num_workers = args.post_processing_workers
+    if args.post_processing_io is not None:
+        adv_settings.post_processing_io_mb_per_s = args.post_processing_io
+
+
+def run(args: argparse.Namespace) -> int:
+    #microscope has to be set before anything else from LS_Pycro_App is imported, since hardware and
+    #utils are picked when they're imported.
+    from LS_Pycro_App.controllers import select_controller
+    from LS_Pycro_App.controllers.select_controller import MicroscopeConfig
+    if args.microscope:
+        select_controller.microscope = MicroscopeConfig[args.microscope]
+    is_htls = select_controller.microscope == MicroscopeConfig.HTLS
+    if args.resume and is_htls:
+        print("HTLS acquisitions can't be resumed", file=sys.stderr)
+        return EXIT_FAILED
+
+    from LS_Pycro_App.utils import exceptions, pycro, user_store
+    settings_directory = args.settings or (args.resume and f"{args.resume}/settings")
+    if settings_directory:
+        if os.path.isfile(settings_directory):
+            settings_directory = os.path.dirname(settings_directory)
+        if not os.path.isdir(settings_directory):
+            print(f"{settings_directory} is not a settings directory", file=sys.stderr)
+            return EXIT_FAILED
+        #no legacy config, so nothing is moved from the app's config into the directory
+        user_store.open(settings_directory)
+
+    from LS_Pycro_App import hardware
+    from LS_Pycro_App.acquisition.acq_gui import StreamAcqGui
+    from LS_Pycro_App.acquisition.dry_run import simulated_micro_manager
+    from LS_Pycro_App.acquisition.main import CLSAcquisition, HTLSAcquisition
+    from LS_Pycro_App.models.acq_directory import AcqDirectory
+    from LS_Pycro_App.models.acq_settings import AcqSettings, HTLSSettings
+
+    with contextlib.ExitStack() as stack:
+        if args.dry_run:
+            #nothing is moved or acquired, so settings and the dry run don't need Micro-Manager
+            stack.enter_context(simulated_micro_manager())
+        else:
+            pycro.connect()
+        stream = stack.enter_context(open(args.progress, "a")) if args.progress else sys.stdout
+        acq_gui = StreamAcqGui(stream)
+        abort_flag = exceptions.AbortFlag()
+        if is_htls:
+            htls_settings = HTLSSettings()
+            acq_settings = htls_settings.acq_settings
+        else:
+            acq_settings = AcqSettings()
+        #AdvSettings decide acquisition order, storage, and post-processing, so running with defaults because
+        #they weren't saved could put an acquisition somewhere nobody expects it.
+        if not acq_settings.adv_settings.init_from_config():
+            print(f"{user_store.directory} has no advanced settings. Open and close the advanced settings in the app "
+                  "to save them.", file=sys.stderr)
+            return EXIT_FAILED
+        if args.directory:
+            acq_settings.directory = args.directory
+        apply_adv_settings_args(args, acq_settings.adv_settings)
+
+        if args.resume:
+            acquisition = CLSAcquisition.resume(args.resume, acq_settings, acq_gui, abort_flag)
+        elif is_htls:
+            acquisition = HTLSAcquisition(htls_settings, acq_gui, AcqDirectory(acq_settings.directory), abort_flag)
+        else:
+            acquisition = CLSAcquisition(acq_settings, acq_gui, AcqDirectory(acq_settings.directory), abort_flag)
+
+        if args.dry_run:
+            report = acquisition.dry_run()
+            stream.write(f"{report.get_summary()}\n")
+            return EXIT_FAILED if report.missed_time_points else EXIT_SUCCESS
+
+        device_report = hardware.init_devices()
+        acq_gui.status_update(device_report.get_summary())
+        if not device_report.ok:
+            stream.write(f"{device_report.get_details()}\n")
+            return EXIT_FAILED
+
+        acquisition.start()
+        abort_requested = False
+        while acquisition.is_alive():
+            try:
+                acquisition.join(1)
+            except KeyboardInterrupt:
+                acq_gui.status_update("Abort requested")
+                abort_requested = True
+            #acquisition clears flag when it starts, so it's set again until acquisition sees it
+            if abort_requested:
+                abort_flag.abort = True
+        if acquisition.succeeded:
+            return EXIT_SUCCESS
+        return EXIT_ABORTED if abort_flag.abort else EXIT_FAILED
+
+
+#Post-processing workers import this module when they're started, same as app_start.py.
+if __name__ == "__main__":
+    sys.exit(run(get_parser().parse_args()))